@@ -1,31 +1,79 @@
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, request, jsonify, make_response, Response, g
 from flask_cors import CORS
 import os
 import json
+import time
 from dotenv import load_dotenv
-from services.rag_service import get_rag_response
-from supabase import create_client, Client
-
-# --- ZYND IMPORT (Safe Mode) ---
-try:
-    from zyndai_agent.agent import ZyndAIAgent, AgentConfig
-    zynd_available = True
-    print("✅ ZYND Library Loaded Successfully")
-except ImportError:
-    zynd_available = False
+from services.rag_service import get_rag_response, stream_rag_response, batch_rag_responses, BATCH_LLM_CONCURRENCY
+from services import rag_service, telemetry
+from services.telemetry import REGISTRY, HTTP_SECONDS, span
+from services.persistence import WriteBehindQueue, new_id, utc_now
+from services.history_cache import HistoryService, HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE
+from services.chat_sync import ChatSync, CHAT_PAGE_SIZE, CHAT_MAX_PAGE_SIZE
+from services.compression import compress_response
+from services.answer_cache import answer_cache
+from services.context_assembly import context_metrics
+from services.single_flight import single_flight
+from services.conversation_memory import ConversationMemory, MEMORY_ENABLED
+from services.lazy import module_available
+from services.warmup import Prewarmer, PREWARM_ENABLED
+
+# --- ZYND CHECK (Safe Mode) ---
+# Sirf availability check; import (aur uska poora dependency tree) cold start pe nahi
+zynd_available = module_available("zyndai_agent")
+if zynd_available:
+    print("✅ ZYND Library Found")
+else:
     print("⚠️ ZYND Library NOT Found")
 
 load_dotenv()
 
+# --- CONFIGURATION ---
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "500"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))
+
 app = Flask(__name__)
-CORS(app)
+# Pagination cursor + ETag frontend JS ko padhne do
+CORS(app, expose_headers=["ETag", "X-Next-Cursor", "X-Prev-Cursor", "X-Request-ID", "Server-Timing"])
+# print() lines me request ID (LOG_FORMAT=json ho to structured JSON logs)
+telemetry.install_log_context()
 
 
 
 # --- SUPABASE SETUP ---
-SUPABASE_URL = os.environ.get("SUPABASE_URL")
-SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# rag_service wala shared client: lazy, pehli DB call (ya prewarm) pe banta hai
+supabase = rag_service.supabase
+
+# DB writes background me batch hote hain, response unka wait nahi karta
+persistence = WriteBehindQueue(supabase)
+# Sidebar history: keyset pages + ETag; naya conversation DB me likhte hi cache invalidate
+history = HistoryService(supabase)
+persistence.add_listener(history.on_write)
+# Recently opened conversations ka LRU; /chat ke writes flush hote hi isme jud jaate hain
+chat_sync = ChatSync(supabase)
+persistence.add_listener(chat_sync.on_write)
+# Follow-ups ke liye: aakhri turns (chat_sync cache se) + purane turns ki rolling summary
+conversation_memory = ConversationMemory(supabase, chat_sync, rag_service.model_router.providers)
+
+# /metrics: services ke existing stats() bhi gauges ban ke export hote hain
+REGISTRY.register_stats("niti_answer_cache", answer_cache.stats, "Semantic answer cache")
+REGISTRY.register_stats("niti_embedding_cache", rag_service.embeddings.cache.stats, "Query embedding cache")
+REGISTRY.register_stats("niti_single_flight", single_flight.stats, "Coalesced RAG queries")
+REGISTRY.register_stats("niti_context", context_metrics.stats, "Context assembly")
+REGISTRY.register_stats("niti_llm_provider", rag_service.model_router.stats, "LLM provider health")
+REGISTRY.register_stats("niti_persistence", persistence.stats, "Write-behind queue")
+REGISTRY.register_stats("niti_history_cache", history.stats, "History page cache")
+REGISTRY.register_stats("niti_chat_sync", chat_sync.stats, "Conversation cache")
+REGISTRY.register_stats("niti_memory", conversation_memory.stats, "Conversation memory")
+REGISTRY.register_stats("niti_fast_path", rag_service.fast_path.stats, "Zero-LLM scheme answers")
+REGISTRY.register_stats("niti_partitions", rag_service.partition_metrics.stats, "Partitioned retrieval")
+
+# --- PREWARM (Cold start) ---
+# Import me sirf halka kaam; heavy clients background me, server tab tak /healthz de sakta hai
+prewarmer = Prewarmer(rag_service.warmup_steps())
+REGISTRY.register_stats("niti_prewarm", prewarmer.stats, "Background prewarm")
+if PREWARM_ENABLED:
+    prewarmer.start()
 
 # --- HELPER: GENERATE TITLE (Improved) ---
 def generate_title(text):
@@ -41,6 +89,76 @@ def generate_title(text):
     except:
         return "New Chat"
 
+# --- HELPER: QUEUE CHAT WRITES (Non-blocking) ---
+def save_chat_turn(user_id, conversation_id, user_query, ai_response, asked_at):
+    """Naya conversation ho to ID yahin banti hai; rows write-behind queue me jaati hain."""
+    if not conversation_id:
+        conversation_id = new_id()
+        persistence.enqueue_conversation({
+            "id": conversation_id,
+            "user_id": user_id,
+            "title": generate_title(user_query),
+            "created_at": asked_at
+        })
+    # Message IDs bhi yahin: retry/spool replay upsert karta hai, duplicate messages nahi
+    persistence.enqueue_messages([
+        {"id": new_id(), "conversation_id": conversation_id, "role": "user", "content": user_query, "user_id": user_id, "created_at": asked_at},
+        {"id": new_id(), "conversation_id": conversation_id, "role": "ai", "content": ai_response, "user_id": user_id, "created_at": utc_now()}
+    ])
+    return conversation_id
+
+# --- HELPER: CONVERSATION MEMORY ---
+def load_memory(conversation_id):
+    """Purane conversation ka memory context; load fail ho to bina memory ke jawab do."""
+    if not MEMORY_ENABLED or not conversation_id:
+        return None
+    try:
+        with span("memory"):
+            return conversation_memory.context(conversation_id)
+    except Exception as e:
+        print(f"⚠️ Memory load failed: {e}")
+        return None
+
+# --- HELPER: SSE EVENT FORMAT ---
+def sse_event(event, payload):
+    # JSON encode taaki markdown ke newlines SSE frame na todein
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+# --- REQUEST TELEMETRY ---
+@app.before_request
+def start_request_telemetry():
+    # Proxy/frontend ka X-Request-ID ho to wahi, taaki logs jod sakein
+    g.request_id = telemetry.start_request(request.headers.get("X-Request-ID"))
+    g.request_started = time.perf_counter()
+    REGISTRY.ensure_flusher()
+
+# Bade JSON responses (lambe markdown answers) gzip/brotli
+@app.after_request
+def compress(response):
+    return compress_response(response, request.headers.get("Accept-Encoding", ""))
+
+# Compression ke baad register, isliye pehle chalta hai (Flask after_request reverse order me)
+@app.after_request
+def finish_request_telemetry(response):
+    started = g.get("request_started")
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    # Stream ke liye ye time-to-first-byte hai; LLM stage ka poora time niti_stage_seconds me
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    HTTP_SECONDS.observe(elapsed, route=route, method=request.method, status=response.status_code)
+    response.headers["X-Request-ID"] = g.request_id
+    timings = telemetry.request_timings()
+    if timings:
+        response.headers["Server-Timing"] = telemetry.server_timing_header(timings)
+        stages = " ".join(f"{stage}={seconds * 1000:.0f}ms" for stage, seconds in timings)
+        print(f"⏱️ {request.method} {route} {response.status_code} {elapsed * 1000:.0f}ms | {stages}")
+    return response
+
+@app.teardown_request
+def end_request_telemetry(error=None):
+    telemetry.end_request()
+
 # --- ROUTES ---
 
 @app.route("/", methods=["GET"])
@@ -48,6 +166,20 @@ def home():
     return jsonify({"message": "Niti.ai Backend is Live with New Schema! 🚀"})
 
 
+# Liveness: process zinda hai (koi dependency check nahi, hamesha sasta)
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    return jsonify({"status": "ok"})
+
+
+# Readiness: heavy clients/indexes taiyaar. Prewarm band ho to pehla probe hi use shuru karta hai
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    prewarmer.start()
+    status = prewarmer.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+
 @app.route("/chat", methods=["POST"])
 def chat():
     try:
@@ -56,36 +188,20 @@ def chat():
         user_id = data.get("session_id", "guest")
         conversation_id = data.get("conversation_id")
 
-        print(f"📩 Query: {user_query} | ID: {conversation_id}") # DEBUG LOG
+        print(f"📩 Query: {len(user_query)} chars | ID: {conversation_id}")
 
         if not user_query:
             return jsonify({"error": "No query provided"}), 400
 
-        # 1. AI Response
-        ai_response = get_rag_response(user_query)
-
-        # 2. Database Operations
-        if user_id: 
-            try:
-                # A. Create Conversation if it doesn't exist
-                if not conversation_id:
-                    title = generate_title(user_query)
-                    conv_res = supabase.table("conversations").insert({
-                        "user_id": user_id,
-                        "title": title
-                    }).execute()
-                    if conv_res.data:
-                        conversation_id = conv_res.data[0]['id']
-
-                        # B. Save Messages (If conversation_id is available)
-                        if conversation_id:
-                            supabase.table("messages").insert([
-                                {"conversation_id": conversation_id, "role": "user", "content": user_query, "user_id": user_id},
-                        {"conversation_id": conversation_id, "role": "ai", "content": ai_response, "user_id": user_id}
-                    ]).execute()
-                    print("✅ Messages Saved!")
-            except Exception as e:
-                print(f"❌ DB Save Failed: {e}")
+        asked_at = utc_now()
+
+        # 1. AI Response (follow-up ho to pichhli baatcheet ke saath)
+        ai_response = get_rag_response(user_query, memory=load_memory(conversation_id))
+
+        # 2. Database Operations (Background queue, koi round trip nahi)
+        if user_id:
+            with span("db_enqueue"):
+                conversation_id = save_chat_turn(user_id, conversation_id, user_query, ai_response, asked_at)
 
         return jsonify({
             "response": ai_response,
@@ -98,7 +214,112 @@ def chat():
 
 
 
-# app.py ke 'get_history' function ko isse replace karein:
+# ⚡ STREAMING: Same as /chat, par tokens aate hi bhejta hai (Server-Sent Events)
+@app.route("/chat/stream", methods=["POST"])
+def chat_stream():
+    data = request.json or {}
+    user_query = data.get("text", "")
+    user_id = data.get("session_id", "guest")
+    conversation_id = data.get("conversation_id")
+
+    print(f"📩 Stream Query: {len(user_query)} chars | ID: {conversation_id}")
+
+    if not user_query:
+        return jsonify({"error": "No query provided"}), 400
+
+    asked_at = utc_now()
+    # Conversation ID abhi bana lo, taaki pehle event me hi bhej sakein
+    is_new_conversation = bool(user_id) and not conversation_id
+    conv_id = new_id() if is_new_conversation else conversation_id
+    request_id = g.request_id
+
+    def generate():
+        # Generator response ke baad chalta hai: stream ke logs/spans bhi isi request ID pe
+        telemetry.start_request(request_id)
+        # 1. Conversation ID sabse pehle bhejo
+        yield sse_event("meta", {"conversation_id": conv_id})
+
+        # 2. Tokens stream karo
+        parts = []
+        try:
+            memory = None if is_new_conversation else load_memory(conv_id)
+            for token in stream_rag_response(user_query, memory=memory):
+                parts.append(token)
+                yield sse_event("token", {"text": token})
+        except Exception as e:
+            print(f"Stream Error: {e}")
+            yield sse_event("error", {"response": "⚠️ Server Error"})
+            return
+
+        # 3. Stream complete hone ke baad poora message queue karo
+        if user_id:
+            save_chat_turn(user_id, None if is_new_conversation else conv_id,
+                           user_query, "".join(parts), asked_at)
+
+        yield sse_event("done", {"conversation_id": conv_id})
+
+    return Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"  # Proxy buffering band, warna tokens atak jaate hain
+    })
+
+
+# 📦 BATCH: Eval / bulk answering. Body: {"queries": ["...", {"id": "q1", "text": "..."}], "concurrency": 8}
+# Response JSONL (application/x-ndjson): har answer complete hote hi ek line, aakhir me summary line
+@app.route("/chat/batch", methods=["POST"])
+def chat_batch():
+    data = request.get_json(silent=True) or {}
+    items = data.get("queries")
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "No queries provided"}), 400
+    if len(items) > BATCH_MAX_QUERIES:
+        return jsonify({"error": f"Too many queries (max {BATCH_MAX_QUERIES})"}), 400
+
+    ids, texts = [], []
+    for item in items:
+        if isinstance(item, dict):
+            ids.append(item.get("id"))
+            texts.append(str(item.get("text") or "").strip())
+        else:
+            ids.append(None)
+            texts.append(str(item or "").strip())
+    if not all(texts):
+        return jsonify({"error": "Empty query in batch"}), 400
+    try:
+        concurrency = min(max(int(data.get("concurrency", BATCH_LLM_CONCURRENCY)), 1), BATCH_MAX_CONCURRENCY)
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid concurrency"}), 400
+
+    print(f"📦 Batch Query: {len(texts)} queries @ concurrency {concurrency}") # DEBUG LOG
+    request_id = g.request_id
+
+    def generate():
+        telemetry.start_request(request_id)
+        started = time.perf_counter()
+        done = errors = cached = fast = 0
+        try:
+            for item in batch_rag_responses(texts, concurrency=concurrency):
+                if ids[item["index"]] is not None:
+                    item["id"] = ids[item["index"]]
+                done += 1
+                errors += "error" in item
+                cached += item["cached"]
+                fast += item["fast_path"]
+                yield json.dumps(item, ensure_ascii=False) + "\n"
+        except Exception as e:
+            # Embedding/retrieval hi fail hua: client ko line me batao (status 200 ja chuka)
+            print(f"Batch Error: {e}")
+            yield json.dumps({"error": "⚠️ Server Error"}) + "\n"
+        yield json.dumps({"summary": {"queries": len(texts), "completed": done, "errors": errors, "cached": cached,
+                                      "fast_path": fast, "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}}) + "\n"
+        telemetry.end_request()
+
+    return Response(generate(), mimetype="application/x-ndjson", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
 @app.route("/history", methods=["GET"])
 def get_history():
     try:
@@ -107,33 +328,64 @@ def get_history():
         if not user_id:
             return jsonify([])
 
-        response = supabase.table("conversations")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .order("created_at", desc=True)\
-            .execute()
+        cursor = request.args.get("cursor") or None
+        limit = request.args.get("limit", type=int)
+        # limit/cursor dono na hon to poori list: frontend ka sidebar abhi pages nahi maangta
+        if limit is not None or cursor:
+            limit = min(max(limit or HISTORY_PAGE_SIZE, 1), HISTORY_MAX_PAGE_SIZE)
 
-        return jsonify(response.data)
+        # Version same hai to client ke paas wahi list hai: DB query hi nahi
+        version, etag = history.etag(user_id, cursor, limit)
+        if request.if_none_match.contains_weak(etag):
+            history.record_not_modified()
+            response = make_response("", 304)
+        else:
+            rows, next_cursor = history.page(user_id, version, cursor=cursor, limit=limit)
+            response = jsonify(rows)
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
     except Exception as e:
         print(f"History Error: {e}")
         return jsonify([])
 
 
 # ✅ NEW: Get Full Chat Messages (Jab user click kare)
+# ?since=<X-Next-Cursor> sirf naye messages; ?before=<X-Prev-Cursor> purana page; ?limit=N; kuch nahi = sab
 @app.route("/chat/<conversation_id>", methods=["GET"])
 def get_chat_messages(conversation_id):
     try:
-        # Messages layenge specific chat ke liye
-        response = supabase.table("messages")\
-            .select("*")\
-            .eq("conversation_id", conversation_id)\
-            .order("created_at", desc=False)\
-            .execute() # Ascending order (Purana pehle)
-        
-        return jsonify(response.data)
+        # Cursor = opaque (created_at, id) keyset, history ke cursor jaisa
+        since = request.args.get("since") or None
+        before = request.args.get("before") or None
+        limit = request.args.get("limit", type=int)
+        # limit/cursor na hon to poori chat: ChatInterface abhi X-Prev-Cursor se purane pages nahi laata
+        if limit is not None or since or before:
+            limit = min(max(limit or CHAT_PAGE_SIZE, 1), CHAT_MAX_PAGE_SIZE)
+
+        # Latest page, Ascending order (Purana pehle)
+        rows, prev_cursor, next_cursor = chat_sync.messages(conversation_id, since=since, before=before, limit=limit)
+
+        response = jsonify(rows)
+        if prev_cursor:
+            response.headers["X-Prev-Cursor"] = prev_cursor
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
     except Exception as e:
         print(f"Chat Load Error: {e}")
         return jsonify([])
 
+# Prometheus scrape endpoint
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=10000)
\ No newline at end of file
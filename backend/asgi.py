@@ -0,0 +1,335 @@
+"""
+ASGI entrypoint. /chat aur /chat/stream yahan async chalte hain: ek event loop pe hazaaron
+chats LLM ka wait kar sakti hain, har request ke liye worker/thread block nahi hota. Baaki
+saare routes (history, /chat/<id>, /metrics, CORS preflight) wahi Flask app, ek bounded
+thread pool me. Route contracts same: JSON shape, status codes, headers (CORS, compression,
+X-Request-ID, Server-Timing) Flask ke after_request hooks hi lagate hain.
+
+Run:
+    uvicorn asgi:app --host 0.0.0.0 --port 10000
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker -w 2 --bind 0.0.0.0:10000
+"""
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+
+from flask import g
+
+import app as flask_backend
+from services import telemetry
+from services.async_rag import aget_rag_response, astream_rag_response
+from services.persistence import new_id, utc_now
+from services.telemetry import REGISTRY, span
+
+# --- CONFIGURATION ---
+# Ek process me itni chats ek saath; upar wali requests ko turant 503 (memory bounded rehti hai)
+ASGI_MAX_IN_FLIGHT = int(os.getenv("ASGI_MAX_IN_FLIGHT", "2000"))
+ASGI_MAX_BODY_BYTES = int(os.getenv("ASGI_MAX_BODY_BYTES", str(1024 * 1024)))
+# Flask wale routes (chhote DB reads) ke liye threads
+ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "32"))
+
+flask_app = flask_backend.app
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+async def _read_body(receive, limit=ASGI_MAX_BODY_BYTES):
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ConnectionResetError("client disconnected")
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            raise _BodyTooLarge()
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def _environ(scope, body):
+    """ASGI HTTP scope -> WSGI environ (PEP 3333)."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    root_path = scope.get("root_path", "")
+    path = scope["path"]
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": root_path.encode("utf-8").decode("latin-1"),
+        "PATH_INFO": (path[len(root_path):] if root_path and path.startswith(root_path) else path)
+        .encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name == "CONTENT_LENGTH":
+            continue  # Body ki asli length upar set hai
+        else:
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _header_pairs(response):
+    return [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in response.headers.items()]
+
+
+async def _send_response(send, response):
+    """Buffered werkzeug Response ko ASGI messages me bhejo."""
+    body = response.get_data()
+    response.headers["Content-Length"] = str(len(body))
+    await send({"type": "http.response.start", "status": response.status_code, "headers": _header_pairs(response)})
+    await send({"type": "http.response.body", "body": body})
+
+
+class WsgiBridge:
+    """Flask (WSGI) app ko bounded thread pool me chalata hai. Response poora buffer hota hai."""
+
+    def __init__(self, wsgi_app, max_workers=ASGI_WSGI_THREADS):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wsgi-bridge")
+
+    def _call(self, environ):
+        state = {}
+
+        def start_response(status, headers, exc_info=None):
+            state["status"] = int(status.split(" ", 1)[0])
+            state["headers"] = headers
+            return lambda data: state.setdefault("written", []).append(data)
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            body = b"".join(state.pop("written", [])) + b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return state["status"], state["headers"], body
+
+    async def __call__(self, scope, body, send):
+        loop = asyncio.get_running_loop()
+        status, headers, body = await loop.run_in_executor(self.executor, self._call, _environ(scope, body))
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]})
+        await send({"type": "http.response.body", "body": body})
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+def _finish(environ, request_id, started, build):
+    """
+    Flask ke request context me response banao aur uske after_request hooks chalao
+    (CORS, compression, X-Request-ID, Server-Timing, HTTP histogram), bilkul WSGI path jaisa.
+    """
+    with flask_app.request_context(environ):
+        g.request_id = request_id
+        g.request_started = started
+        return flask_app.process_response(build())
+
+
+def _parse_json(body):
+    data = json.loads(body or b"null")
+    if not isinstance(data, dict):
+        raise ValueError("JSON object expected")
+    return data
+
+
+# --- NATIVE ROUTES ---
+async def chat(environ, body, send):
+    """POST /chat, app.chat jaisa contract, par RAG pipeline async."""
+    request_id = telemetry.start_request(environ.get("HTTP_X_REQUEST_ID"))
+    started = time.perf_counter()
+    try:
+        data = _parse_json(body)
+        user_query = data.get("text", "")
+        user_id = data.get("session_id", "guest")
+        conversation_id = data.get("conversation_id")
+
+        # User ka text logs me nahi (PII), sirf size
+        print(f"📩 Query: {len(user_query)} chars | ID: {conversation_id}")
+
+        if not user_query:
+            payload, status = {"error": "No query provided"}, 400
+        else:
+            asked_at = utc_now()
+            # 1. AI Response (LLM ka wait event loop pe, thread free)
+            memory = await asyncio.to_thread(flask_backend.load_memory, conversation_id)
+            ai_response = await aget_rag_response(user_query, memory=memory)
+            # 2. Database Operations (Background queue, koi round trip nahi)
+            if user_id:
+                with span("db_enqueue"):
+                    # Queue bhari ho to enqueue disk spool pe likhta hai: thread me, loop pe nahi
+                    conversation_id = await asyncio.to_thread(flask_backend.save_chat_turn, user_id,
+                                                              conversation_id, user_query, ai_response, asked_at)
+            payload, status = {"response": ai_response, "conversation_id": conversation_id}, 200
+    except Exception as e:
+        print(f"Server Error: {e}")
+        payload, status = {"response": "⚠️ Server Error"}, 500
+
+    response = _finish(environ, request_id, started, lambda: flask_app.make_response((payload, status)))
+    await _send_response(send, response)
+
+
+async def _wait_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def chat_stream(environ, body, send, receive):
+    """POST /chat/stream: SSE events (meta, token..., done/error) jaise app.chat_stream."""
+    request_id = telemetry.start_request(environ.get("HTTP_X_REQUEST_ID"))
+    started = time.perf_counter()
+    try:
+        data = _parse_json(body)
+    except ValueError:
+        data = {}
+    user_query = data.get("text", "")
+    user_id = data.get("session_id", "guest")
+    conversation_id = data.get("conversation_id")
+
+    print(f"📩 Stream Query: {len(user_query)} chars | ID: {conversation_id}")
+
+    if not user_query:
+        response = _finish(environ, request_id, started,
+                           lambda: flask_app.make_response(({"error": "No query provided"}, 400)))
+        await _send_response(send, response)
+        return
+
+    asked_at = utc_now()
+    is_new_conversation = bool(user_id) and not conversation_id
+    conv_id = new_id() if is_new_conversation else conversation_id
+
+    response = _finish(environ, request_id, started, lambda: flask_app.response_class(
+        mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}))
+    response.headers.pop("Content-Length", None)
+    # Request context band hote hi teardown ne ID hata diya; stream ke logs/spans isi ID pe
+    telemetry.start_request(request_id)
+
+    async def events():
+        sse_event = flask_backend.sse_event
+        yield sse_event("meta", {"conversation_id": conv_id})
+        parts = []
+        try:
+            memory = None if is_new_conversation else await asyncio.to_thread(flask_backend.load_memory, conv_id)
+            async for token in astream_rag_response(user_query, memory=memory):
+                parts.append(token)
+                yield sse_event("token", {"text": token})
+        except Exception as e:
+            print(f"Stream Error: {e}")
+            yield sse_event("error", {"response": "⚠️ Server Error"})
+            return
+        if user_id:
+            await asyncio.to_thread(flask_backend.save_chat_turn, user_id, None if is_new_conversation else conv_id,
+                                    user_query, "".join(parts), asked_at)
+        yield sse_event("done", {"conversation_id": conv_id})
+
+    async def pump():
+        await send({"type": "http.response.start", "status": response.status_code,
+                    "headers": _header_pairs(response)})
+        async for event in events():
+            await send({"type": "http.response.body", "body": event.encode("utf-8"), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    # Client chala jaye to LLM stream cancel (single-flight followers ko error milta hai)
+    stream_task = asyncio.ensure_future(pump())
+    disconnect_task = asyncio.ensure_future(_wait_disconnect(receive))
+    try:
+        await asyncio.wait({stream_task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnect_task.cancel()
+        if not stream_task.done():
+            print("⚠️ Stream client disconnected")
+            stream_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await stream_task
+        telemetry.end_request()
+
+
+NATIVE_ROUTES = {("POST", "/chat"): chat, ("POST", "/chat/stream"): chat_stream}
+
+
+class NitiASGI:
+    def __init__(self):
+        self.bridge = WsgiBridge(flask_app.wsgi_app)
+        self.in_flight = 0
+        self.rejected = 0
+        REGISTRY.register_stats("niti_asgi", self.stats, "ASGI native routes")
+
+    def stats(self):
+        return {"in_flight": self.in_flight, "rejected": self.rejected, "max_in_flight": ASGI_MAX_IN_FLIGHT}
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                # Bachi hui chat writes DB tak pahunchao
+                await asyncio.to_thread(flask_backend.persistence.shutdown)
+                self.bridge.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            return  # Websockets support nahi
+
+        try:
+            body = await _read_body(receive)
+        except _BodyTooLarge:
+            return await _send_response(send, flask_app.response_class(
+                json.dumps({"error": "Request too large"}), status=413, mimetype="application/json"))
+        except ConnectionResetError:
+            return
+
+        root_path = scope.get("root_path", "")
+        path = scope["path"][len(root_path):] if root_path else scope["path"]
+        handler = NATIVE_ROUTES.get((scope["method"], path))
+        if handler is None:
+            return await self.bridge(scope, body, send)
+
+        if self.in_flight >= ASGI_MAX_IN_FLIGHT:
+            self.rejected += 1
+            response = flask_app.response_class(json.dumps({"error": "Server busy, please retry"}), status=503,
+                                                mimetype="application/json", headers={"Retry-After": "1"})
+            return await _send_response(send, response)
+
+        REGISTRY.ensure_flusher()
+        self.in_flight += 1
+        try:
+            environ = _environ(scope, body)
+            if handler is chat_stream:
+                await chat_stream(environ, body, send, receive)
+            else:
+                await handler(environ, body, send)
+        finally:
+            self.in_flight -= 1
+
+
+app = NitiASGI()
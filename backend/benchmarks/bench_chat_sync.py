@@ -0,0 +1,128 @@
+"""
+GET /chat/<id> sync benchmark against an in-memory fake Supabase (simulated round-trip latency):
+purana full reload (select *) vs latest page, warm LRU, `since` incremental sync, backwards paging.
+Payload sizes raw / gzip / brotli bhi.
+
+Run from backend/:
+    python -m benchmarks.bench_chat_sync --messages 400 --latency 0.03
+"""
+import argparse
+import gzip
+import json
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.fake_supabase import FakeSupabase
+from services.chat_sync import ChatSync
+from services.history_cache import VersionCounter, encode_cursor
+
+ANSWER = (
+    "## PM Kisan Samman Nidhi\n\n"
+    "- **Benefit:** ₹6,000 per year in three installments of ₹2,000\n"
+    "- **Eligibility:** Small and marginal farmer families with cultivable land\n"
+    "- **Documents:** Aadhaar, bank passbook, land records\n\n"
+) * 6
+
+
+def seed_conversation(client, conversation_id, count):
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(count):
+        rows.append({
+            "conversation_id": conversation_id, "user_id": "bench-user",
+            "role": "user" if i % 2 == 0 else "ai",
+            "content": "PM Kisan eligibility kya hai?" if i % 2 == 0 else ANSWER,
+            # Purane rows: user/ai pair ek insert me, DB default now() se dono ka created_at same
+            "created_at": (start + timedelta(seconds=i // 2)).isoformat(),
+        })
+    client.table("messages").insert(rows).execute()
+    return rows
+
+
+def sizes(rows):
+    raw = json.dumps(rows, ensure_ascii=False).encode("utf-8")
+    result = {"raw": len(raw), "gzip": len(gzip.compress(raw, 6))}
+    try:
+        import brotli
+        result["br"] = len(brotli.compress(raw, quality=5))
+    except ImportError:
+        pass
+    return result
+
+
+def measure(name, client, fn):
+    queries = client.queries
+    start = time.perf_counter()
+    rows = fn()
+    elapsed = (time.perf_counter() - start) * 1000
+    payload = "  ".join(f"{k}={v / 1024:7.1f} KB" for k, v in sizes(rows).items())
+    print(f"{name:<34} {elapsed:8.2f} ms  db={client.queries - queries}  msgs={len(rows):<5} {payload}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.03, help="Simulated DB round trip (seconds)")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    client = FakeSupabase(latency=args.latency)
+    conversation_id = "bench-conversation"
+    seed_conversation(client, conversation_id, args.messages)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        versions = VersionCounter(f"{tmp}/versions.sqlite3", table="conversation_versions")
+        sync = ChatSync(client, versions=versions)
+
+        def full_reload():
+            return client.table("messages").select("*").eq("conversation_id", conversation_id)\
+                .order("created_at", desc=False).execute().data
+
+        measure("old: full reload (select *)", client, full_reload)
+        page = measure("open: latest page (cold)", client,
+                       lambda: sync.messages(conversation_id, limit=args.limit)[0])
+        measure("reopen: latest page (warm LRU)", client,
+                lambda: sync.messages(conversation_id, limit=args.limit)[0])
+
+        # /chat ka naya turn: write-behind flush listener cached conversation me jodta hai
+        last = page[-1]["created_at"]
+        turn = seed_conversation(FakeSupabase(), conversation_id, 2)
+        for i, row in enumerate(turn):
+            row["created_at"] = (datetime.fromisoformat(last) + timedelta(seconds=i + 1)).isoformat()
+        written = client._write(client.tables["messages"], turn)
+        sync.on_write({"messages": written})
+        since = encode_cursor(page[-1])
+        measure("since: after own write", client,
+                lambda: sync.messages(conversation_id, since=since, limit=args.limit)[0])
+
+        # Dusre worker ka write: sirf version badla, delta fetch hoga
+        last = written[-1]["created_at"]
+        other = [dict(r, created_at=(datetime.fromisoformat(last) + timedelta(seconds=i + 1)).isoformat())
+                 for i, r in enumerate(turn)]
+        client._write(client.tables["messages"], other)
+        versions.bump([conversation_id])
+        since = encode_cursor(written[-1])
+        measure("since: after other worker write", client,
+                lambda: sync.messages(conversation_id, since=since, limit=args.limit)[0])
+
+        # Odd limit: page boundaries same created_at wale user/ai pairs ke beech padti hain
+        pages, cursor, seen = 0, encode_cursor(page[0]), [m["id"] for m in page]
+        start, queries = time.perf_counter(), client.queries
+        while cursor:
+            rows, cursor, _ = sync.messages(conversation_id, before=cursor, limit=args.limit - 1)
+            pages += 1
+            seen.extend(m["id"] for m in rows)
+        print(f"{'backwards paging (all older)':<34} {(time.perf_counter() - start) * 1000:8.2f} ms  "
+              f"db={client.queries - queries}  msgs={len(seen) - len(page):<5} pages={pages}")
+        print(f"\nChatSync stats: {sync.stats()}")
+        expected = args.messages
+        if sorted(seen) != sorted(set(seen)) or len(seen) != expected:
+            raise SystemExit(f"❌ Paging returned {len(set(seen))} unique of {expected} messages "
+                             f"({len(seen) - len(set(seen))} duplicates)")
+        print(f"✅ Paging returned all {expected} messages exactly once")
+
+
+if __name__ == "__main__":
+    main()
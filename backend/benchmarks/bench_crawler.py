@@ -0,0 +1,201 @@
+"""
+Crawler check, local HTTP server fixture pe (network nahi chahiye):
+  - robots.txt ka Disallow wala page fetch nahi hota
+  - redirect follow hota hai (frontier me purana URL hi rehta hai)
+  - per-host concurrency limit: ek host pe kabhi limit se zyada requests saath nahi
+  - conditional GET: dusre run me unchanged pages 304 dete hain
+  - defer_validators: jis page ka "upload" fail hua uska ETag save nahi hota, agla run poora GET karta hai
+
+Server do host naam (127.0.0.1 aur localhost) se serve karta hai taaki host-wise limit dikhe.
+Koi expectation fail ho to exit code 1 (crawler badlo to pehle ye chalao).
+
+Run from backend/:
+    python -m benchmarks.bench_crawler
+    python -m benchmarks.bench_crawler --pages 30 --per-host 3
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from services.crawler import Crawler, Frontier
+
+FILLER = "Scheme ki jaankari: eligibility, documents aur benefits. " * 20  # on_page ko > 500 chars
+
+
+class FixtureServer:
+    """ThreadingHTTPServer: robots.txt, index, ETag wale pages, redirect; host-wise concurrency record."""
+
+    def __init__(self, pages, latency):
+        self.pages = pages
+        self.latency = latency
+        self.requests = []  # (host, path, status)
+        self.in_flight = {}
+        self.max_in_flight = {}
+        self._lock = threading.Lock()
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                fixture.handle(self)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, name="fixture-http", daemon=True).start()
+
+    def hosts(self):
+        return [f"http://127.0.0.1:{self.port}", f"http://localhost:{self.port}"]
+
+    def page_urls(self):
+        hosts = self.hosts()
+        return [f"{hosts[n % len(hosts)]}/page/{n}" for n in range(self.pages)]
+
+    def _send(self, handler, status, body="", headers=None):
+        data = body.encode("utf-8")
+        handler.send_response(status)
+        for key, value in (headers or {}).items():
+            handler.send_header(key, value)
+        handler.send_header("Content-Type", "text/html; charset=utf-8" if body else "text/plain")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def handle(self, handler):
+        host, path = handler.headers.get("Host", ""), handler.path
+        if path == "/robots.txt":
+            self._send(handler, 200, "User-agent: *\nDisallow: /private\n")
+            self._log(host, path, 200)
+            return
+
+        with self._lock:
+            self.in_flight[host] = self.in_flight.get(host, 0) + 1
+            self.max_in_flight[host] = max(self.max_in_flight.get(host, 0), self.in_flight[host])
+        try:
+            time.sleep(self.latency)
+            status = self._route(handler, path)
+        finally:
+            with self._lock:
+                self.in_flight[host] -= 1
+        self._log(host, path, status)
+
+    def _route(self, handler, path):
+        if path == "/index":
+            links = self.page_urls() + ["/private/secret", "/old-scheme"]
+            body = "".join(f'<a href="{link}">Scheme link {n}</a>\n' for n, link in enumerate(links))
+            self._send(handler, 200, f"<html><body>{body}</body></html>")
+            return 200
+        if path == "/old-scheme":
+            self._send(handler, 301, headers={"Location": "/new-scheme"})
+            return 301
+        if path == "/new-scheme":
+            self._send(handler, 200, f"<html><body><h1>Moved scheme</h1><p>{FILLER}</p></body></html>")
+            return 200
+        if path.startswith("/page/"):
+            etag = f'"{path.rsplit("/", 1)[1]}-v1"'
+            if handler.headers.get("If-None-Match") == etag:
+                self._send(handler, 304, headers={"ETag": etag})
+                return 304
+            self._send(handler, 200, f"<html><body><h1>Scheme {path}</h1><p>{FILLER}</p></body></html>",
+                       headers={"ETag": etag})
+            return 200
+        self._send(handler, 404, "not found")
+        return 404
+
+    def _log(self, host, path, status):
+        with self._lock:
+            self.requests.append((host, path, status))
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            self.max_in_flight.clear()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def crawl(server, frontier, args, fail_upload=()):
+    """Ek run: crawl_india_gov jaisa flow, on_page = "pipeline", upload ke baad commit_validators."""
+    pages = {}
+
+    def on_page(url, depth, title, soup):
+        if depth == 0:
+            return False
+        pages[url] = soup.find("h1").get_text(strip=True)
+        return True
+
+    crawler = Crawler(frontier, on_page=on_page, max_depth=1, max_pages=1000, max_workers=args.workers,
+                      per_host_concurrency=args.per_host, per_host_delay=0, timeout=10,
+                      headers={"User-Agent": "scheme-bench"}, defer_validators=True)
+    crawler.seed(server.hosts()[0] + "/index")
+    stats = crawler.run()
+    for url in pages:
+        if url not in fail_upload:
+            frontier.commit_validators(url)
+    return stats, pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--per-host", type=int, default=2, help="per_host_concurrency")
+    parser.add_argument("--latency", type=float, default=0.05, help="Server delay per page (seconds)")
+    args = parser.parse_args()
+
+    server = FixtureServer(args.pages, args.latency)
+    root = tempfile.mkdtemp(prefix="crawler-bench-")
+    failures = []
+
+    def expect(ok, message):
+        print(f"  {'✅' if ok else '❌'} {message}")
+        if not ok:
+            failures.append(message)
+
+    try:
+        frontier = Frontier(os.path.join(root, "frontier.sqlite3"))
+        frontier.start_run()
+        page_urls = server.page_urls()
+        failed_upload = page_urls[1]
+
+        print(f"🕸️ run 1: {args.pages} pages on {len(server.hosts())} hosts, per-host limit {args.per_host}")
+        stats, pages = crawl(server, frontier, args, fail_upload={failed_upload})
+        paths = [path for _, path, _ in server.requests]
+        expect("/private/secret" not in paths and stats["blocked"] == 1, "robots.txt Disallow respected")
+        moved = server.hosts()[0] + "/old-scheme"
+        expect(pages.get(moved) == "Moved scheme" and ("/new-scheme" in paths),
+               "redirect followed, page kept under its frontier URL")
+        expect(set(page_urls) <= set(pages), f"all {args.pages} pages fetched")
+        limits = server.max_in_flight
+        expect(all(n <= args.per_host for n in limits.values()),
+               f"per-host concurrency <= {args.per_host} (max seen {limits})")
+        expect(len(limits) == 2 and sum(limits.values()) > args.per_host,
+               "hosts crawled in parallel with each other")
+
+        print("🕸️ run 2: same frontier, conditional GET")
+        server.reset()
+        frontier.start_run()
+        _, pages = crawl(server, frontier, args)
+        not_modified = {path for _, path, status in server.requests if status == 304}
+        expected_304 = {"/" + url.split("/", 3)[3] for url in page_urls if url != failed_upload}
+        expect(not_modified == expected_304,
+               f"{len(expected_304)} uploaded pages answered 304 (got {len(not_modified)})")
+        expect(failed_upload in pages, "page whose upload failed fetched again in full")
+    finally:
+        server.close()
+        shutil.rmtree(root, ignore_errors=True)
+
+    if failures:
+        raise SystemExit(f"❌ {len(failures)} crawler check(s) failed")
+    print("✅ Crawler behaves as expected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Query embedding latency: remote (HF API) vs local model vs cached.
+
+Run from backend/:
+    python -m benchmarks.bench_embeddings --repeat 20 --concurrency 8
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from services.query_embeddings import (
+    EMBEDDING_MODEL, CachedEmbeddings, EmbeddingCache, MicroBatchingEmbeddings,
+)
+
+QUERIES = [
+    "PM Kisan eligibility?",
+    "pm kisan kaun le sakta hai",
+    "Mudra loan Shishu Kishore Tarun limit",
+    "Sukanya Samriddhi account kaise khole",
+    "Ayushman Bharat card documents required",
+    "MYSY scholarship income limit",
+    "Atal Pension Yojana monthly contribution",
+    "PM Ujjwala free gas connection eligibility",
+]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+def report(name, samples):
+    ms = [s * 1000 for s in samples]
+    print(f"{name:<28} n={len(ms):<5} p50={statistics.median(ms):9.3f} ms  "
+          f"p95={percentile(ms, 95):9.3f} ms  mean={statistics.mean(ms):9.3f} ms")
+
+
+def time_calls(fn, queries, repeat):
+    samples = []
+    for _ in range(repeat):
+        for q in queries:
+            start = time.perf_counter()
+            fn(q)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def time_concurrent(fn, queries, concurrency):
+    def one(q):
+        start = time.perf_counter()
+        fn(q)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, queries * concurrency))
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    backends = {}
+    if os.getenv("HUGGINGFACEHUB_API_TOKEN"):
+        from langchain_huggingface import HuggingFaceEndpointEmbeddings
+        backends["remote"] = HuggingFaceEndpointEmbeddings(
+            model=EMBEDDING_MODEL, huggingfacehub_api_token=os.getenv("HUGGINGFACEHUB_API_TOKEN")
+        )
+    else:
+        print("⚠️ HUGGINGFACEHUB_API_TOKEN not set, skipping remote.")
+    try:
+        from langchain_huggingface import HuggingFaceEmbeddings
+        backends["local"] = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+    except Exception as e:
+        print(f"⚠️ Local model unavailable, skipping local: {e}")
+
+    if not backends:
+        print("❌ No embedding backend available.")
+        return
+
+    for name, base in backends.items():
+        base.embed_query("warmup")
+        report(f"{name} (uncached)", time_calls(base.embed_query, QUERIES, 1 if name == "remote" else args.repeat))
+
+    # Cached path: pehla round miss, baaki memory hits; naya cache object = disk hits
+    base_name, base = next(reversed(backends.items()))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite3")
+        cached = CachedEmbeddings(base, cache=EmbeddingCache(path=path))
+        time_calls(cached.embed_query, QUERIES, 1)
+        report(f"cached memory ({base_name})", time_calls(cached.embed_query, QUERIES, args.repeat))
+        reopened = CachedEmbeddings(base, cache=EmbeddingCache(path=path, max_size=0))
+        report(f"cached disk ({base_name})", time_calls(reopened.embed_query, QUERIES, args.repeat))
+
+    if "local" in backends:
+        local = backends["local"]
+        report(f"local x{args.concurrency} threads", time_concurrent(local.embed_query, QUERIES, args.concurrency))
+        batched = MicroBatchingEmbeddings(local)
+        report(f"micro-batched x{args.concurrency}", time_concurrent(batched.embed_query, QUERIES, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Zero-LLM fast path ka offline report: labeled sawaalon pe hit rate, galat scheme (precision),
+jo RAG pe jaane chahiye the unme se kitne fast path ne le liye (false positives), aur lookup latency.
+Koi false positive ho to exit code 1.
+Network/LLM nahi chahiye: index data/*.txt (+ ingest_charusat ka HARDCODED_RULES text) se memory me.
+
+Run from backend/:
+    python -m benchmarks.bench_fast_path
+    python -m benchmarks.bench_fast_path --verbose   # har query ka result
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from datetime import datetime, timezone
+
+from benchmarks.eval_retrieval import QUERIES
+from services.scheme_index import SchemeFastPath, build_scheme_index
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "benchmarks")
+# ingest_charusat import karne se clients bante hain, isliye yahan uski copy ka chhota hissa
+SUMMARY_RULES = """
+1. Pradhan Mantri MUDRA Yojana (PMMY):
+   - No collateral (security) required.
+
+2. PM Kisan Samman Nidhi:
+   - Financial benefit of Rs. 6,000 per year.
+"""
+
+# (query, expected scheme id ya None = RAG pe jaana chahiye)
+LOOKUP_QUERIES = [
+    ("PM Kisan eligibility", "pm_kisan"),
+    ("How to apply for PM Kisan", "pm_kisan"),
+    ("Ayushman Bharat benefits", "ayushman_bharat"),
+    ("MYSY documents required", "mysy"),
+    ("MYSY eligibility", "mysy"),
+    ("which documents are needed for sukanya samriddhi yojna", "sukanya_samriddhi"),
+    ("sukanya samriddhi documents and eligibility", "sukanya_samriddhi"),
+    ("how much mudra loan can i get", "pm_mudra"),
+    ("pradhan mantri awas yojana gramin eligibility", "pm_awaste"),
+    ("digital india internship stipend", "digital_india_internship"),
+    ("Atal pension yojna benefits", "atal_pension"),
+    ("ujjwala yojana documents", "pm_ujjwalah"),
+    ("PM Vishwakarma eligibility", "pm_vishwakarma"),
+    ("What is PM Kisan", "pm_kisan"),
+    ("PM Kisan vs Mudra", None),
+    ("PM Kisan paisa nahi aaya", None),
+    ("am i eligible for pm kisan if i am a doctor with 2 acre land", None),
+    ("meri beti 12 saal ki hai kya sukanya account khul sakta hai", None),
+    ("Gujarat me koi scholarship hai kya", None),
+    # Scheme + intent word mila par sawaal section ke bahar ka: canned answer galat hota
+    ("pm kisan ki agli kist kab aayegi", None),
+    ("ayushman card hospital list", None),
+    ("PM Kisan eKYC", None),
+    # Canned answers English me hain: Hindi script aur Hinglish dono LLM ko (user ki bhasha me jawab)
+    ("पीएम किसान पात्रता", None),
+    ("आयुष्मान कार्ड के लिए दस्तावेज", None),
+    ("pm kisan me kitna paisa milta hai", None),
+    ("mudra loan kitna milta hai", None),
+    ("PM Kisan eligibility kya hai", None),
+    ("Atal pension yojna ke fayde", None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="Latency ke liye har query itni baar")
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--output", help="Results JSON path (default .cache/benchmarks/fast-path-<time>.json)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = build_scheme_index(summary_texts=[SUMMARY_RULES], path=None)
+    build_ms = (time.perf_counter() - started) * 1000
+    fast_path = SchemeFastPath(index=index)
+
+    # eval_retrieval ki queries ka label file ka naam hai; hit ho to wahi scheme honi chahiye
+    labeled = [(q, os.path.splitext(source)[0], False) for q, source in QUERIES]
+    labeled += [(q, expected, expected is not None) for q, expected in LOOKUP_QUERIES]
+    rows, latencies = [], []
+    for query, expected, must_hit in labeled:
+        scheme_id, detail = fast_path.match(query)
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            fast_path.match(query)
+        latencies.append((time.perf_counter() - t0) / args.repeat * 1e6)
+        rows.append({"query": query, "expected": expected, "must_hit": must_hit, "hit": scheme_id is not None,
+                     "scheme": scheme_id, "detail": detail, "correct": scheme_id is None or scheme_id == expected})
+        if args.verbose:
+            mark = "🏎️" if scheme_id else "  "
+            print(f"{mark} {query!r:<62} -> {scheme_id or '-'} {detail}")
+
+    hits = [r for r in rows if r["hit"]]
+    lookups = [r for r in rows if r["must_hit"]]
+    summary = {
+        "queries": len(rows),
+        "hit_rate": round(len(hits) / len(rows), 3),
+        "lookup_recall": round(sum(r["hit"] for r in lookups) / len(lookups), 3),
+        "precision": round(sum(r["correct"] for r in hits) / len(hits), 3) if hits else 1.0,
+        "false_positives": sum(r["hit"] for r in rows if r["expected"] is None),
+        "schemes": len(index["schemes"]),
+        "build_ms": round(build_ms, 1),
+        "lookup_us_median": round(statistics.median(latencies), 1),
+        "lookup_us_max": round(max(latencies), 1),
+    }
+    print(f"\n🏎️ fast path: hit rate {summary['hit_rate']:.0%} of {summary['queries']} queries | "
+          f"lookup recall {summary['lookup_recall']:.0%} | precision {summary['precision']:.0%} | "
+          f"false positives {summary['false_positives']}")
+    print(f"⏱️ index build {summary['build_ms']} ms ({summary['schemes']} schemes) | lookup median "
+          f"{summary['lookup_us_median']} µs, max {summary['lookup_us_max']} µs")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"fast-path-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.now(timezone.utc).isoformat(), "config": vars(args), "summary": summary,
+                   "rows": rows}, f, indent=2, ensure_ascii=False)
+    print(f"💾 Results saved to {output}")
+    if summary["false_positives"] or summary["precision"] < 1:
+        # Galat canned answer LLM ke jawab se bura hai: matcher rules badlo to pehle ye chalao
+        raise SystemExit("❌ Fast path answered a query that should have gone to RAG")
+
+
+if __name__ == "__main__":
+    main()
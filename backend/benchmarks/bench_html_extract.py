@@ -0,0 +1,132 @@
+"""
+HTML extraction check + benchmark, saved fixtures (benchmarks/fixtures/html) pe:
+  - har page: purane flat text (body.get_text + clean_text) vs services.html_extract ke chunks
+  - content jo bachna chahiye (scheme ka naam, eligibility) aur kachra jo nahi (menu, footer, cookie)
+  - parse + extract time: html.parser vs lxml (installed ho to)
+
+Koi expectation fail ho to exit code 1 (extraction rules badlo to pehle ye chalao).
+Network nahi chahiye.
+
+Run from backend/:
+    python -m benchmarks.bench_html_extract
+    python -m benchmarks.bench_html_extract --verbose   # har page ka extracted text
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+from bs4 import BeautifulSoup
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from services import html_extract
+from services.html_extract import extract_main_text, flat_text
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(BACKEND_DIR, "benchmarks", "fixtures", "html")
+RESULTS_DIR = os.path.join(BACKEND_DIR, ".cache", "benchmarks")
+
+# fixture -> (text jo hona chahiye, text jo nahi hona chahiye)
+EXPECTATIONS = {
+    "india_gov_scheme.html": (
+        ["Pradhan Mantri Kisan Samman Nidhi (PM-KISAN)\n\n", "Exclusion Categories",
+         "First | April to July | Rs. 2,000", "Family means husband, wife and minor children."],
+        ["Skip to main content", "Screen Reader Access", "Agriculture sub-topic", "Website designed",
+         "Popular Schemes", "Share:", "Visitors", "gtag", "Hyperlinking Policy"],
+    ),
+    "mariyojana_atoz.html": (
+        # Page khud scheme links ki list hai: links hatne nahi chahiye
+        ["Scheme A to Z", "Mukhyamantri Yuva Swavalamban Yojana (MYSY) | Education Department",
+         "Kisan Suryoday Yojana"],
+        ["Toll free helpline", "Tribal Development", "Gujarat Informatics", "WebForm_OnSubmit", "__VIEWSTATE"],
+    ),
+    "mudra_offerings.html": (
+        ["Offerings\n\n", "Shishu\n\nCovering loans up to Rs. 50,000",
+         "Non-corporate small business segment: proprietorship or partnership firms\nSmall manufacturing units"],
+        ["Funding the Unfunded", "Toll Free", "Quick Links", "We use cookies", "Swavalamban Bhavan",
+         "All Rights Reserved", "Partner Institutions"],
+    ),
+    "charusat_scholarship.html": (
+        ["Scholarships at CHARUSAT", "2. Mukhyamantri Yuva Swavalamban Yojana (MYSY)\n\nStudents with at least",
+         "Income certificate of the current financial year\n12th marksheet"],
+        ["Student Login", "Admissions Item", "Fee Structure", "Mandatory Disclosure", "Designed by",
+         "Home / Students", "Instagram"],
+    ),
+}
+
+
+def ingest_splitter():
+    # ingest_charusat jaisa splitter: "\n\n" pe pehle tootna chahiye
+    return RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200,
+                                          separators=["\n\n", "\n", ".", " ", ""])
+
+
+def time_parser(content, parser, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        extract_main_text(BeautifulSoup(content, parser))
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="Timing ke liye har page itni baar")
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--output", help="Results JSON path (default .cache/benchmarks/html-extract-<time>.json)")
+    args = parser.parse_args()
+
+    splitter = ingest_splitter()
+    parsers = ["html.parser"] + (["lxml"] if html_extract.lxml is not None else [])
+    rows, failures = [], []
+    print(f"🧾 {len(EXPECTATIONS)} fixtures, parser: {html_extract.HTML_PARSER}")
+    for name, (must_have, must_not_have) in sorted(EXPECTATIONS.items()):
+        with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+            content = f.read()
+        before_text = flat_text(BeautifulSoup(content, "html.parser"))
+        after_text = extract_main_text(content)
+        before, after = splitter.split_text(before_text), splitter.split_text(after_text)
+
+        missing = [text for text in must_have if text not in after_text]
+        leaked = [text for text in must_not_have if text in after_text]
+        failures += [f"{name}: missing {text!r}" for text in missing]
+        failures += [f"{name}: boilerplate kept {text!r}" for text in leaked]
+        timings = {p: round(time_parser(content, p, args.repeat), 2) for p in parsers}
+        rows.append({"fixture": name, "before_chunks": len(before), "after_chunks": len(after),
+                     "before_chars": len(before_text), "after_chars": len(after_text),
+                     "boilerplate_before": sum(text in before_text for text in must_not_have),
+                     "boilerplate_after": len(leaked), "missing": missing, "ms": timings})
+        mark = "✅" if not missing and not leaked else "❌"
+        print(f"  {mark} {name:<28} chunks {len(before):3d} -> {len(after):3d} | chars {len(before_text):6d} -> "
+              f"{len(after_text):6d} | junk {rows[-1]['boilerplate_before']} -> {len(leaked)} | "
+              + " ".join(f"{p} {ms} ms" for p, ms in timings.items()))
+        if args.verbose:
+            print("\n" + after_text + "\n")
+
+    before_total = sum(row["before_chunks"] for row in rows)
+    after_total = sum(row["after_chunks"] for row in rows)
+    summary = {"fixtures": len(rows), "before_chunks": before_total, "after_chunks": after_total,
+               "saved": round(1 - after_total / before_total, 3) if before_total else 0.0,
+               "parser": html_extract.HTML_PARSER,
+               "ms_per_page": {p: round(sum(row["ms"][p] for row in rows) / len(rows), 2) for p in parsers}}
+    print(f"\n📉 chunks {before_total} -> {after_total} ({summary['saved']:.0%} fewer to embed/store) | "
+          + " | ".join(f"{p}: {ms} ms/page" for p, ms in summary["ms_per_page"].items()))
+    if html_extract.lxml is None:
+        print("ℹ️ lxml not installed: `pip install lxml` for the faster parser")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"html-extract-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.now(timezone.utc).isoformat(), "config": vars(args), "summary": summary,
+                   "pages": rows, "failures": failures}, f, indent=2, ensure_ascii=False)
+    print(f"💾 Results saved to {output}")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        raise SystemExit(1)
+    print("✅ All fixtures extracted as expected")
+
+
+if __name__ == "__main__":
+    main()
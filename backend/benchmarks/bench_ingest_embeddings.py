@@ -0,0 +1,75 @@
+"""
+Bulk ingestion embedding throughput (chunks/sec): fixed batches of 20
+(purana add_documents wala tareeka) vs EmbeddingEngine (length buckets + process pool).
+
+Run from backend/:
+    python -m benchmarks.bench_ingest_embeddings --chunks 2000 --workers 4
+"""
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from services.embedding_engine import EMBEDDING_MODEL, EmbeddingEngine, quantize
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def load_chunks(limit):
+    """data/*.txt ko ingest jaise split karo; kam pade to repeat karke `limit` tak bharo."""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    chunks = []
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, "*.txt"))):
+        with open(path, "r", encoding="utf-8") as f:
+            chunks.extend(splitter.split_text(f.read()))
+    if not chunks:
+        raise SystemExit(f"❌ No .txt files in {DATA_DIR}")
+    return [chunks[i % len(chunks)] for i in range(limit)]
+
+
+def report(name, count, elapsed, baseline=None):
+    rate = count / elapsed if elapsed else 0.0
+    speedup = f"  x{rate / baseline:.2f}" if baseline else ""
+    print(f"{name:<32} {count:>6} chunks  {elapsed:8.2f} s  {rate:9.1f} chunks/s{speedup}")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    texts = load_chunks(args.chunks)
+    print(f"📦 {len(texts)} chunks, avg {sum(map(len, texts)) / len(texts):.0f} chars\n")
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+    model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+    model.embed_documents(["warmup"])
+    start = time.perf_counter()
+    for i in range(0, len(texts), 20):
+        model.embed_documents(texts[i:i + 20])
+    baseline = report("fixed batches of 20", len(texts), time.perf_counter() - start)
+
+    matrix = None
+    for workers in sorted({1, args.workers}):
+        engine = EmbeddingEngine(workers=workers)
+        engine.encode(["warmup"] * workers)  # Har worker ka model load timing se bahar
+        start = time.perf_counter()
+        matrix = engine.encode(texts)
+        report(f"engine, {workers} worker(s)", len(texts), time.perf_counter() - start, baseline)
+        engine.close()
+
+    print("\nStorage per vector (precision -> bytes, max abs error):")
+    for precision in ("float32", "float16", "int8"):
+        array, scales = quantize(matrix, precision)
+        restored = array.astype(np.float32) * (scales if scales is not None else 1.0)
+        size = array.nbytes + (scales.nbytes if scales is not None else 0)
+        print(f"   {precision:<8} {size / len(texts):7.0f} B   {np.abs(restored - matrix).max():.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+PDF extraction benchmark (pages/sec) ek generated local PDF corpus pe, teen tarah se:
+  serial  - purana tareeka: ek process, file-by-file pypdf (PyPDFLoader jaisa)
+  pool    - PdfExtractor: page ranges process pool me, khali text cache
+  cached  - PdfExtractor dobara: unchanged files content hash se cache hit, koi parse nahi
+Saath me check: pool ka text serial se bilkul same hai.
+
+Network/Supabase nahi chahiye; sirf pypdf. PDFs data/*.txt ke text se temp dir me bante hain.
+
+Run from backend/:
+    python -m benchmarks.bench_pdf_ingest
+    python -m benchmarks.bench_pdf_ingest --files 100 --pages 30 --workers 4
+"""
+import argparse
+import glob
+import json
+import os
+import tempfile
+import textwrap
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from services.pdf_extract import PdfExtractor, PdfTextCache, extract_page_range, iter_pdf_files, page_count
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BACKEND_DIR, "data")
+RESULTS_DIR = os.path.join(BACKEND_DIR, ".cache", "benchmarks")
+LINES_PER_PAGE = 45
+
+
+def _pdf_string(line):
+    line = line.encode("ascii", "replace").decode("ascii")
+    return "(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def write_pdf(path, pages):
+    """Minimal PDF (Helvetica text, har page ek content stream). pages = [[line, ...], ...]."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        body = "BT /F1 10 Tf 14 TL 50 800 Td " + " ".join(f"{_pdf_string(line)} Tj T*" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents {len(objects)} 0 R "
+                       f"/Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def generate_corpus(root, files, pages_per_file):
+    """data/*.txt ke lines ko wrap karke `files` PDFs, har ek me `pages_per_file` pages."""
+    lines = []
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            for paragraph in f.read().splitlines():
+                lines.extend(textwrap.wrap(paragraph, 90))
+    if not lines:
+        raise SystemExit(f"❌ No .txt files in {DATA_DIR}")
+    cursor = 0
+    for n in range(files):
+        pages = []
+        for page in range(pages_per_file):
+            # Har page pe circular number taaki files/pages ka text alag ho
+            page_lines = [f"Circular {n}-{page}"]
+            for _ in range(LINES_PER_PAGE - 1):
+                page_lines.append(lines[cursor % len(lines)])
+                cursor += 1
+            pages.append(page_lines)
+        write_pdf(os.path.join(root, f"circular_{n:04d}.pdf"), pages)
+
+
+def run_serial(paths):
+    texts = {}
+    for path in paths:
+        texts[path] = extract_page_range(path, 0, page_count(path))
+    return texts
+
+
+def run_extractor(extractor, paths, consumers):
+    """Ingest ke split stage jaise `consumers` threads files ko saath-saath consume karte hain."""
+    first_page = []
+
+    def consume(path):
+        started, texts = time.perf_counter(), []
+        for text in extractor.page_texts(path):
+            if not texts:
+                first_page.append(time.perf_counter() - started)
+            texts.append(text)
+        return path, texts
+
+    with ThreadPoolExecutor(max_workers=consumers) as pool:
+        texts = dict(pool.map(consume, paths))
+    return texts, first_page
+
+
+def timed(label, pages, fn):
+    started = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - started
+    print(f"  {label:<8} {pages} pages in {seconds:6.2f}s = {pages / seconds:8.1f} pages/s")
+    return result, {"seconds": round(seconds, 3), "pages_per_second": round(pages / seconds, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--pages", type=int, default=25, help="Pages per PDF")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Process pool size")
+    parser.add_argument("--pages-per-task", type=int, default=8)
+    parser.add_argument("--consumers", type=int, default=2, help="Split stage threads (ingest_charusat: 2)")
+    parser.add_argument("--output", help="Results JSON path (default .cache/benchmarks/pdf-ingest-<time>.json)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        corpus = os.path.join(root, "pdfs")
+        os.makedirs(corpus)
+        generate_corpus(corpus, args.files, args.pages)
+        paths = list(iter_pdf_files(corpus))
+        total = len(paths) * args.pages
+        print(f"📄 {len(paths)} PDFs x {args.pages} pages, pool workers={args.workers}, "
+              f"pages/task={args.pages_per_task}")
+
+        serial_texts, serial = timed("serial", total, lambda: run_serial(paths))
+        extractor = PdfExtractor(workers=args.workers, pages_per_task=args.pages_per_task,
+                                 cache=PdfTextCache(os.path.join(root, "pdf_text.sqlite3")))
+        try:
+            # start() (workers banana) bhi pool ke time me gina jaata hai, ingest me bhi ye kharcha hai
+            (pool_texts, first_page), pool = timed("pool", total, lambda: (extractor.start(), run_extractor(
+                extractor, paths, args.consumers))[1])
+            (cached_texts, _), cached = timed("cached", total, lambda: run_extractor(extractor, paths,
+                                                                                        args.consumers))
+        finally:
+            extractor.close()
+
+    identical = serial_texts == pool_texts == cached_texts
+    pool["first_page_ms_median"] = round(sorted(first_page)[len(first_page) // 2] * 1000, 1)
+    summary = {"files": len(paths), "pages": total, "serial": serial, "pool": pool, "cached": cached,
+               "pool_speedup": round(serial["seconds"] / pool["seconds"], 2),
+               "cached_speedup": round(serial["seconds"] / cached["seconds"], 2),
+               "identical_text": identical, "extractor": extractor.stats()}
+    print(f"\n⚡ pool {summary['pool_speedup']}x, cache {summary['cached_speedup']}x vs serial | "
+          f"first page median {pool['first_page_ms_median']} ms | text identical: {identical}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"pdf-ingest-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.now(timezone.utc).isoformat(), "config": vars(args), "summary": summary},
+                  f, indent=2)
+    print(f"💾 Results saved to {output}")
+    if not identical:
+        raise SystemExit("❌ Pool/cached text differs from serial extraction")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Cold start benchmark: fresh Python process me `import app` kitna time leta hai, pehla /healthz
+kab, aur /readyz (prewarm) kab ready. `-X importtime` ka report bhi: sabse mehenge imports.
+
+Check bhi karta hai (CI/deploy se pehle chalao), fail ho to exit code 1:
+  - median import time `--budget-ms` se zyada
+  - heavy modules (LangChain, Supabase, HF, ZYND) import ke waqt hi load ho gaye (lazy hone chahiye)
+
+Network nahi chahiye: placeholder keys se clients sirf bante hain, koi call nahi hoti.
+
+Run from backend/:
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --runs 3 --budget-ms 800 --top 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, ".cache", "benchmarks")
+# Ye import time pe load nahi hone chahiye, sirf pehli zaroorat/prewarm pe
+HEAVY_MODULES = ("langchain_core", "langchain_groq", "langchain_google_genai", "langchain_huggingface",
+                 "supabase", "zyndai_agent", "sentence_transformers", "torch", "transformers")
+RESULT_MARKER = "STARTUP_RESULT "
+
+# Child process me chalta hai: import, /healthz, phir /readyz se prewarm aur uska wait
+PROBE = r"""
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+heavy, timeout = json.loads(sys.argv[1])
+loaded = sorted(m for m in heavy if m in sys.modules)
+client = app.app.test_client()
+health = client.get("/healthz").status_code
+healthy = time.perf_counter()
+ready_status = client.get("/readyz").status_code
+while time.perf_counter() - healthy < timeout:
+    states = [s["state"] for s in app.prewarmer.status()["steps"].values()]
+    if not any(state in ("pending", "running") for state in states):
+        break
+    time.sleep(0.01)
+warmed = time.perf_counter()
+ready_status = client.get("/readyz").status_code
+print("%s%s" % (sys.argv[2], json.dumps({
+    "import_ms": (imported - started) * 1000, "healthz_ms": (healthy - started) * 1000,
+    "healthz_status": health, "ready_ms": (warmed - started) * 1000, "ready_status": ready_status,
+    "heavy_loaded_at_import": loaded, "prewarm": app.prewarmer.status()["steps"],
+})))
+"""
+
+
+def child_env(state_dir):
+    env = dict(os.environ)
+    # Prewarm /readyz khud shuru karega, taaki import time saaf naapa ja sake
+    env["PREWARM_ENABLED"] = "false"
+    for name, value in (("SUPABASE_URL", "http://localhost:9"), ("SUPABASE_KEY", "startup-bench"),
+                        ("GROQ_API_KEY", "startup-bench"), ("GOOGLE_API_KEY", "startup-bench"),
+                        ("HUGGINGFACEHUB_API_TOKEN", "startup-bench")):
+        env.setdefault(name, value)
+    # Local state temp dir me, asli .cache ko nahi chhoota
+    for name, leaf in (("PERSIST_SPOOL_DIR", "spool"), ("KEYWORD_INDEX_PATH", "keyword_index.json"),
+                       ("HISTORY_VERSIONS_PATH", "history_versions.sqlite3"), ("SINGLE_FLIGHT_DIR", "single_flight"),
+                       ("VECTOR_INDEX_DIR", "vector_index"), ("EMBEDDING_CACHE_PATH", "query_embeddings.sqlite3"),
+                       ("SCHEME_INDEX_PATH", "scheme_index.json")):
+        env[name] = os.path.join(state_dir, leaf)
+    return env
+
+
+def parse_importtime(stderr):
+    """`-X importtime` lines -> [(name, self_us, cumulative_us, depth)]."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|", 2)
+        name = name[1:]  # "| " ke baad har level pe 2 spaces
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative), depth))
+    return rows
+
+
+def run_once(timeout):
+    with tempfile.TemporaryDirectory() as state_dir:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE, json.dumps([HEAVY_MODULES, timeout]), RESULT_MARKER],
+            cwd=BACKEND_DIR, env=child_env(state_dir), capture_output=True, text=True, timeout=timeout + 120,
+        )
+    lines = [line for line in proc.stdout.splitlines() if line.startswith(RESULT_MARKER)]
+    if proc.returncode != 0 or not lines:
+        raise SystemExit(f"❌ Probe failed (exit {proc.returncode}):\n{proc.stderr[-2000:]}")
+    result = json.loads(lines[-1][len(RESULT_MARKER):])
+    return result, parse_importtime(proc.stderr)
+
+
+def top_imports(rows, top):
+    """`app` ke seedhe imports (uske subtree me depth 1) cumulative time se. Returns (top, subtree)."""
+    # importtime children ko parent se pehle likhta hai: app ka subtree = pichhli depth-0 line ke baad se app tak
+    end = next((i for i, row in enumerate(rows) if row[0] == "app" and row[3] == 0), len(rows) - 1)
+    start = max((i for i in range(end) if rows[i][3] == 0), default=-1) + 1
+    subtree = rows[start:end + 1]
+    direct = [row for row in subtree if row[3] == 1]
+    return sorted(direct, key=lambda row: row[2], reverse=True)[:top], subtree
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes (median report hota hai)")
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="Median `import app` ka limit")
+    parser.add_argument("--top", type=int, default=15, help="Importtime report me kitne imports")
+    parser.add_argument("--ready-timeout", type=float, default=120.0, help="Prewarm ka max wait (seconds)")
+    parser.add_argument("--output", help="Results JSON path (default .cache/benchmarks/startup-<time>.json)")
+    args = parser.parse_args()
+
+    results, rows = [], []
+    for run in range(args.runs):
+        result, rows = run_once(args.ready_timeout)
+        results.append(result)
+        print(f"🧊 run {run + 1}: import {result['import_ms']:.0f} ms, /healthz {result['healthz_ms']:.0f} ms, "
+              f"/readyz {result['ready_status']} at {result['ready_ms']:.0f} ms")
+
+    median = lambda key: statistics.median(r[key] for r in results)
+    summary = {"import_ms": round(median("import_ms"), 1), "healthz_ms": round(median("healthz_ms"), 1),
+               "ready_ms": round(median("ready_ms"), 1)}
+    direct, subtree = top_imports(rows, args.top)
+
+    print(f"\n📦 Top {len(direct)} imports during `import app` (last run, cumulative):")
+    for name, self_us, cumulative_us, _ in direct:
+        print(f"  {cumulative_us / 1000:9.1f} ms  {name}")
+    print("\n🔥 Prewarm steps (last run):")
+    for name, status in results[-1]["prewarm"].items():
+        error = f"  ({status['error']})" if status.get("error") else ""
+        print(f"  {name:<14} {status['state']:<8} {status.get('seconds', 0) * 1000:9.1f} ms{error}")
+    print(f"\n⏱️ median: import {summary['import_ms']} ms | /healthz {summary['healthz_ms']} ms | "
+          f"ready {summary['ready_ms']} ms")
+
+    failures = []
+    if summary["import_ms"] > args.budget_ms:
+        failures.append(f"import {summary['import_ms']} ms > budget {args.budget_ms} ms")
+    heavy = sorted({m for r in results for m in r["heavy_loaded_at_import"]})
+    if heavy:
+        failures.append(f"heavy modules loaded at import: {', '.join(heavy)}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"startup-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.now(timezone.utc).isoformat(), "config": vars(args), "summary": summary,
+                   "runs": results, "failures": failures,
+                   "importtime": [{"module": n, "self_us": s, "cumulative_us": c, "depth": d}
+                                  for n, s, c, d in subtree]}, f, indent=2)
+    print(f"💾 Results saved to {output}")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        raise SystemExit(1)
+    print("✅ Cold start within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Offline retrieval eval over data/*.txt: vector-only (purana top 6 @ 0.1) vs BM25 vs hybrid (RRF)
+vs hybrid + adaptive cutoff vs hybrid + metadata partitions. Reports recall@k, average context
+size sent to the LLM, aur partitions ke saath corpus ka kitna hissa score hua.
+
+Run from backend/:
+    python -m benchmarks.eval_retrieval
+"""
+import argparse
+import glob
+import os
+import statistics
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from services.hybrid_retrieval import BM25Index, HybridRetriever, reciprocal_rank_fusion
+from services.ingest_manifest import chunk_id_for
+from services.partitions import classify_query, partition_tags
+from services.query_embeddings import EMBEDDING_MODEL
+from services.vector_index import VectorIndex
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+CHARS_PER_TOKEN = 4
+
+# (query, expected source file) — English, Hinglish aur exact scheme-name queries
+QUERIES = [
+    ("Atal Pension Yojana monthly contribution", "atal_pension.txt"),
+    ("APY me pension kitni milti hai", "atal_pension.txt"),
+    ("Ayushman Bharat card documents required", "ayushman_bharat.txt"),
+    ("5 lakh health cover hospital treatment free", "ayushman_bharat.txt"),
+    ("Digital India Internship stipend", "digital_india_internship.txt"),
+    ("MeitY internship eligibility for students", "digital_india_internship.txt"),
+    ("MYSY scholarship income limit", "mysy.txt"),
+    ("Gujarat scholarship 80 percentile", "mysy.txt"),
+    ("PMAY-G pucca house rural", "pm_awaste.txt"),
+    ("gaon me ghar banane ke liye yojana", "pm_awaste.txt"),
+    ("PM Kisan eligibility?", "pm_kisan.txt"),
+    ("kisan ko 6000 rupaye saal", "pm_kisan.txt"),
+    ("Mudra loan Shishu Kishore Tarun limit", "pm_mudra.txt"),
+    ("small business loan without collateral", "pm_mudra.txt"),
+    ("PM Ujjwala free gas connection eligibility", "pm_ujjwalah.txt"),
+    ("LPG connection for BPL women", "pm_ujjwalah.txt"),
+    ("PM Vishwakarma toolkit incentive", "pm_vishwakarma.txt"),
+    ("artisans carpenter training stipend", "pm_vishwakarma.txt"),
+    ("Sukanya Samriddhi account kaise khole", "sukanya_samriddhi.txt"),
+    ("savings scheme for girl child", "sukanya_samriddhi.txt"),
+]
+
+
+def load_rows(embedder):
+    """ingest_local jaisa split (1000/200); rows `documents` table jaisi."""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    rows = []
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, "*.txt"))):
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        # Ingest pipeline jaise region/category tags (services.partitions)
+        metadata = {"source": os.path.basename(path), **partition_tags(os.path.basename(path), text)}
+        for chunk in splitter.split_text(text):
+            rows.append({"id": chunk_id_for(chunk), "content": chunk, "metadata": dict(metadata)})
+    vectors = embedder.embed_documents([r["content"] for r in rows])
+    for row, vector in zip(rows, vectors):
+        row["embedding"] = vector
+    return rows
+
+
+class _StaticKeywordStore:
+    def __init__(self, index):
+        self.index = index
+
+    def search(self, query_text, match_count, partition=None):
+        return self.index.search(query_text, match_count=match_count, partition=partition)
+
+
+def evaluate(name, retrieve, queries, ks):
+    hits = {k: 0 for k in ks}
+    context_hits, tokens, chunks = 0, [], []
+    for query, expected in queries:
+        ranked, context = retrieve(query)
+        sources = [r["metadata"].get("source") for r in ranked]
+        for k in ks:
+            hits[k] += expected in sources[:k]
+        context_hits += any(r["metadata"].get("source") == expected for r in context)
+        tokens.append(sum(len(r["content"]) for r in context) / CHARS_PER_TOKEN)
+        chunks.append(len(context))
+
+    n = len(queries)
+    recall = "  ".join(f"R@{k}={hits[k] / n:.2f}" for k in ks)
+    print(f"{name:<24} {recall}  context recall={context_hits / n:.2f}  "
+          f"avg chunks={statistics.mean(chunks):4.1f}  avg context tokens={statistics.mean(tokens):6.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--match-count", type=int, default=6)
+    parser.add_argument("--candidates", type=int, default=20)
+    args = parser.parse_args()
+    ks = (1, 3, args.match_count)
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+    embedder = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+    rows = load_rows(embedder)
+    vector_index = VectorIndex.from_rows(rows)
+    bm25 = BM25Index.from_rows(rows)
+    print(f"📦 {len(rows)} chunks from {DATA_DIR}, {len(QUERIES)} queries\n")
+
+    query_vectors = {q: embedder.embed_query(q) for q, _ in QUERIES}
+    hybrid = HybridRetriever(vector_index.search, _StaticKeywordStore(bm25), candidates=args.candidates)
+
+    def vector_only(query):
+        docs = vector_index.search(query_vectors[query], match_threshold=0.1, match_count=args.match_count)
+        return docs, docs
+
+    def keyword_only(query):
+        docs = bm25.search(query, match_count=args.match_count)
+        return docs, docs
+
+    def fused(query):
+        ranked = reciprocal_rank_fusion([
+            vector_index.search(query_vectors[query], match_threshold=0.1, match_count=args.candidates),
+            bm25.search(query, match_count=args.candidates),
+        ])
+        return ranked, ranked[:args.match_count]
+
+    def fused_cutoff(query):
+        ranked, _ = fused(query)
+        return ranked, hybrid.retrieve(query, query_vectors[query], max_chunks=args.match_count)
+
+    def partitioned(query):
+        partition = classify_query(query)
+        ranked = reciprocal_rank_fusion([
+            vector_index.search(query_vectors[query], match_threshold=0.1, match_count=args.candidates,
+                                partition=partition),
+            bm25.search(query, match_count=args.candidates, partition=partition),
+        ])
+        return ranked, hybrid.retrieve(query, query_vectors[query], max_chunks=args.match_count, partition=partition)
+
+    evaluate("vector (top 6 @ 0.1)", vector_only, QUERIES, ks)
+    evaluate("bm25", keyword_only, QUERIES, ks)
+    evaluate("hybrid rrf", fused, QUERIES, ks)
+    evaluate("hybrid rrf + cutoff", fused_cutoff, QUERIES, ks)
+    evaluate("hybrid + partitions", partitioned, QUERIES, ks)
+    scanned = statistics.mean(vector_index.scan_fraction(classify_query(q)) for q, _ in QUERIES)
+    print(f"\n🗂️ partitions: avg {scanned:.0%} of chunks scored per query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+In-memory stand-in for the supabase-py client, benchmarks ke liye (network/DB ke bina).
+Sirf wahi query builder methods jo backend use karta hai; har execute() pe `latency` seconds ka sleep.
+"""
+import asyncio
+import itertools
+import re
+import threading
+import time
+
+_OR_KEYSET = re.compile(r'created_at\.(lt|gt)\."(.+?)",and\(created_at\.eq\."(.+?)",id\.(?:lt|gt)\."(.+?)"\)')
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table_name = table
+        self.filters = []
+        self.orders = []
+        self.row_limit = None
+        self.row_range = None
+        self.columns = None
+        self.action = None
+        self.payload = None
+
+    # --- READ ---
+    def select(self, columns="*"):
+        self.columns = None if columns.strip() == "*" else [c.strip() for c in columns.split(",")]
+        return self
+
+    def eq(self, key, value):
+        self.filters.append(lambda row: str(row.get(key)) == str(value))
+        return self
+
+    def gt(self, key, value):
+        self.filters.append(lambda row: row.get(key) is not None and row.get(key) > value)
+        return self
+
+    def lt(self, key, value):
+        self.filters.append(lambda row: row.get(key) is not None and row.get(key) < value)
+        return self
+
+    def in_(self, key, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(key) in values)
+        return self
+
+    def or_(self, expression):
+        # Sirf history_cache.keyset_filter samajhta hai; id Postgres jaisa typed compare (bigint ya text)
+        match = _OR_KEYSET.match(expression)
+        if not match:
+            raise ValueError(f"unsupported or_ filter: {expression}")
+        op, created_at, _, row_id = match.groups()
+        newer = op == "gt"
+
+        def keyset(row):
+            key = (row["created_at"], row["id"])
+            cursor = (created_at, int(row_id) if isinstance(row["id"], int) and row_id.isdigit() else row_id)
+            return key > cursor if newer else key < cursor
+
+        self.filters.append(keyset)
+        return self
+
+    def order(self, key, desc=False):
+        self.orders.append((key, desc))
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def range(self, start, end):
+        self.row_range = (start, end)
+        return self
+
+    # --- WRITE ---
+    def insert(self, rows):
+        self.action, self.payload = "insert", rows
+        return self
+
+    def upsert(self, rows):
+        self.action, self.payload = "upsert", rows
+        return self
+
+    def update(self, values):
+        self.action, self.payload = "update", values
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    def execute(self, wait=True):
+        if wait:
+            self.client._wait()
+        with self.client.lock:
+            self.client.queries += 1
+            rows = self.client.tables.setdefault(self.table_name, [])
+            if self.action in ("insert", "upsert"):
+                return FakeResponse(self.client._write(rows, self.payload, upsert=self.action == "upsert"))
+            if self.action == "update":
+                matched = [r for r in rows if all(f(r) for f in self.filters)]
+                for row in matched:
+                    row.update(self.payload)
+                return FakeResponse([dict(r) for r in matched])
+            if self.action == "delete":
+                kept = [r for r in rows if not all(f(r) for f in self.filters)]
+                removed = len(rows) - len(kept)
+                rows[:] = kept
+                return FakeResponse([{}] * removed)
+
+            result = [r for r in rows if all(f(r) for f in self.filters)]
+            for key, desc in reversed(self.orders):
+                result.sort(key=lambda r: (r.get(key) is None, r.get(key)), reverse=desc)
+            if self.row_range:
+                result = result[self.row_range[0]:self.row_range[1] + 1]
+            if self.row_limit is not None:
+                result = result[:self.row_limit]
+            if self.columns:
+                result = [{c: r.get(c) for c in self.columns} for r in result]
+            else:
+                result = [dict(r) for r in result]
+            self.client.rows_returned += len(result)
+            return FakeResponse(result)
+
+
+class FakeRPC:
+    def __init__(self, client, name, params):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self, wait=True):
+        if wait:
+            self.client._wait()
+        handler = self.client.rpc_handlers.get(self.name)
+        return FakeResponse(handler(self.params) if handler else [])
+
+
+class FakeSupabase:
+    """`create_client()` ki jagah. latency = har round trip ka simulated DB/network time."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.tables = {}
+        self.rpc_handlers = {}
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.rows_returned = 0
+        self._ids = itertools.count(1)
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _write(self, rows, payload, upsert=False):
+        written = []
+        index = {r.get("id"): r for r in rows} if upsert else {}
+        for row in payload:
+            row = dict(row)
+            row.setdefault("id", next(self._ids))  # Postgres identity column jaisa
+            if upsert and row["id"] in index:
+                index[row["id"]].update(row)
+            else:
+                rows.append(row)
+            written.append(row)
+        return written
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        return FakeRPC(self, name, params)
+
+
+class _AsyncBuilder:
+    """Query/RPC builder ka async wrapper: chaining same, `await execute()` me asyncio.sleep."""
+
+    def __init__(self, builder):
+        self._builder = builder
+
+    def __getattr__(self, name):
+        method = getattr(self._builder, name)
+
+        def chain(*args, **kwargs):
+            method(*args, **kwargs)
+            return self
+        return chain
+
+    async def execute(self):
+        if self._builder.client.latency:
+            await asyncio.sleep(self._builder.client.latency)
+        return self._builder.execute(wait=False)
+
+
+class FakeAsyncSupabase:
+    """`acreate_client()` ki jagah; same in-memory tables, event loop block kiye bina latency."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def table(self, name):
+        return _AsyncBuilder(self.client.table(name))
+
+    def rpc(self, name, params):
+        return _AsyncBuilder(self.client.rpc(name, params))
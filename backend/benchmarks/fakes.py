@@ -0,0 +1,219 @@
+"""
+Deterministic stand-ins for HF embeddings aur Groq/Gemini, load tests ke liye (koi quota nahi jalta).
+`load_app()` in fakes ko app.py / rag_service.py ke import se pehle laga deta hai.
+"""
+import asyncio
+import glob
+import hashlib
+import importlib
+import math
+import os
+import re
+import sys
+import time
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from benchmarks.fake_supabase import FakeAsyncSupabase, FakeSupabase
+from services.ingest_manifest import chunk_id_for
+from services.partitions import PartitionFilter, partition_tags
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+EMBEDDING_DIM = 384  # all-MiniLM-L6-v2 jaisa
+_WORDS = re.compile(r"\w+")
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Hashed bag-of-words vectors: same text => same vector, aur shared words => cosine zyada,
+    isliye retrieval results bhi meaningful rehte hain. latency = har call (HTTP round trip),
+    item_latency = har text (model compute).
+    """
+
+    def __init__(self, dim=EMBEDDING_DIM, latency=0.0, item_latency=0.0):
+        self.dim = dim
+        self.latency = latency
+        self.item_latency = item_latency
+        self.calls = 0
+
+    def _vector(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in _WORDS.findall(text.lower()) or [text]:
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = float(np.linalg.norm(vector))
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        self.calls += 1
+        delay = self.latency + self.item_latency * len(texts)
+        if delay:
+            time.sleep(delay)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts):
+        texts = list(texts)
+        self.calls += 1
+        delay = self.latency + self.item_latency * len(texts)
+        if delay:
+            await asyncio.sleep(delay)
+        return [self._vector(t) for t in texts]
+
+    async def aembed_query(self, text):
+        return (await self.aembed_documents([text]))[0]
+
+
+class FakeStreamingLLM(BaseChatModel):
+    """
+    Groq/Gemini ki jagah: `first_token_latency` ke baad har `token_latency` pe ek token.
+    Answer prompt ke question se deterministic banta hai. fail_every = N ho to
+    har N-th call fail hoti hai (fallback path ke liye).
+    """
+
+    first_token_latency: float = 0.3
+    token_latency: float = 0.01
+    answer_tokens: int = 120
+    fail_every: int = 0
+    calls: int = 0
+
+    @property
+    def _llm_type(self):
+        return "fake-streaming"
+
+    def _tokens(self, messages):
+        prompt = messages[-1].content if messages else ""
+        question = prompt.split("User Question:", 1)[-1].split("GUIDELINES:", 1)[0].strip()
+        words = question.split() or ["Niti.ai"]
+        body = [f"**{w}**" if i % 7 == 0 else w for i, w in enumerate(words * math.ceil(self.answer_tokens / len(words)))]
+        return [word + " " for word in body[:self.answer_tokens]]
+
+    def _maybe_fail(self):
+        self.calls += 1
+        if self.fail_every and self.calls % self.fail_every == 0:
+            raise RuntimeError("fake provider error")
+
+    def _generate(self, messages, stop=None, run_manager: CallbackManagerForLLMRun = None, **kwargs):
+        self._maybe_fail()
+        tokens = self._tokens(messages)
+        time.sleep(self.first_token_latency + self.token_latency * max(len(tokens) - 1, 0))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(self, messages, stop=None, run_manager: CallbackManagerForLLMRun = None, **kwargs):
+        self._maybe_fail()
+        time.sleep(self.first_token_latency)
+        for i, token in enumerate(self._tokens(messages)):
+            if i:
+                time.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    # Async path (asgi.py): thread ke bina, asyncio.sleep
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self._maybe_fail()
+        tokens = self._tokens(messages)
+        await asyncio.sleep(self.first_token_latency + self.token_latency * max(len(tokens) - 1, 0))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        self._maybe_fail()
+        await asyncio.sleep(self.first_token_latency)
+        for i, token in enumerate(self._tokens(messages)):
+            if i:
+                await asyncio.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+# --- CORPUS ---
+def load_documents(copies=1):
+    """data/*.txt ko ingest_local jaisa split karo. copies > 1: alag-alag source naam se dohrao."""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, add_start_index=True)
+    sources = []
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, "*.txt"))):
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        for copy in range(copies):
+            name = os.path.basename(path) if copies == 1 else f"copy{copy}/{os.path.basename(path)}"
+            # Copy marker taaki chunk IDs (content hash) alag hon aur dedup na ho jaye
+            sources.append((name, text if copies == 1 else f"[{name}]\n{text}", splitter))
+    if not sources:
+        raise SystemExit(f"❌ No .txt files in {DATA_DIR}")
+    return sources
+
+
+def seed_documents(client, embedder):
+    """`documents` table bharo aur `match_documents` (+ filtered) RPC ko NumPy cosine se jawab do."""
+    rows = []
+    for name, text, splitter in load_documents():
+        metadata = dict(partition_tags(name, text), source=name)
+        for doc in splitter.create_documents([text], metadatas=[metadata]):
+            rows.append({"id": chunk_id_for(doc.page_content), "content": doc.page_content,
+                         "metadata": doc.metadata})
+    vectors = np.asarray(embedder.embed_documents([r["content"] for r in rows]), dtype=np.float32)
+    client.tables["documents"] = rows
+
+    def match_documents(params):
+        query = np.asarray(params["query_embedding"], dtype=np.float32)
+        scores = vectors @ query
+        order = np.argsort(-scores)
+        partition = PartitionFilter(params.get("regions"), params.get("categories"))
+        matched = [dict(rows[i], similarity=float(scores[i])) for i in order
+                   if scores[i] > params.get("match_threshold", 0.0) and partition.matches(rows[i]["metadata"])]
+        return matched[:params.get("match_count", 6)]
+
+    client.rpc_handlers["match_documents"] = match_documents
+    client.rpc_handlers["match_documents_filtered"] = match_documents
+    return rows
+
+
+# --- APP WIRING ---
+def load_app(state_dir, db_latency=0.02, embed_latency=0.05, llm_first_token=0.3, llm_token_latency=0.01,
+             answer_tokens=120, fail_every=0):
+    """
+    Fakes laga ke `app` import karo. Returns (app_module, fake_client, embedder).
+    Process me ek hi baar chalana: services module-level singletons banate hain.
+    Saari local state (spool, caches, version counters) `state_dir` me, asli .cache ko nahi chhoota.
+    """
+    if "app" in sys.modules:
+        raise RuntimeError("app already imported; fakes must be installed first")
+    os.environ.setdefault("SUPABASE_URL", "http://fake-supabase")
+    os.environ.setdefault("SUPABASE_KEY", "fake-key")
+    os.environ.setdefault("RETRIEVAL_BACKEND", "rpc")
+    for name, leaf in (("PERSIST_SPOOL_DIR", "spool"), ("KEYWORD_INDEX_PATH", "keyword_index.json"),
+                       ("HISTORY_VERSIONS_PATH", "history_versions.sqlite3"), ("SINGLE_FLIGHT_DIR", "single_flight"),
+                       ("VECTOR_INDEX_DIR", "vector_index"), ("EMBEDDING_CACHE_PATH", "query_embeddings.sqlite3"),
+                       ("SCHEME_INDEX_PATH", "scheme_index.json")):
+        os.environ[name] = os.path.join(state_dir, leaf)
+
+    import supabase
+    from services import query_embeddings
+
+    client = FakeSupabase(latency=db_latency)
+    embedder = FakeEmbeddings(latency=embed_latency)
+    seed_documents(client, FakeEmbeddings())
+    supabase.create_client = lambda *args, **kwargs: client
+
+    async def acreate_client(*args, **kwargs):
+        return FakeAsyncSupabase(client)
+    supabase.acreate_client = acreate_client
+    # Query cache fakes ke aage bhi rehta hai, asli setup jaisa
+    query_embeddings.build_query_embeddings = lambda *args, **kwargs: query_embeddings.CachedEmbeddings(
+        embedder, cache=query_embeddings.EmbeddingCache(path=os.environ["EMBEDDING_CACHE_PATH"]))
+
+    rag_service = importlib.import_module("services.rag_service")
+    primary, *backups = rag_service.model_router.providers
+    primary._factory = lambda: FakeStreamingLLM(first_token_latency=llm_first_token, token_latency=llm_token_latency,
+                                                answer_tokens=answer_tokens, fail_every=fail_every)
+    for provider in backups:
+        provider._factory = lambda: FakeStreamingLLM(first_token_latency=llm_first_token * 2,
+                                                     token_latency=llm_token_latency, answer_tokens=answer_tokens)
+    return importlib.import_module("app"), client, embedder
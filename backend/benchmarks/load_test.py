@@ -0,0 +1,352 @@
+"""
+Offline load test: app.py ko fake Supabase (configurable DB latency), fake embedder aur fake
+streaming LLM ke saath chalao, koi Groq/HF quota nahi. /chat, /history, /chat/<id> ko
+`--concurrency` threads se hit karta hai aur p50/p95/p99 + requests/sec report karta hai;
+ingestion pipeline (split -> embed -> upload) chunks/sec me. Results JSON me save hote hain,
+`--baseline` purani file se diff dikhata hai.
+
+Run from backend/:
+    python -m benchmarks.load_test --concurrency 16 --requests 300
+    python -m benchmarks.load_test --scenarios chat --unique-queries --baseline .cache/benchmarks/load-old.json
+    python -m benchmarks.load_test --server asgi --scenarios chat --unique-queries --concurrency 1000 --requests 3000
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from benchmarks.fake_supabase import FakeSupabase
+from benchmarks.fakes import FakeEmbeddings, load_app, load_documents
+from services.persistence import new_id
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "benchmarks")
+HTTP_SCENARIOS = ("chat", "history", "chat_messages")
+ALL_SCENARIOS = HTTP_SCENARIOS + ("ingest",)
+
+
+def queries():
+    # Lazy: eval_retrieval services import karta hai, jo load_app() ke env (state_dir) ke baad hona chahiye
+    from benchmarks.eval_retrieval import QUERIES
+    return [query for query, _ in QUERIES]
+
+
+def percentile(ordered, pct):
+    # Nearest-rank: chhote samples pe bhi asli observed value
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+def summarize(latencies, statuses, elapsed):
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 2)
+    errors = sum(count for status, count in statuses.items() if status >= 500 or status == 0)
+    return {
+        "requests": len(ordered), "errors": errors, "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0, "elapsed_seconds": round(elapsed, 3),
+        "p50_ms": ms(percentile(ordered, 50)), "p95_ms": ms(percentile(ordered, 95)),
+        "p99_ms": ms(percentile(ordered, 99)), "max_ms": ms(ordered[-1] if ordered else 0.0),
+        "mean_ms": ms(sum(ordered) / len(ordered) if ordered else 0.0),
+    }
+
+
+# --- SEED DATA ---
+def seed_history(client, users, conversations, messages):
+    """`users` x `conversations` conversations, har ek me `messages` messages. Returns (user_ids, conv_ids)."""
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    user_ids = [f"load-user-{u}" for u in range(users)]
+    conv_rows, message_rows, conv_ids = [], [], []
+    tick = itertools.count()
+    texts = queries()
+    for user_id in user_ids:
+        for c in range(conversations):
+            conv_id = f"{user_id}-conv-{c}"
+            conv_ids.append(conv_id)
+            conv_rows.append({"id": conv_id, "user_id": user_id, "title": f"Chat {c}",
+                              "created_at": (start + timedelta(seconds=next(tick))).isoformat()})
+            for m in range(messages):
+                query = texts[m % len(texts)]
+                message_rows.append({
+                    "id": new_id(), "conversation_id": conv_id, "user_id": user_id, "role": "user" if m % 2 == 0 else "ai",
+                    "content": query if m % 2 == 0 else f"## {query}\n\n- Eligibility ...\n- Benefits ...\n" * 4,
+                    "created_at": (start + timedelta(seconds=next(tick))).isoformat(),
+                })
+    client._write(client.tables.setdefault("conversations", []), conv_rows)
+    client._write(client.tables.setdefault("messages", []), message_rows)
+    return user_ids, conv_ids
+
+
+# --- HTTP LOAD ---
+def remember_etag(state, response):
+    # Asli sidebar jaisa: ETag yaad rakho, dobara khulne pe revalidate
+    user_id = state.pop("etag_user", None)
+    if user_id and response.headers.get("ETag"):
+        state.setdefault("etags", {})[user_id] = response.headers["ETag"]
+
+
+def run_load(app, concurrency, total, make_request):
+    """`total` requests, `concurrency` threads; har thread ka apna test client (aur state dict)."""
+    latencies, statuses, lock = [], {}, threading.Lock()
+    counter = itertools.count()
+
+    def worker(seed):
+        client = app.test_client()
+        state = {"rng": random.Random(seed)}
+        local_latencies, local_statuses = [], {}
+        while next(counter) < total:
+            start = time.perf_counter()
+            try:
+                method, url, kwargs = make_request(state)
+                response = client.open(url, method=method, **kwargs)
+                remember_etag(state, response)
+                status = response.status_code
+            except Exception as e:
+                print(f"⚠️ Request failed: {e}")
+                status = 0
+            local_latencies.append(time.perf_counter() - start)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+def run_load_asgi(asgi_app, concurrency, total, make_request):
+    """run_load jaisa, par asgi.py pe: `concurrency` asyncio tasks, ek process, koi thread pool nahi."""
+    import asyncio
+    import httpx
+
+    latencies, statuses = [], {}
+    counter = itertools.count()
+
+    async def worker(client, seed):
+        state = {"rng": random.Random(seed)}
+        while next(counter) < total:
+            start = time.perf_counter()
+            try:
+                method, url, kwargs = make_request(state)
+                response = await client.request(method, url, **kwargs)
+                remember_etag(state, response)
+                status = response.status_code
+            except Exception as e:
+                print(f"⚠️ Request failed: {e}")
+                status = 0
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    async def main():
+        transport = httpx.ASGITransport(app=asgi_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+            await asyncio.gather(*(worker(client, seed) for seed in range(concurrency)))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+def stage_means(before, after):
+    """Telemetry snapshot ke delta se har stage ka mean latency (ms)."""
+    result = {}
+    for key, (_, total, count) in after.get("niti_stage_seconds", {}).items():
+        _, old_total, old_count = before.get("niti_stage_seconds", {}).get(key, (None, 0.0, 0))
+        if count > old_count:
+            result[key] = round((total - old_total) / (count - old_count) * 1000, 2)
+    return result
+
+
+def make_scenarios(args, user_ids, conv_ids):
+    request_numbers = itertools.count()
+    texts = queries()
+
+    def chat(state):
+        query = state["rng"].choice(texts)
+        if args.unique_queries:
+            # Answer/embedding cache aur single-flight ko bypass: har request pura pipeline
+            query = f"{query} #{next(request_numbers)}"
+        return "POST", "/chat", {"json": {"text": query, "session_id": state["rng"].choice(user_ids)}}
+
+    def history(state):
+        user_id = state["rng"].choice(user_ids)
+        etags = state.get("etags", {})
+        state["etag_user"] = user_id
+        headers = {"If-None-Match": etags[user_id]} if user_id in etags else {}
+        return "GET", f"/history?session_id={user_id}", {"headers": headers}
+
+    def chat_messages(state):
+        return "GET", f"/chat/{state['rng'].choice(conv_ids)}", {"headers": {"Accept-Encoding": "gzip"}}
+
+    return {"chat": chat, "history": history, "chat_messages": chat_messages}
+
+
+# --- INGESTION ---
+def run_ingest(args, state_dir):
+    """ingest_local jaisa pipeline (fetch/parse ke bina): split -> embed -> upload, fake embedder + DB."""
+    from services.ingest_manifest import IngestManifest, ManifestSync
+    from services.ingest_pipeline import Pipeline, Stage, split_text, embed_new_chunks, upload_chunks
+    from services.embedding_engine import VectorUpserter
+
+    client = FakeSupabase(latency=args.db_latency)
+    embedder = FakeEmbeddings(latency=args.embed_latency, item_latency=args.embed_item_latency)
+    syncer = ManifestSync(client, scope="load_test", manifest=IngestManifest(os.path.join(state_dir, "manifest.sqlite3")))
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, add_start_index=True)
+    items = [{"source": name, "text": text, "metadata": {"source": name}}
+             for name, text, _ in load_documents(copies=args.ingest_copies)]
+
+    pipeline = Pipeline(iter(items), [
+        Stage("split", split_text(splitter), workers=2),
+        Stage("embed", embed_new_chunks(syncer, embedder), workers=args.ingest_workers),
+        Stage("upload", upload_chunks(syncer, VectorUpserter(client), batch_size=20), workers=2),
+    ], on_error=syncer.mark_item_failed)
+    summary = pipeline.run()
+    report = syncer.finish()
+    elapsed = summary["elapsed_seconds"]
+    return {
+        "sources": len(items), "chunks": report["chunks_uploaded"], "elapsed_seconds": elapsed,
+        "chunks_per_second": round(report["chunks_uploaded"] / elapsed, 2) if elapsed else 0.0,
+        "embed_calls": embedder.calls, "db_queries": client.queries,
+    }
+
+
+# --- REPORTING ---
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    baseline = (baseline or {}).get("results", {})
+    for name, result in results.items():
+        old = baseline.get(name, {})
+
+        def delta(key, higher_is_better=False):
+            if not old.get(key) or key not in result:
+                return ""
+            change = (result[key] - old[key]) / old[key] * 100
+            worse = change < 0 if higher_is_better else change > 0
+            return f" ({change:+.0f}%{' ⚠️' if worse and abs(change) >= 10 else ''})"
+
+        if name == "ingest":
+            print(f"{name:<14} {result['chunks']} chunks from {result['sources']} sources in "
+                  f"{result['elapsed_seconds']}s = {result['chunks_per_second']} chunks/s"
+                  f"{delta('chunks_per_second', higher_is_better=True)}")
+            continue
+        print(f"{name:<14} {result['requests']:>5} req  {result['rps']:8.1f} req/s{delta('rps', True)}  "
+              f"p50 {result['p50_ms']:7.1f}{delta('p50_ms')}  p95 {result['p95_ms']:7.1f}{delta('p95_ms')}  "
+              f"p99 {result['p99_ms']:7.1f}{delta('p99_ms')} ms  errors={result['errors']}  "
+              f"db={result.get('db_queries', 0)}"
+              + (f"  fast_path={result['fast_path_hit_rate']:.0%}" if "fast_path_hit_rate" in result else ""))
+        if result.get("stages_ms"):
+            print(" " * 15 + "stage mean: " + "  ".join(f"{k}={v}ms" for k, v in result["stages_ms"].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(ALL_SCENARIOS),
+                        help=f"Comma separated: {', '.join(ALL_SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--server", choices=("wsgi", "asgi"), default="wsgi",
+                        help="wsgi: Flask app, threads; asgi: asgi.py, asyncio tasks (1000s concurrency)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per HTTP scenario")
+    parser.add_argument("--db-latency", type=float, default=0.02, help="Fake Supabase round trip (seconds)")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="Fake HF embedding call (seconds)")
+    parser.add_argument("--embed-item-latency", type=float, default=0.002, help="Ingestion: per chunk compute")
+    parser.add_argument("--llm-first-token", type=float, default=0.3, help="Fake LLM time to first token")
+    parser.add_argument("--llm-token-latency", type=float, default=0.005, help="Fake LLM per-token delay")
+    parser.add_argument("--answer-tokens", type=int, default=120)
+    parser.add_argument("--fail-every", type=int, default=0, help="Primary LLM fails every N calls (fallback)")
+    parser.add_argument("--unique-queries", action="store_true", help="Defeat caches: every /chat query distinct")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--conversations", type=int, default=5, help="Seeded conversations per user")
+    parser.add_argument("--messages", type=int, default=40, help="Seeded messages per conversation")
+    parser.add_argument("--ingest-copies", type=int, default=5, help="data/*.txt ko itni baar (alag sources)")
+    parser.add_argument("--ingest-workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Results JSON path (default .cache/benchmarks/load-<time>.json)")
+    parser.add_argument("--baseline", help="Purani results JSON, diff ke liye")
+    parser.add_argument("--verbose", action="store_true", help="App ke per-request logs bhi dikhao")
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(ALL_SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    random.seed(args.seed)
+    quiet = contextlib.nullcontext if args.verbose else (lambda: contextlib.redirect_stdout(io.StringIO()))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as state_dir:
+        if any(s in HTTP_SCENARIOS for s in scenarios):
+            with quiet():
+                app_module, client, _ = load_app(
+                    state_dir, db_latency=args.db_latency, embed_latency=args.embed_latency,
+                    llm_first_token=args.llm_first_token, llm_token_latency=args.llm_token_latency,
+                    answer_tokens=args.answer_tokens, fail_every=args.fail_every)
+            from services.telemetry import REGISTRY
+            if args.server == "asgi":
+                with quiet():
+                    import asgi
+            user_ids, conv_ids = seed_history(client, args.users, args.conversations, args.messages)
+            handlers = make_scenarios(args, user_ids, conv_ids)
+            for name in scenarios:
+                if name not in handlers:
+                    continue
+                print(f"🚀 {name}: {args.requests} requests @ concurrency {args.concurrency} ({args.server})...")
+                before, queries = REGISTRY.snapshot(), client.queries
+                fast_before = app_module.rag_service.fast_path.stats()
+                with quiet():
+                    if args.server == "asgi":
+                        result = run_load_asgi(asgi.app, args.concurrency, args.requests, handlers[name])
+                    else:
+                        result = run_load(app_module.app, args.concurrency, args.requests, handlers[name])
+                result["db_queries"] = client.queries - queries
+                result["stages_ms"] = stage_means(before, REGISTRY.snapshot())
+                fast_after = app_module.rag_service.fast_path.stats()
+                lookups = fast_after["hits"] + fast_after["misses"] - fast_before["hits"] - fast_before["misses"]
+                if lookups:
+                    # Bina LLM ke jawab diye gaye /chat requests ka hissa
+                    result["fast_path_hit_rate"] = round((fast_after["hits"] - fast_before["hits"]) / lookups, 3)
+                results[name] = result
+            with quiet():
+                app_module.persistence.shutdown()
+
+        if "ingest" in scenarios:
+            print(f"🚀 ingest: data/*.txt x {args.ingest_copies} copies...")
+            with quiet():
+                results["ingest"] = run_ingest(args, state_dir)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print()
+    print_results(results, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"created_at": datetime.now(timezone.utc).isoformat(), "git": git_revision(),
+                   "config": vars(args), "results": results}, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,18 @@
 import os
-import requests
-import re
-import time
+import queue
+import sys
+import threading
 import urllib3
-from bs4 import BeautifulSoup
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import SupabaseVectorStore
-from langchain_huggingface import HuggingFaceEmbeddings 
+# Local Embeddings (Free & Unlimited), saare CPU cores pe
+from services.embedding_engine import EmbeddingEngine, VectorUpserter
 from supabase import create_client
 from dotenv import load_dotenv
+from services.corpus_version import bump_corpus_version
+from services.ingest_manifest import ManifestSync, corpus_changed
+from services.ingest_pipeline import Pipeline, Stage, split_text, embed_new_chunks, upload_chunks
+from services.crawler import Crawler, Frontier, canonicalize_url
+from services.html_extract import ExtractionReport, extract_main_text, flat_text
 from urllib.parse import urljoin
 
 # --- SECURITY & SETUP ---
@@ -25,127 +29,132 @@ if not all([SUPABASE_URL, SUPABASE_KEY]):
 
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-print("💻 Loading Local Embedding Model...")
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-print("✅ Model Loaded!")
-
 # --- CONFIGURATION ---
 BASE_URL = "https://india.gov.in/my-government/schemes"
-MAX_PAGES_TO_CRAWL = 15  # Testing ke liye limit (Bada number mat rakhna abhi)
-DELAY_BETWEEN_REQUESTS = 2 # Seconds (Politeness)
+MAX_PAGES_TO_CRAWL = int(os.getenv("CRAWL_MAX_PAGES", "200"))  # Kaam ke pages ki limit
+MAX_DEPTH = int(os.getenv("CRAWL_MAX_DEPTH", "1"))  # 0 = listing page, 1 = scheme pages
+MAX_WORKERS = int(os.getenv("CRAWL_WORKERS", "8"))
+PER_HOST_CONCURRENCY = int(os.getenv("CRAWL_PER_HOST_CONCURRENCY", "2"))
+DELAY_BETWEEN_REQUESTS = float(os.getenv("CRAWL_PER_HOST_DELAY", "1")) # Seconds, per host (Politeness)
 
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 }
 
-def clean_text(text):
-    text = text.replace("\n", " ")
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
-
-def get_soup(url):
-    try:
-        response = requests.get(url, headers=headers, timeout=20, verify=False)
-        if response.status_code == 200:
-            return BeautifulSoup(response.content, "html.parser")
-    except Exception as e:
-        print(f"   ⚠️ Error fetching {url}: {e}")
-    return None
-
-def start_crawl():
-    print(f"🚀 Starting Deep Crawl on {BASE_URL}")
-    
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    final_documents = []
-    
-    # 1. Main List Page Par Jao
-    soup = get_soup(BASE_URL)
-    if not soup:
-        print("❌ Main page failed to load.")
-        return
-
-    # 2. Links Dhundo (India.gov.in structure ke hisab se)
-    # Usually links are inside content divs. Hum saare meaningful links uthayenge.
-    scheme_links = []
-    
+def extract_scheme_links(soup, page_url):
     # Ye generic logic hai jo content area me links dhundta hai
+    links = []
     content_div = soup.find('div', class_='region-content') or soup.find('body')
     if content_div:
         for a_tag in content_div.find_all('a', href=True):
-            href = a_tag['href']
-            full_url = urljoin(BASE_URL, href)
-            
-            # Filters: Sirf Gov sites, Images/PDFs nahi, aur Home page nahi
-            if (("gov.in" in full_url or "nic.in" in full_url) and 
-                not full_url.endswith(('.pdf', '.jpg', '.png')) and
-                full_url != BASE_URL):
-                
-                title = a_tag.get_text(strip=True)
-                if len(title) > 5: # Chhote links (jaise 'More') ignore karo
-                    scheme_links.append((title, full_url))
-
-    # Duplicates hatao
-    scheme_links = list(set(scheme_links))
-    print(f"🔎 Found {len(scheme_links)} potential schemes. Crawling top {MAX_PAGES_TO_CRAWL}...")
-
-    # 3. Har Link ke andar jao (Deep Dive)
-    count = 0
-    for title, link in scheme_links:
-        if count >= MAX_PAGES_TO_CRAWL:
-            break
-            
-        print(f"\n   Testing ({count+1}/{MAX_PAGES_TO_CRAWL}): {title[:30]}...")
-        print(f"   🔗 Visiting: {link}")
-        
-        page_soup = get_soup(link)
-        if page_soup:
-            # Body text nikalo
-            body = page_soup.find('body')
-            raw_text = body.get_text() if body else page_soup.get_text()
-            cleaned = clean_text(raw_text)
-            
-            if len(cleaned) > 500: # Agar page me enough data hai
-                print(f"      ✅ Data Found! ({len(cleaned)} chars)")
-                
-                # Metadata add karo taki AI ko pata chale ye kya hai
-                chunks = text_splitter.create_documents(
-                    [cleaned],
-                    metadatas=[{
-                        "source": link, 
-                        "title": title,
-                        "type": "deep_scrape"
-                    }]
-                )
-                final_documents.extend(chunks)
-                count += 1
-            else:
-                print("      ⚠️ Skipped: Page content too short.")
-        
-        # Break lo (Server ko pareshan mat karo)
-        time.sleep(DELAY_BETWEEN_REQUESTS)
-
-    # 4. Upload to Supabase
-    if final_documents:
-        print(f"\n📦 Uploading {len(final_documents)} deep-chunks to Supabase...")
+            links.append((urljoin(page_url, a_tag['href']), a_tag.get_text(strip=True)))
+    return links
+
+def is_scheme_link(full_url, title):
+    # Filters: Sirf Gov sites, Images/PDFs nahi, aur Home page nahi
+    return (("gov.in" in full_url or "nic.in" in full_url) and
+            not full_url.endswith(('.pdf', '.jpg', '.png')) and
+            full_url != canonicalize_url(BASE_URL) and
+            len(title) > 5) # Chhote links (jaise 'More') ignore karo
+
+def crawled_pages(frontier, crawled, report):
+    """
+    Crawler ko background thread me chalata hai aur har kaam ka page pipeline ko deta hai.
+    Bounded queue: embedding/upload peeche ho to crawler bhi ruk jata hai (backpressure).
+    """
+    pages = queue.Queue(maxsize=32)
+
+    # Har scheme page ke andar ka text (listing page sirf links ke liye)
+    def on_page(link, depth, title, page_soup):
+        if depth == 0:
+            return False
+        flat = flat_text(page_soup)  # Purana tareeka, sirf report ke liye
+        # Menu/footer hata ke sirf scheme ka main content (links pehle hi nikal chuke hain)
+        cleaned = extract_main_text(page_soup)
+        report.record(link, flat, cleaned)
+
+        if len(cleaned) <= 500: # Agar page me enough data nahi hai
+            print(f"      ⚠️ Skipped (too short): {link}")
+            return False
+
+        print(f"      ✅ {title[:30]}... ({len(cleaned)} chars)")
+        crawled.add(link)
+        # Metadata add karo taki AI ko pata chale ye kya hai
+        pages.put({"source": link, "text": cleaned,
+                   "metadata": {"source": link, "title": title, "type": "deep_scrape"}})
+        return True
+
+    # Listing page + scheme pages: parallel, per-host polite, resumable
+    crawler = Crawler(
+        frontier,
+        on_page=on_page,
+        extract_links=extract_scheme_links,
+        link_filter=is_scheme_link,
+        max_depth=MAX_DEPTH,
+        max_pages=MAX_PAGES_TO_CRAWL,
+        max_workers=MAX_WORKERS,
+        per_host_concurrency=PER_HOST_CONCURRENCY,
+        per_host_delay=DELAY_BETWEEN_REQUESTS,
+        headers=headers,
+        verify=False, # verify=False is important for gov websites
+        defer_validators=True # ETag tabhi save jab page upload ho jaye (neeche start_crawl me)
+    )
+
+    def run():
         try:
-            vector_store = SupabaseVectorStore(
-                client=supabase,
-                embedding=embeddings,
-                table_name="documents",
-                query_name="match_documents"
-            )
-            
-            batch_size = 20
-            for i in range(0, len(final_documents), batch_size):
-                batch = final_documents[i:i + batch_size]
-                vector_store.add_documents(batch)
-                print(f"   🚀 Uploaded batch {i//batch_size + 1}")
-                
-            print("🎉 MISSION COMPLETE: Deep Crawl Finished!")
-        except Exception as e:
-            print(f"❌ Upload Error: {e}")
-    else:
-        print("⚠️ No useful data found to upload.")
+            crawler.seed(BASE_URL)
+            crawler.run()
+        finally:
+            pages.put(None)
+
+    threading.Thread(target=run, name="crawler", daemon=True).start()
+    while True:
+        page = pages.get()
+        if page is None:
+            return
+        yield page
+
+def start_crawl(resume=False):
+    print(f"🚀 Starting Deep Crawl on {BASE_URL}")
+    
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200, add_start_index=True)
+    # Engine yahin banao (module level pe nahi): Windows/macOS spawn workers main module dobara import karte hain
+    print("💻 Loading Local Embedding Model...")
+    embeddings = EmbeddingEngine()
+    print(f"✅ Embedding Engine Ready! ({embeddings.workers} workers, {embeddings.precision})")
+    # Precomputed vectors seedha bulk upsert
+    vector_store = VectorUpserter(supabase, precision=embeddings.precision)
+    syncer = ManifestSync(supabase, scope="crawl_india_gov")
+    frontier = Frontier()
+    frontier.start_run(resume=resume)
+    crawled = set()
+    report = ExtractionReport(text_splitter)
+
+    # crawl -> split -> embed (sirf naye chunks) -> upload, sab saath-saath
+    Pipeline(crawled_pages(frontier, crawled, report), [
+        Stage("split", split_text(text_splitter), workers=2),
+        Stage("embed", embed_new_chunks(syncer, embeddings), workers=embeddings.workers),
+        Stage("upload", upload_chunks(syncer, vector_store, batch_size=20), workers=2),
+    ], on_error=syncer.mark_item_failed).run()
+    embeddings.close()
+    report.print_report()
+
+    # Jo pages manifest tak pahunche (upload hue ya content same tha) sirf unke ETag/Last-Modified save karo;
+    # embed/upload fail hua to agla run 304 ki jagah poora page dobara lega
+    for link in crawled & (syncer.seen_sources - syncer.failed_sources):
+        frontier.commit_validators(link)
+
+    # Frontier me hain par is run me naya content nahi aaya (304/limit/error), unke purane chunks rakho
+    for link, _ in frontier.urls(min_depth=1):
+        if link not in crawled:
+            syncer.mark_failed(link)
+
+    sync_report = syncer.finish()
+    print("🎉 MISSION COMPLETE: Deep Crawl Finished!")
+    if corpus_changed(sync_report):
+        # Server ke answer cache ko batao ki corpus badal gaya
+        bump_corpus_version("crawl_india_gov", client=supabase)
 
 if __name__ == "__main__":
-    start_crawl()
\ No newline at end of file
+    # --resume: pichla adhoora crawl wahin se continue karo
+    start_crawl(resume="--resume" in sys.argv)
\ No newline at end of file
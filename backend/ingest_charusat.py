@@ -1,14 +1,17 @@
 import os
-import requests
-import re
-from bs4 import BeautifulSoup
-from langchain_community.document_loaders import PyPDFLoader, TextLoader, WebBaseLoader
+from langchain_community.document_loaders import TextLoader, WebBaseLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import SupabaseVectorStore
 from langchain_huggingface import HuggingFaceEndpointEmbeddings
 from langchain_core.documents import Document
 from supabase import create_client
 from dotenv import load_dotenv
+from services.corpus_version import bump_corpus_version
+from services.html_extract import ExtractionReport, extract_main_text, flat_text, parse_html
+from services.ingest_manifest import ManifestSync, corpus_changed
+from services.ingest_pipeline import Pipeline, Stage, fetch_html, split_text, embed_new_chunks, upload_chunks
+from services.pdf_extract import PdfExtractor, iter_pdf_files
+from services.scheme_index import build_scheme_index
 
 load_dotenv()
 
@@ -28,18 +31,6 @@ embeddings = HuggingFaceEndpointEmbeddings(
     huggingfacehub_api_token=HF_TOKEN
 )
 
-# --- 🧹 PHASE 1: DATA CLEANING FUNCTION ---
-def clean_text(text):
-    """
-    HTML ke kachre (Menu, Footer, Scripts) ko saaf karta hai.
-    Sirf saaf text return karega.
-    """
-    # 1. Newlines ko space bana do
-    text = text.replace("\n", " ")
-    # 2. Extra spaces hatao (e.g. "  Hello   " -> "Hello")
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
-
 # --- DATA SOURCES ---
 URLS_TO_SCRAPE = [
     # 1. Charusat Scholarship
@@ -66,104 +57,87 @@ TYPE: SCHEME_SUMMARY
    - For all landholding farmers families.
 """
 
-def ingest_data():
-    print("🚀 Starting Smart Data Ingestion...")
-    final_documents = []
-    
-    # Chunking Strategy: Thoda Overlap rakhenge taaki context na tute
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        separators=["\n\n", "\n", ".", " ", ""]
-    )
-
+def sources(pdf_dir="data"):
     # --- SOURCE 1: Hardcoded Text ---
-    print("🔹 Processing Hardcoded Rules...")
-    docs = text_splitter.create_documents(
-        [HARDCODED_RULES], 
-        metadatas=[{"source": "manual_entry", "type": "summary"}]
-    )
-    final_documents.extend(docs)
+    yield {"source": "manual_entry", "text": HARDCODED_RULES,
+           "metadata": {"source": "manual_entry", "type": "summary"}}
 
     # --- SOURCE 2: Smart Web Scraping ---
-    print("🔹 Scraping Websites...")
-    headers = {"User-Agent": "Mozilla/5.0"}
-    
     for url in URLS_TO_SCRAPE:
-        try:
-            print(f"   🌐 Fetching: {url}")
-            response = requests.get(url, headers=headers, timeout=15)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, "html.parser")
-                
-                # SIRF Body Content uthao (Nav/Footer ignore karo)
-                main_content = soup.find('body')
-                raw_text = main_content.get_text() if main_content else soup.get_text()
-                
-                cleaned_text = clean_text(raw_text)
-                
-                if len(cleaned_text) > 100: # Agar page khali nahi hai
-                    web_docs = text_splitter.create_documents(
-                        [cleaned_text],
-                        metadatas=[{"source": url, "type": "web_scrape"}]
-                    )
-                    final_documents.extend(web_docs)
-                    print(f"   ✅ Extracted {len(web_docs)} chunks.")
-            else:
-                print(f"   ❌ Failed to fetch {url} (Status: {response.status_code})")
-        except Exception as e:
-            print(f"   ⚠️ Error scraping {url}: {e}")
+        yield {"source": url, "url": url, "metadata": {"source": url, "type": "web_scrape"}}
 
-    # --- SOURCE 3: PDFs (From 'data' folder) ---
-    pdf_dir = "data" # 'charusat_pdfs' ki jagah simple 'data' folder rakhte hain
+    # --- SOURCE 3: PDFs (From 'data' folder, sub-folders jaise charusat_pdfs bhi) ---
     if os.path.exists(pdf_dir):
-        print(f"🔹 Checking PDFs in '{pdf_dir}' folder...")
-        for filename in os.listdir(pdf_dir):
-            if filename.lower().endswith(".pdf"):
-                file_path = os.path.join(pdf_dir, filename)
-                try:
-                    loader = PyPDFLoader(file_path)
-                    pdf_pages = loader.load()
-                    
-                    # Page Content Clean karo
-                    for page in pdf_pages:
-                        page.page_content = clean_text(page.page_content)
-                        page.metadata["source"] = filename
-                        page.metadata["type"] = "official_pdf"
-
-                    pdf_chunks = text_splitter.split_documents(pdf_pages)
-                    final_documents.extend(pdf_chunks)
-                    print(f"   📄 Processed PDF: {filename} ({len(pdf_chunks)} chunks)")
-                except Exception as e:
-                    print(f"   ❌ Error reading PDF {filename}: {e}")
+        for path in iter_pdf_files(pdf_dir):
+            source = os.path.relpath(path, pdf_dir)
+            yield {"source": source, "path": path, "metadata": {"source": source, "type": "official_pdf"}}
     else:
         print(f"   ⚠️ '{pdf_dir}' folder not found. Skipping PDFs.")
 
-    # --- UPLOAD TO SUPABASE ---
-    if final_documents:
-        print(f"\n📦 Uploading {len(final_documents)} total chunks to Supabase...")
-        try:
-            # Table ko pehle saaf karne ka option (Optional)
-            # supabase.table("documents").delete().neq("id", "0000").execute() 
-            
-            vector_store = SupabaseVectorStore(
-                client=supabase,
-                embedding=embeddings,
-                table_name="documents",
-                query_name="match_documents"
-            )
-            
-            batch_size = 50
-            for i in range(0, len(final_documents), batch_size):
-                batch = final_documents[i:i + batch_size]
-                vector_store.add_documents(batch)
-                print(f"   🚀 Uploaded batch {i//batch_size + 1}")
-                
-            print("🎉 Phase 1 Complete: Data Ingested Successfully!")
-        except Exception as e:
-            print(f"❌ Upload Error: {e}")
-    else:
-        print("⚠️ No data collected.")
+def parse_source(syncer, pdf_extractor, report):
+    def stage(item):
+        if "html" in item:
+            soup = parse_html(item.pop("html"))
+            flat = flat_text(soup)  # Purana tareeka, sirf report ke liye
+            # 🧹 HTML ke kachre (Menu, Footer, Scripts) hata ke sirf main content, structure ke saath
+            cleaned_text = extract_main_text(soup)
+            report.record(item["source"], flat, cleaned_text)
+            if len(cleaned_text) > 100: # Agar page khali nahi hai
+                item["text"] = cleaned_text
+                yield item
+            else:
+                syncer.mark_failed(item["source"])
+        elif "path" in item:
+            # Pages lazy generator hai: process pool me extract (ya cache se) hote hi split stage unhe todta hai.
+            # PDF kharab ho to error split stage me aata hai aur on_error source ko failed mark karta hai.
+            item["pages"] = pdf_extractor.pages(item["path"], item["metadata"])
+            yield item
+        else:
+            yield item
+    return stage
+
+def ingest_data():
+    print("🚀 Starting Smart Data Ingestion...")
+    
+    # Chunking Strategy: Thoda Overlap rakhenge taaki context na tute
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=200,
+        separators=["\n\n", "\n", ".", " ", ""],
+        add_start_index=True  # Retrieval ke baad adjacent chunks jodne ke liye
+    )
+    vector_store = SupabaseVectorStore(
+        client=supabase,
+        embedding=embeddings,
+        table_name="documents",
+        query_name="match_documents"
+    )
+    syncer = ManifestSync(supabase, scope="ingest_charusat")
+    pdf_extractor = PdfExtractor()
+    report = ExtractionReport(text_splitter)
+    pdf_extractor.start()
+
+    # fetch -> parse (HTML/PDF) -> split -> embed (sirf naye chunks) -> upload
+    Pipeline(sources(), [
+        Stage("fetch", fetch_html({"User-Agent": "Mozilla/5.0"}, timeout=15, on_fail=syncer.mark_failed), workers=4),
+        Stage("parse", parse_source(syncer, pdf_extractor, report), workers=2),
+        Stage("split", split_text(text_splitter), workers=2),
+        Stage("embed", embed_new_chunks(syncer, embeddings), workers=2),
+        Stage("upload", upload_chunks(syncer, vector_store, batch_size=50), workers=2),
+    ], on_error=syncer.mark_item_failed).run()
+    pdf_extractor.close()
+    report.print_report()
+    pdf = pdf_extractor.stats()
+    print(f"📄 PDFs: {pdf['files_parsed']} parsed ({pdf['pages_parsed']} pages), "
+          f"{pdf['files_cached']} from text cache ({pdf['pages_cached']} pages)")
+
+    sync_report = syncer.finish()
+    print("🎉 Phase 1 Complete: Data Ingested Successfully!")
+    # /chat fast path: data/*.txt + HARDCODED_RULES se scheme answers (server file badalte hi reload karta hai)
+    build_scheme_index(summary_texts=[HARDCODED_RULES])
+    if corpus_changed(sync_report):
+        # Server ke answer cache ko batao ki corpus badal gaya
+        bump_corpus_version("ingest_charusat", client=supabase)
 
 if __name__ == "__main__":
     ingest_data()
\ No newline at end of file
@@ -1,14 +1,14 @@
 import os
-import requests
-import re
 import urllib3
-from bs4 import BeautifulSoup
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import SupabaseVectorStore
-# Local Embeddings (Free & Unlimited)
-from langchain_huggingface import HuggingFaceEmbeddings 
+# Local Embeddings (Free & Unlimited), saare CPU cores pe
+from services.embedding_engine import EmbeddingEngine, VectorUpserter
 from supabase import create_client
 from dotenv import load_dotenv
+from services.corpus_version import bump_corpus_version
+from services.html_extract import ExtractionReport, extract_main_text, flat_text, parse_html
+from services.ingest_manifest import ManifestSync, corpus_changed
+from services.ingest_pipeline import Pipeline, Stage, fetch_html, split_text, embed_new_chunks, upload_chunks
 
 # Warnings chhupane ke liye
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -24,16 +24,6 @@ if not all([SUPABASE_URL, SUPABASE_KEY]):
 
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-print("💻 Loading Local Embedding Model...")
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-print("✅ Model Loaded Successfully!")
-
-# --- CLEANING FUNCTION ---
-def clean_text(text):
-    text = text.replace("\n", " ")
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
-
 # --- DATA SOURCES ---
 URLS_TO_SCRAPE = [
     # 1. Gujarat Govt Schemes (A to Z)
@@ -46,78 +36,69 @@ URLS_TO_SCRAPE = [
     "https://www.mudra.org.in/Offerings",
 ]
 
+# 👇 STRONGER HEADERS (Browser ki nakal)
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Referer": "https://www.google.com/"
+}
+
+def sources():
+    for url in URLS_TO_SCRAPE:
+        yield {"source": url, "url": url, "metadata": {"source": url, "type": "web_scrape"}}
+
+def parse_page(syncer, report):
+    def stage(item):
+        soup = parse_html(item.pop("html"))
+        flat = flat_text(soup)  # Purana tareeka, sirf report ke liye
+        # Menu/footer hata ke sirf main content, headings/lists "\n\n" blocks me
+        cleaned_text = extract_main_text(soup)
+        report.record(item["source"], flat, cleaned_text)
+        print(f"      ---> {item['url']}: Found {len(cleaned_text)} characters")
+
+        if len(cleaned_text) > 100:
+            item["text"] = cleaned_text
+            yield item
+        else:
+            print("   ⚠️ Page seems empty (Javascript rendered?)")
+            syncer.mark_failed(item["source"])  # Purane chunks mat hatao
+    return stage
+
 def ingest_data():
     print("🚀 Starting Local Ingestion...")
-    final_documents = []
     
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=1000,
-        chunk_overlap=200
+        chunk_overlap=200,
+        add_start_index=True  # Retrieval ke baad adjacent chunks jodne ke liye
     )
+    # Engine yahin banao (module level pe nahi): Windows/macOS spawn workers main module dobara import karte hain
+    print("💻 Loading Local Embedding Model...")
+    embeddings = EmbeddingEngine()
+    print(f"✅ Embedding Engine Ready! ({embeddings.workers} workers, {embeddings.precision})")
+    # Precomputed vectors seedha bulk upsert
+    vector_store = VectorUpserter(supabase, precision=embeddings.precision)
+    syncer = ManifestSync(supabase, scope="ingest_local")
+    report = ExtractionReport(text_splitter)
 
-    print("🔹 Scraping Websites...")
-    
-    # 👇 STRONGER HEADERS (Browser ki nakal)
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "Referer": "https://www.google.com/"
-    }
-    
-    for url in URLS_TO_SCRAPE:
-        try:
-            print(f"   🌐 Fetching: {url}")
-            # verify=False is important for gov websites
-            response = requests.get(url, headers=headers, timeout=20, verify=False)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, "html.parser")
-                
-                main_content = soup.find('body')
-                raw_text = main_content.get_text() if main_content else soup.get_text()
-                cleaned_text = clean_text(raw_text)
-                
-                print(f"      ---> Found {len(cleaned_text)} characters")
-                
-                if len(cleaned_text) > 100:
-                    web_docs = text_splitter.create_documents(
-                        [cleaned_text],
-                        metadatas=[{"source": url, "type": "web_scrape"}]
-                    )
-                    final_documents.extend(web_docs)
-                    print(f"   ✅ Fetched {len(web_docs)} chunks.")
-                else:
-                    print("   ⚠️ Page seems empty (Javascript rendered?)")
-            else:
-                print(f"   ❌ Failed Status: {response.status_code}")
-                
-        except Exception as e:
-            print(f"   ⚠️ Error: {e}")
+    # fetch -> parse -> split -> embed (sirf naye chunks) -> upload, sab saath-saath
+    # verify=False is important for gov websites
+    Pipeline(sources(), [
+        Stage("fetch", fetch_html(HEADERS, timeout=20, verify=False, on_fail=syncer.mark_failed), workers=4),
+        Stage("parse", parse_page(syncer, report), workers=2),
+        Stage("split", split_text(text_splitter), workers=2),
+        Stage("embed", embed_new_chunks(syncer, embeddings), workers=embeddings.workers),
+        Stage("upload", upload_chunks(syncer, vector_store, batch_size=20), workers=2),
+    ], on_error=syncer.mark_item_failed).run()
+    embeddings.close()
+    report.print_report()
 
-    # --- UPLOAD TO SUPABASE ---
-    if final_documents:
-        print(f"\n📦 Uploading {len(final_documents)} new chunks to Supabase...")
-        
-        try:
-            vector_store = SupabaseVectorStore(
-                client=supabase,
-                embedding=embeddings,
-                table_name="documents",
-                query_name="match_documents"
-            )
-            
-            batch_size = 20
-            for i in range(0, len(final_documents), batch_size):
-                batch = final_documents[i:i + batch_size]
-                vector_store.add_documents(batch)
-                print(f"   🚀 Uploaded batch {i//batch_size + 1}")
-                
-            print("🎉 SUCCESS: All Data Ingested!")
-        except Exception as e:
-            print(f"❌ Upload Error: {e}")
-    else:
-        print("⚠️ No valid data found to upload.")
+    sync_report = syncer.finish()
+    print("🎉 SUCCESS: All Data Ingested!")
+    if corpus_changed(sync_report):
+        # Server ke answer cache ko batao ki corpus badal gaya
+        bump_corpus_version("ingest_local", client=supabase)
 
 if __name__ == "__main__":
     ingest_data()
\ No newline at end of file
@@ -0,0 +1,140 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from services.corpus_version import get_corpus_version
+
+# --- CONFIGURATION ---
+# Cosine similarity isse upar ho tabhi purana answer reuse hoga
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))  # Seconds
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() != "false"
+
+
+def hash_chunk_ids(chunk_ids):
+    """Retrieved chunks ki IDs ka order-independent hash."""
+    joined = "|".join(sorted(str(cid) for cid in chunk_ids))
+    return hashlib.sha1(joined.encode("utf-8")).hexdigest()
+
+
+def _normalize(vector):
+    norm = math.sqrt(sum(x * x for x in vector))
+    if norm == 0:
+        return None
+    return [x / norm for x in vector]
+
+
+class SemanticAnswerCache:
+    """
+    Query embedding + retrieved chunk IDs ke basis pe LLM answers cache karta hai.
+
+    Hit tab hota hai jab same chunks retrieve hue hon AUR query embedding kisi
+    purani query se `threshold` ya usse zyada similar ho. Chunk hash pe bucket
+    karne se lookup sirf thode se candidates pe cosine nikalta hai.
+    """
+
+    def __init__(self, threshold=ANSWER_CACHE_THRESHOLD, max_size=ANSWER_CACHE_SIZE,
+                 ttl=ANSWER_CACHE_TTL, version_fn=get_corpus_version):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self._version_fn = version_fn
+        self._version = None
+        self._entries = OrderedDict()  # entry_id -> (chunk_hash, unit_vector, answer, created_at)
+        self._by_chunks = {}  # chunk_hash -> set(entry_id)
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # --- internal helpers (lock ke andar call hote hain) ---
+    def _drop(self, entry_id):
+        chunk_hash = self._entries.pop(entry_id)[0]
+        bucket = self._by_chunks.get(chunk_hash)
+        if bucket is not None:
+            bucket.discard(entry_id)
+            if not bucket:
+                del self._by_chunks[chunk_hash]
+
+    def _check_version(self, version):
+        # Version lock ke bahar padha jaata hai (DB read ho sakta hai), yahan sirf compare
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+                print(f"🧹 Answer cache invalidated (corpus version {version})")
+            self._entries.clear()
+            self._by_chunks.clear()
+            self._version = version
+
+    def lookup(self, query_vector, chunk_ids):
+        """Cached answer return karta hai, ya None (miss)."""
+        unit = _normalize(query_vector)
+        chunk_hash = hash_chunk_ids(chunk_ids)
+        now = time.time()
+        version = self._version_fn()
+        with self._lock:
+            self._check_version(version)
+            best_id, best_score = None, self.threshold
+            for entry_id in list(self._by_chunks.get(chunk_hash, ())):
+                _, cached_vector, _, created_at = self._entries[entry_id]
+                if now - created_at > self.ttl:
+                    self._drop(entry_id)
+                    self.evictions += 1
+                    continue
+                if unit is None:
+                    continue
+                score = sum(a * b for a, b in zip(unit, cached_vector))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id][2]
+
+    def store(self, query_vector, chunk_ids, answer):
+        unit = _normalize(query_vector)
+        if unit is None or not answer:
+            return
+        chunk_hash = hash_chunk_ids(chunk_ids)
+        version = self._version_fn()
+        with self._lock:
+            self._check_version(version)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (chunk_hash, unit, answer, time.time())
+            self._by_chunks.setdefault(chunk_hash, set()).add(entry_id)
+            while len(self._entries) > self.max_size:
+                oldest_id = next(iter(self._entries))
+                self._drop(oldest_id)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_chunks.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "corpus_version": self._version,
+            }
+
+
+# Process-wide cache (har gunicorn worker ka apna)
+answer_cache = SemanticAnswerCache()
@@ -0,0 +1,186 @@
+import asyncio
+
+from services import rag_service
+from services.answer_cache import answer_cache
+from services.query_embeddings import normalize_query
+from services.partitions import partition_metrics, PARTITION_RPC
+from services.rag_service import answer_cacheable, build_context, fast_path_answer, filter_rows, \
+    missing_function_error, record_tokens, FALLBACK_MESSAGE, NO_HISTORY
+from services.single_flight import single_flight, SINGLE_FLIGHT_ENABLED
+from services.telemetry import span
+
+
+class AsyncSupabase:
+    """Supabase AsyncClient, event loop pe pehli zaroorat par ek hi baar banta hai."""
+
+    def __init__(self, url, key):
+        self.url = url
+        self.key = key
+        self._task = None
+
+    async def client(self):
+        if self._task is None:
+            from supabase import acreate_client
+            # Task share hota hai: ek saath aaye pehle callers bhi ek hi client banate hain
+            self._task = asyncio.ensure_future(acreate_client(self.url, self.key))
+        try:
+            return await self._task
+        except Exception:
+            self._task = None  # Agli request dobara try kare
+            raise
+
+
+async_supabase = AsyncSupabase(rag_service.SUPABASE_URL, rag_service.SUPABASE_KEY)
+
+
+async def aretrieve_documents(query_vector, match_threshold=0.1, match_count=6, partition=None):
+    """retrieve_documents ka async version: local index thread me, warna async RPC."""
+    if rag_service.local_index is not None:
+        docs = await asyncio.to_thread(rag_service.local_index.search, query_vector,
+                                       match_threshold=match_threshold, match_count=match_count,
+                                       partition=partition)
+        if docs is not None:
+            return docs
+
+    client = await async_supabase.client()
+    params = {
+        "query_embedding": query_vector,
+        "match_threshold": match_threshold,
+        "match_count": match_count
+    }
+    if partition is not None and rag_service.filtered_rpc_available:
+        try:
+            return (await client.rpc(PARTITION_RPC, dict(params, **partition.rpc_params())).execute()).data or []
+        except Exception as e:
+            if not missing_function_error(e):
+                raise
+            rag_service.filtered_rpc_available = False
+            print(f"⚠️ {PARTITION_RPC} not found, using match_documents + client-side filter")
+
+    response = await client.rpc("match_documents", params).execute()
+    return filter_rows(response.data or [], partition)
+
+
+async def aprepare_rag_inputs(query_text, use_cache=True):
+    """
+    prepare_rag_inputs ka async version. BM25 keyword search ko query vector nahi chahiye,
+    isliye wo embedding ke saath-saath thread me chalta hai; phir vector search aur fuse.
+    """
+    hybrid = rag_service.hybrid_retriever
+    partition = rag_service.choose_partition(query_text)
+    keyword_task = asyncio.ensure_future(asyncio.to_thread(hybrid.keyword_search, query_text, partition)) \
+        if hybrid is not None else None
+    try:
+        with span("embed"):
+            query_vector = await rag_service.embeddings.aembed_query(query_text)
+
+        with span("retrieve"):
+            if hybrid is not None:
+                vector_rows = await aretrieve_documents(query_vector, match_threshold=hybrid.match_threshold,
+                                                        match_count=hybrid.candidates, partition=partition)
+                docs = hybrid.fuse(vector_rows, await keyword_task)
+            else:
+                docs = await aretrieve_documents(query_vector, partition=partition)
+            if not docs and partition is not None:
+                # Galat partition: poore corpus me dobara (sync path thread me)
+                partition_metrics.record_fallback()
+                docs = await asyncio.to_thread(rag_service.retrieve_for_query, query_text, query_vector, None)
+    finally:
+        if keyword_task is not None and not keyword_task.done():
+            keyword_task.cancel()
+
+    # Answer cache (SQLite) lookup blocking I/O hai: event loop pe nahi, baaki chats na rukein
+    return (query_vector, *await asyncio.to_thread(build_context, query_vector, docs, use_cache))
+
+
+async def aresolve_question(query_text, memory=None):
+    """rag_service.resolve_question ka async version (rewrite LLM call await hoti hai)."""
+    if memory is None or memory.empty:
+        return query_text, NO_HISTORY, normalize_query(query_text)
+    with span("rewrite"):
+        question = await memory.arewrite(query_text)
+    return question, memory.prompt_text(), f"{normalize_query(question)}#{memory.digest()}"
+
+
+async def agenerate_answer(query_text, history_text=NO_HISTORY):
+    cacheable = answer_cacheable(history_text)
+    query_vector, chunk_ids, context_text, cached_answer = await aprepare_rag_inputs(query_text, cacheable)
+    if cached_answer is not None:
+        return cached_answer
+
+    with span("llm"):
+        answer = await rag_service.model_router.ainvoke({"context": context_text, "history": history_text,
+                                                         "question": query_text})
+    record_tokens(context_text, query_text, answer, history_text)
+
+    if cacheable:
+        await asyncio.to_thread(answer_cache.store, query_vector, chunk_ids, answer)
+    return answer
+
+
+async def aget_rag_response(query_text, memory=None):
+    """get_rag_response ka async version (same friendly error message)."""
+    try:
+        question, history_text, key = await aresolve_question(query_text, memory)
+        # Fast path sirf dict lookups hai (microseconds), event loop pe hi
+        answer = fast_path_answer(question)
+        if answer is not None:
+            return answer
+        if SINGLE_FLIGHT_ENABLED:
+            return await single_flight.ado(key, lambda: agenerate_answer(question, history_text))
+        return await agenerate_answer(question, history_text)
+
+    except Exception as e:
+        print(f"❌ RAG Critical Error: {str(e)}")
+        return FALLBACK_MESSAGE
+
+
+async def astream_rag_response(query_text, memory=None):
+    """stream_rag_response ka async generator version; same-query followers ko poora answer ek saath."""
+    query_text, history_text, key = await aresolve_question(query_text, memory)
+    answer = fast_path_answer(query_text)
+    if answer is not None:
+        yield answer
+        return
+    future, leader = single_flight.ajoin(key) if SINGLE_FLIGHT_ENABLED else (None, True)
+    if not leader:
+        try:
+            yield await asyncio.shield(future)
+        except Exception as e:
+            print(f"❌ RAG Stream Error: {str(e)}")
+            yield FALLBACK_MESSAGE
+        return
+
+    parts, answer, error = [], None, None
+    cacheable = answer_cacheable(history_text)
+    try:
+        query_vector, chunk_ids, context_text, cached_answer = await aprepare_rag_inputs(query_text, cacheable)
+        if cached_answer is not None:
+            answer = cached_answer
+            yield cached_answer
+            return
+
+        with span("llm"):
+            async for token in rag_service.model_router.astream({"context": context_text, "history": history_text,
+                                                                 "question": query_text}):
+                parts.append(token)
+                yield token
+        answer = "".join(parts)
+        record_tokens(context_text, query_text, answer, history_text)
+
+        if cacheable:
+            await asyncio.to_thread(answer_cache.store, query_vector, chunk_ids, answer)
+
+    except Exception as e:
+        error = e
+        print(f"❌ RAG Stream Error: {str(e)}")
+        if parts:
+            raise
+        yield FALLBACK_MESSAGE
+    finally:
+        # Client beech me chala jaye (generator close/cancel) tab bhi followers ko chhodna hai
+        if future is not None:
+            if answer is not None:
+                single_flight.afinish(key, future, result=answer)
+            else:
+                single_flight.afinish(key, future, error=error or RuntimeError("stream closed before completion"))
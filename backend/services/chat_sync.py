@@ -0,0 +1,213 @@
+import os
+import threading
+from collections import OrderedDict
+
+from services.history_cache import VersionCounter, HISTORY_VERSIONS_PATH, decode_cursor, encode_cursor, \
+    keyset_filter
+
+# --- CONFIGURATION ---
+CHAT_PAGE_SIZE = int(os.getenv("CHAT_PAGE_SIZE", "100"))
+CHAT_MAX_PAGE_SIZE = int(os.getenv("CHAT_MAX_PAGE_SIZE", "500"))
+CHAT_CACHE_CONVERSATIONS = int(os.getenv("CHAT_CACHE_CONVERSATIONS", "256"))
+# Ek conversation ke itne se zyada messages memory me nahi rakhte (purane pages DB se)
+CHAT_CACHE_MAX_MESSAGES = int(os.getenv("CHAT_CACHE_MAX_MESSAGES", "1000"))
+MESSAGE_COLUMNS = "id, conversation_id, role, content, created_at"
+
+
+def message_key(row):
+    """
+    (created_at, id): user/ai message ek hi insert me jaate hain aur DB default se dono ka
+    created_at same ho sakta hai, isliye order aur cursors dono me id tie-breaker hai.
+    """
+    return row["created_at"], row.get("id") or 0
+
+
+class _Conversation:
+    """Conversation ka ek contiguous tail (message_key ASC). complete = shuruaat tak sab hai."""
+
+    def __init__(self, version, messages, complete):
+        self.version = version
+        self.messages = messages
+        self.complete = complete
+        self.lock = threading.Lock()
+
+    @property
+    def newest(self):
+        return message_key(self.messages[-1]) if self.messages else None
+
+    @property
+    def oldest(self):
+        return message_key(self.messages[0]) if self.messages else None
+
+    def append(self, rows):
+        known = {m.get("id") for m in self.messages if m.get("id") is not None}
+        fresh = [r for r in rows if r.get("id") is None or r.get("id") not in known]
+        if fresh:
+            self.messages.extend(fresh)
+            self.messages.sort(key=message_key)
+
+
+class ChatSync:
+    """
+    GET /chat/<id> ke liye:
+    - `since`: sirf client ke aakhri message ke baad wale messages
+    - `before` + `limit`: latest page pehle, purane pages peeche ki taraf
+    - cursors (created_at, id) keyset hain (history jaise), opaque strings
+    - recently opened conversations ka bounded LRU; /chat ke writes (WriteBehindQueue
+      listener) cached conversations me seedha jud jaate hain
+    - dusre worker ne likha ho to shared version counter badalta hai aur sirf naye
+      messages (newest key ke baad) DB se aate hain
+    """
+
+    def __init__(self, client, versions=None, max_conversations=CHAT_CACHE_CONVERSATIONS,
+                 max_messages=CHAT_CACHE_MAX_MESSAGES):
+        self.client = client
+        self.versions = versions or VersionCounter(HISTORY_VERSIONS_PATH, table="conversation_versions")
+        self.max_conversations = max_conversations
+        self.max_messages = max_messages
+        self._conversations = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.delta_fetches = 0
+        self.db_queries = 0
+
+    # --- DB ---
+    def _query(self, conversation_id, newer_than=None, older_than=None, limit=None, desc=False):
+        self.db_queries += 1
+        query = self.client.table("messages")\
+            .select(MESSAGE_COLUMNS)\
+            .eq("conversation_id", conversation_id)
+        if newer_than:
+            query = query.or_(keyset_filter(newer_than, newer=True))
+        if older_than:
+            query = query.or_(keyset_filter(older_than, newer=False))
+        query = query.order("created_at", desc=desc).order("id", desc=desc)
+        if limit:
+            query = query.limit(limit)
+        rows = query.execute().data or []
+        return rows[::-1] if desc else rows
+
+    def _load_tail(self, conversation_id, limit):
+        # limit + 1: pata chal jaata hai ki isse purane messages hain ya nahi
+        rows = self._query(conversation_id, limit=limit + 1, desc=True)
+        complete = len(rows) <= limit
+        return rows if complete else rows[1:], complete
+
+    # --- CACHE ---
+    def _entry(self, conversation_id, limit):
+        version = self.versions.get(conversation_id)
+        with self._lock:
+            entry = self._conversations.get(conversation_id)
+            if entry is not None:
+                self._conversations.move_to_end(conversation_id)
+        if entry is None:
+            self.misses += 1
+            messages, complete = self._load_tail(conversation_id, limit)
+            entry = _Conversation(version, messages, complete)
+            if self.max_conversations > 0:
+                with self._lock:
+                    self._conversations[conversation_id] = entry
+                    while len(self._conversations) > self.max_conversations:
+                        self._conversations.popitem(last=False)
+            return entry
+
+        self.hits += 1
+        if entry.version != version:
+            # Kisi aur worker ne likha: sirf naye messages lao
+            with entry.lock:
+                if entry.version != version:
+                    self.delta_fetches += 1
+                    entry.append(self._query(conversation_id, newer_than=entry.newest))
+                    entry.version = version
+        return entry
+
+    def _older(self, conversation_id, entry, before, limit):
+        """Cache ke oldest se purane messages DB se; jagah ho to cache me bhi jodo."""
+        rows = self._query(conversation_id, older_than=before, limit=limit + 1, desc=True)
+        reached_start = len(rows) <= limit
+        rows = rows if reached_start else rows[1:]
+        with entry.lock:
+            if before == entry.oldest and len(entry.messages) + len(rows) <= self.max_messages:
+                entry.messages[:0] = rows
+                entry.complete = reached_start
+        return rows, not reached_start
+
+    def _all(self, conversation_id):
+        entry = self._entry(conversation_id, self.max_messages)
+        with entry.lock:
+            cached = list(entry.messages)
+            complete = entry.complete
+        if complete or not cached:
+            return cached
+        # Cache ki bound se lambi chat: tail se purane messages DB se (cache me nahi jodte)
+        return self._query(conversation_id, older_than=message_key(cached[0])) + cached
+
+    # --- PUBLIC API ---
+    def messages(self, conversation_id, since=None, before=None, limit=CHAT_PAGE_SIZE):
+        """
+        Returns (rows, prev_cursor, next_cursor); rows (created_at, id) ASC me.
+        prev_cursor: isse purane messages ke liye `before`; next_cursor: `since` ke aage aur bache hain.
+        Kharab cursor pe ValueError. limit=None (bina cursor): poori conversation, purane clients ke liye.
+        """
+        since = decode_cursor(since) if since else None
+        before = decode_cursor(before) if before else None
+        if limit is None:
+            if not since and not before:
+                return self._all(conversation_id), None, None
+            limit = CHAT_PAGE_SIZE
+        entry = self._entry(conversation_id, limit)
+        with entry.lock:
+            cached = list(entry.messages)
+            complete = entry.complete
+
+        if since:
+            newer = [m for m in cached if message_key(m) > since]
+            if not complete and (not cached or since < entry.oldest):
+                # Client cache ke tail se bhi purana hai: DB se seedha
+                newer = self._query(conversation_id, newer_than=since, limit=limit + 1)
+            page = newer[:limit]
+            next_cursor = encode_cursor(page[-1]) if len(newer) > limit else None
+            return page, None, next_cursor
+
+        older = [m for m in cached if not before or message_key(m) < before]
+        if len(older) >= limit or complete:
+            page = older[-limit:] if limit else older
+            has_more = len(older) > len(page) or not complete
+        else:
+            # Cache me kaafi purane messages nahi: bache hue DB se
+            boundary = message_key(older[0]) if older else before
+            extra, has_more = self._older(conversation_id, entry, boundary, limit - len(older))
+            page = extra + older
+        prev_cursor = encode_cursor(page[0]) if page and has_more else None
+        return page, prev_cursor, None
+
+    def on_write(self, batch):
+        """WriteBehindQueue listener: DB me likhe messages cached conversation me jodo."""
+        by_conversation = {}
+        for row in batch.get("messages", ()):
+            by_conversation.setdefault(row.get("conversation_id"), []).append(row)
+        if not by_conversation:
+            return
+        new_versions = self.versions.bump(by_conversation)
+        for conversation_id, rows in by_conversation.items():
+            with self._lock:
+                entry = self._conversations.get(conversation_id)
+            if entry is None:
+                continue
+            with entry.lock:
+                entry.append(rows)
+                # Beech me kisi aur ka write na ho to hum up-to-date hain
+                if entry.version == new_versions[conversation_id] - 1:
+                    entry.version = new_versions[conversation_id]
+                if len(entry.messages) > self.max_messages:
+                    del entry.messages[:len(entry.messages) - self.max_messages]
+                    entry.complete = False
+
+    def stats(self):
+        with self._lock:
+            size = len(self._conversations)
+        total = self.hits + self.misses
+        return {"conversations": size, "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "delta_fetches": self.delta_fetches, "db_queries": self.db_queries}
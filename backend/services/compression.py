@@ -0,0 +1,59 @@
+import gzip
+import os
+
+try:
+    import brotli  # Optional: pip install brotli
+except ImportError:
+    brotli = None
+
+# --- CONFIGURATION ---
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))  # Chhote JSON pe CPU bekaar
+COMPRESSIBLE_MIMETYPES = ("application/json",)
+
+
+def _accepts(accept_encoding, coding):
+    """'gzip;q=0' / 'q=0.0' jaise explicit refusal ko bhi samjho (q ka matlab float se)."""
+    for part in (accept_encoding or "").lower().split(","):
+        name, *params = part.split(";")
+        if name.strip() != coding:
+            continue
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    return float(value.strip()) > 0
+                except ValueError:
+                    return False  # Bigda q: compress na karna hamesha safe hai
+        return True
+    return False
+
+
+def compress_response(response, accept_encoding):
+    """
+    Flask `after_request` hook: bade JSON responses (lambe markdown answers) ko brotli
+    (available ho to) ya gzip karta hai. Streams (SSE) aur 304 ko nahi chhoota.
+    """
+    if (not COMPRESSION_ENABLED or response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES or "Content-Encoding" in response.headers):
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return response
+
+    if brotli is not None and _accepts(accept_encoding, "br"):
+        encoded, coding = brotli.compress(body, quality=5), "br"
+    elif _accepts(accept_encoding, "gzip"):
+        encoded, coding = gzip.compress(body, compresslevel=6), "gzip"
+    else:
+        return response
+
+    response.set_data(encoded)
+    response.headers["Content-Encoding"] = coding
+    response.headers["Content-Length"] = str(len(encoded))
+    response.vary.add("Accept-Encoding")
+    # Weak ETag: same data, alag encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
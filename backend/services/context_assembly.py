@@ -0,0 +1,228 @@
+import os
+import re
+import threading
+
+# --- CONFIGURATION ---
+CONTEXT_ASSEMBLY_ENABLED = os.getenv("CONTEXT_ASSEMBLY_ENABLED", "true").lower() == "true"
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))  # Provider ka budget na ho to
+CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.85"))
+CHARS_PER_TOKEN = 4  # Tokenizer ke bina mota andaza (MiniLM/Llama dono ke liye theek)
+MIN_OVERLAP_CHARS = 30  # Isse chhota common span sanyog ho sakta hai, overlap nahi
+MAX_OVERLAP_CHARS = 400  # Ingest scripts chunk_overlap=200 use karti hain
+MIN_TAIL_TOKENS = 60  # Budget me bacha hissa isse kam ho to aadha chunk mat bhejo
+SEPARATOR = "\n\n"
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def overlap_length(left, right, min_chars=MIN_OVERLAP_CHARS, max_chars=MAX_OVERLAP_CHARS):
+    """`left` ka suffix jo `right` ka prefix bhi hai (splitter overlap), uski length; warna 0."""
+    for size in range(min(len(left), len(right), max_chars), min_chars - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _shingles(text, size=3):
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _truncate(text, max_chars):
+    """Paragraph/line/sentence boundary pe kaato, taaki aadha fact na jaaye."""
+    cut = text[:max_chars]
+    for boundary in (SEPARATOR, "\n", ". "):
+        position = cut.rfind(boundary)
+        if position >= max_chars // 2:
+            return cut[:position + (1 if boundary == ". " else 0)].rstrip()
+    return cut.rstrip()
+
+
+class _Piece:
+    def __init__(self, row, rank):
+        metadata = row.get("metadata") or {}
+        self.text = (row.get("content") or "").strip()
+        # PDF pages ke start_index page ke andar hote hain, isliye (source, page) ek group
+        source = metadata.get("source")
+        self.group = (source, metadata.get("page")) if source is not None else ("row", rank)
+        self.start = metadata.get("start_index")
+        self.rank = rank
+        self.ids = [row.get("id")]
+
+    @property
+    def end(self):
+        return self.start + len(self.text)
+
+
+def _absorb(a, b, stats, overlap=0):
+    """b ko a me jodo (overlap hata ke); overlap None = b poora a ke andar tha."""
+    if overlap is None:
+        stats["duplicates_dropped"] += 1
+    else:
+        a.text = a.text + b.text[overlap:]
+        stats["overlap_chars_stripped"] += overlap
+        stats["chunks_merged"] += 1
+    a.rank = min(a.rank, b.rank)
+    a.ids.extend(b.ids)
+
+
+def _merge_by_position(pieces, stats):
+    """Ingest ne `start_index` rakha ho to: position se sort, overlapping neighbours ek piece."""
+    pieces = sorted(pieces, key=lambda p: p.start)
+    merged = [pieces[0]]
+    for piece in pieces[1:]:
+        current = merged[-1]
+        if piece.end <= current.end:
+            _absorb(current, piece, stats, overlap=None)
+        elif piece.start < current.end and current.text.endswith(piece.text[:current.end - piece.start]):
+            _absorb(current, piece, stats, overlap=current.end - piece.start)
+        else:
+            merged.append(piece)
+    return merged
+
+
+def _merge_by_text(pieces, stats):
+    """Purane chunks (bina start_index): suffix/prefix overlap dhoondh ke jodo, contained piece hatao."""
+    merged = True
+    while merged and len(pieces) > 1:
+        merged = False
+        for a in pieces:
+            for b in pieces:
+                if a is b:
+                    continue
+                if b.text in a.text:
+                    _absorb(a, b, stats, overlap=None)
+                else:
+                    size = overlap_length(a.text, b.text)
+                    if not size:
+                        continue
+                    _absorb(a, b, stats, overlap=size)
+                pieces.remove(b)
+                merged = True
+                break
+            if merged:
+                break
+    return pieces
+
+
+def _merge_same_source(pieces, stats):
+    if len(pieces) > 1 and all(isinstance(p.start, int) for p in pieces):
+        return _merge_by_position(pieces, stats)
+    return _merge_by_text(pieces, stats)
+
+
+def assemble_context(docs, token_budget=CONTEXT_TOKEN_BUDGET, duplicate_threshold=CONTEXT_DUPLICATE_THRESHOLD):
+    """
+    Retrieved rows (best pehle) -> prompt context.
+    1. Same `source` ke adjacent chunks ka 200-char overlap hata ke unhe ek piece me jodo
+    2. Near-duplicate pieces (alag sources me copy-paste text) drop karo
+    3. Rank order me hard token budget tak bharo; aakhri piece boundary pe kaato
+    4. Output me same source ke pieces saath aur document order me
+
+    Returns (context_text, stats).
+    """
+    stats = {
+        "chunks_in": len(docs), "chunks_out": 0, "tokens_in": 0, "tokens_out": 0, "tokens_saved": 0,
+        "overlap_chars_stripped": 0, "chunks_merged": 0, "duplicates_dropped": 0, "truncated": 0,
+        "budget": token_budget,
+    }
+    stats["tokens_in"] = estimate_tokens(SEPARATOR.join((d.get("content") or "").strip() for d in docs))
+
+    groups = {}
+    for rank, row in enumerate(docs):
+        piece = _Piece(row, rank)
+        if piece.text:
+            groups.setdefault(piece.group, []).append(piece)
+    pieces = []
+    for group in groups.values():
+        pieces.extend(_merge_same_source(group, stats))
+    pieces.sort(key=lambda p: p.rank)
+
+    kept, kept_shingles = [], []
+    for piece in pieces:
+        shingles = _shingles(piece.text)
+        duplicate = False
+        for other in kept_shingles:
+            common = len(shingles & other)
+            # Containment: chhota piece lagbhag poora bade me ho to bhi duplicate
+            if shingles and common / min(len(shingles), len(other) or 1) >= duplicate_threshold:
+                duplicate = True
+                break
+        if duplicate:
+            stats["duplicates_dropped"] += 1
+            continue
+        kept.append(piece)
+        kept_shingles.append(shingles)
+
+    selected, used = [], 0
+    separator_cost = estimate_tokens(SEPARATOR)
+    for piece in kept:
+        cost = estimate_tokens(piece.text) + (separator_cost if selected else 0)
+        if used + cost <= token_budget:
+            selected.append((piece, piece.text))
+            used += cost
+            continue
+        remaining = token_budget - used - (separator_cost if selected else 0)
+        if remaining >= MIN_TAIL_TOKENS:
+            selected.append((piece, _truncate(piece.text, remaining * CHARS_PER_TOKEN)))
+            stats["truncated"] += 1
+        break
+
+    # Best source pehle; ek source ke pieces uske document order me
+    group_rank = {}
+    for piece, _ in selected:
+        group_rank[piece.group] = min(group_rank.get(piece.group, piece.rank), piece.rank)
+    selected.sort(key=lambda item: (group_rank[item[0].group],
+                                    item[0].start if isinstance(item[0].start, int) else item[0].rank))
+
+    context_text = SEPARATOR.join(text for _, text in selected)
+    stats["chunks_out"] = len(selected)
+    stats["tokens_out"] = estimate_tokens(context_text)
+    stats["tokens_saved"] = max(0, stats["tokens_in"] - stats["tokens_out"])
+    return context_text, stats
+
+
+class ContextMetrics:
+    """Process-wide totals: kitne tokens prompt tak pahunchne se bache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.duplicates_dropped = 0
+        self.chunks_merged = 0
+        self.truncated = 0
+
+    def record(self, stats):
+        with self._lock:
+            self.requests += 1
+            self.tokens_in += stats["tokens_in"]
+            self.tokens_out += stats["tokens_out"]
+            self.duplicates_dropped += stats["duplicates_dropped"]
+            self.chunks_merged += stats["chunks_merged"]
+            self.truncated += stats["truncated"]
+
+    def stats(self):
+        with self._lock:
+            saved = self.tokens_in - self.tokens_out
+            return {
+                "requests": self.requests,
+                "tokens_in": self.tokens_in,
+                "tokens_out": self.tokens_out,
+                "tokens_saved": saved,
+                "tokens_saved_per_request": round(saved / self.requests, 1) if self.requests else 0.0,
+                "saved_ratio": round(saved / self.tokens_in, 4) if self.tokens_in else 0.0,
+                "duplicates_dropped": self.duplicates_dropped,
+                "chunks_merged": self.chunks_merged,
+                "truncated": self.truncated,
+            }
+
+
+context_metrics = ContextMetrics()
@@ -0,0 +1,353 @@
+import hashlib
+import os
+import queue
+import re
+import threading
+from collections import OrderedDict
+
+from services.chat_sync import message_key
+from services.context_assembly import CHARS_PER_TOKEN
+from services.history_cache import keyset_filter
+from services.lazy import LazyObject
+from services.model_router import ModelRouter
+
+# --- CONFIGURATION ---
+MEMORY_ENABLED = os.getenv("MEMORY_ENABLED", "true").lower() == "true"
+# Itne aakhri turns (user + ai) prompt me verbatim; usse purane sirf summary me
+MEMORY_RECENT_TURNS = int(os.getenv("MEMORY_RECENT_TURNS", "3"))
+# Prompt size constant rakhne wale hard caps (tokens, chars/4 estimate)
+MEMORY_SUMMARY_TOKENS = int(os.getenv("MEMORY_SUMMARY_TOKENS", "200"))
+MEMORY_MESSAGE_TOKENS = int(os.getenv("MEMORY_MESSAGE_TOKENS", "120"))
+# Ek summary update me kitne purane messages fold hote hain
+MEMORY_FOLD_BATCH = int(os.getenv("MEMORY_FOLD_BATCH", "20"))
+MEMORY_CACHE_CONVERSATIONS = int(os.getenv("MEMORY_CACHE_CONVERSATIONS", "1024"))
+# auto: sirf follow-up jaisi query ("what about ...", "iske liye", chhoti "and documents?") rewrite; always; off
+MEMORY_REWRITE = os.getenv("MEMORY_REWRITE", "auto").lower()
+# Pronoun/"and" se shuru hone wali query itne words tak hi follow-up maani jaati hai
+MEMORY_FOLLOWUP_MAX_WORDS = int(os.getenv("MEMORY_FOLLOWUP_MAX_WORDS", "6"))
+MEMORY_REWRITE_MAX_CHARS = 300
+# Summary `conversations` table me hi rehti hai (column na ho to memory bina summary ke chalti hai):
+#   alter table conversations add column summary text, add column summary_until timestamptz,
+#     add column summary_until_id text;  -- (created_at, id): same created_at wale messages bhi alag
+
+SUMMARY_TEMPLATE = """
+You maintain a running summary of a chat between a user and Niti.ai (Indian Government Schemes assistant).
+Update the summary with the new messages. Keep scheme names, the user's situation (state, income, occupation,
+category) and what was already answered. Drop greetings and details of long answers.
+Write at most {max_words} words, in the user's language. Return only the summary.
+
+Current summary: {summary}
+
+New messages:
+{messages}
+
+Updated summary:
+"""
+
+REWRITE_TEMPLATE = """
+Rewrite the user's latest message as a standalone question about Indian Government Schemes.
+Use the conversation only to resolve references (scheme names, "it", "iske", "uska", "aur ...").
+Keep the user's language. If the message is already standalone, return it unchanged.
+Return only the question, on one line.
+
+Conversation:
+{history}
+
+Latest message: {question}
+
+Standalone question:
+"""
+
+# Har query pe LLM rewrite mehenga hai: "what", "and", "ye" jaise aam words nahi, sirf pichli baat ki
+# taraf ishara karne wale phrases (kahin bhi) ya pronoun se shuru hoti chhoti query
+_FOLLOWUP_PHRASES = tuple(f" {phrase} " for phrase in (
+    "what about", "how about", "what else", "and for", "same for", "the same", "same scheme", "above scheme",
+    "this scheme", "that scheme", "this yojana", "that yojana", "is scheme", "us scheme", "is yojana",
+    "us yojana", "iske", "uske", "iska", "uska", "iski", "uski", "isme", "usme", "isko", "usko", "inke",
+    "unke", "inka", "unka", "wahi", "yahi", "is it", "does it", "is that", "kya ye", "kya yeh", "kya wo",
+    "kya woh",
+))
+_FOLLOWUP_LEADS = frozenset("""
+and aur also bhi it its this that these those they them their ye yeh wo woh vo
+""".split())
+_WORD_RE = re.compile(r"\w+")
+MESSAGE_COLUMNS = "id, role, content, created_at"
+
+
+def build_summary_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_template(SUMMARY_TEMPLATE)
+
+
+def build_rewrite_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_template(REWRITE_TEMPLATE)
+
+
+def clip(text, tokens):
+    text = (text or "").strip()
+    max_chars = tokens * CHARS_PER_TOKEN
+    return text if len(text) <= max_chars else text[:max_chars].rsplit(" ", 1)[0] + " ..."
+
+
+def format_messages(rows, message_tokens=MEMORY_MESSAGE_TOKENS):
+    # AI ke lambe markdown answers kaat ke: har message ka hard cap
+    lines = []
+    for row in rows:
+        speaker = "User" if row.get("role") == "user" else "Niti.ai"
+        lines.append(f"{speaker}: {clip(row.get('content'), message_tokens)}")
+    return "\n".join(lines)
+
+
+def looks_like_follow_up(query, max_words=MEMORY_FOLLOWUP_MAX_WORDS):
+    """"what about documents?", "iske liye apply kaise kare", "and for students?" haan; "PM Kisan eligibility" nahi."""
+    words = _WORD_RE.findall((query or "").lower())
+    if not words:
+        return False
+    padded = " " + " ".join(words) + " "
+    if any(phrase in padded for phrase in _FOLLOWUP_PHRASES):
+        return True
+    return words[0] in _FOLLOWUP_LEADS and len(words) <= max_words
+
+
+class MemoryContext:
+    """
+    Ek request ke liye conversation memory: summary + aakhri turns. prompt_text() ki size
+    MEMORY_SUMMARY_TOKENS + 2 * MEMORY_RECENT_TURNS * MEMORY_MESSAGE_TOKENS se upar nahi jaati.
+    """
+
+    def __init__(self, memory, conversation_id, summary, recent):
+        self.memory = memory
+        self.conversation_id = conversation_id
+        self.summary = summary
+        self.recent = recent
+
+    @property
+    def empty(self):
+        return not self.summary and not self.recent
+
+    def prompt_text(self):
+        if self.empty:
+            return "None"
+        parts = []
+        if self.summary:
+            parts.append(f"Summary of earlier conversation: {self.summary}")
+        if self.recent:
+            parts.append(format_messages(self.recent))
+        return "\n".join(parts)
+
+    def digest(self):
+        # Single-flight key ke liye: alag history => alag computation
+        return hashlib.sha1(self.prompt_text().encode("utf-8")).hexdigest()[:16]
+
+    def last_user_query(self):
+        return next((row.get("content") or "" for row in reversed(self.recent) if row.get("role") == "user"), "")
+
+    def _should_rewrite(self, query):
+        if self.empty or MEMORY_REWRITE == "off":
+            return False
+        return MEMORY_REWRITE == "always" or looks_like_follow_up(query)
+
+    def rewrite(self, query):
+        """Follow-up ko standalone question banao (embedding/retrieval isi pe hota hai)."""
+        if not self._should_rewrite(query):
+            return query
+        try:
+            return self.memory.clean_rewrite(
+                self.memory.rewriter.invoke({"history": self.prompt_text(), "question": query}), query)
+        except Exception as e:
+            return self.memory.rewrite_failed(e, query, self)
+
+    async def arewrite(self, query):
+        if not self._should_rewrite(query):
+            return query
+        try:
+            return self.memory.clean_rewrite(
+                await self.memory.rewriter.ainvoke({"history": self.prompt_text(), "question": query}), query)
+        except Exception as e:
+            return self.memory.rewrite_failed(e, query, self)
+
+
+class _State:
+    def __init__(self, summary, summary_until):
+        self.summary = summary
+        self.summary_until = summary_until  # Summary me fold hua aakhri message ka (created_at, id)
+        self.checked_window = None  # Recent window ka start jiske liye fold check ho chuka
+        self.lock = threading.Lock()
+
+
+class ConversationMemory:
+    """
+    Per-conversation memory, prompt size conversation ki length se independent:
+    - aakhri MEMORY_RECENT_TURNS turns verbatim (ChatSync ke cached tail se, koi extra query nahi)
+    - usse purane messages ek rolling summary me: window aage badhte hi background thread
+      naye purane messages ko purani summary ke saath LLM se fold karta hai (incremental, O(naye messages))
+    - summary `conversations.summary` / `conversations.summary_until` me persist, aur bounded LRU me cached
+    - follow-up queries embedding se pehle standalone question me rewrite
+    """
+
+    def __init__(self, client, message_source, providers, recent_turns=MEMORY_RECENT_TURNS,
+                 summary_tokens=MEMORY_SUMMARY_TOKENS, fold_batch=MEMORY_FOLD_BATCH,
+                 max_conversations=MEMORY_CACHE_CONVERSATIONS):
+        self.client = client
+        self.message_source = message_source  # ChatSync: messages(conversation_id, limit=...)
+        self.window = 2 * recent_turns
+        self.summary_tokens = summary_tokens
+        self.fold_batch = fold_batch
+        self.max_conversations = max_conversations
+        # Providers (clients, circuit breakers) RAG wale hi; prompts alag
+        self.summarizer = ModelRouter(providers, LazyObject(build_summary_prompt, "summary_prompt"), hedge=False)
+        self.rewriter = ModelRouter(providers, LazyObject(build_rewrite_prompt, "rewrite_prompt"), hedge=False)
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+        self._folds = queue.Queue()
+        self._queued = set()
+        self._worker = None
+        self.rewrites = 0
+        self.rewrite_failures = 0
+        self.folds = 0
+        self.fold_failures = 0
+        self.summary_loads = 0
+
+    # --- STATE (LRU + DB) ---
+    def _load_state(self, conversation_id):
+        self.summary_loads += 1
+        try:
+            rows = self.client.table("conversations")\
+                .select("summary, summary_until, summary_until_id")\
+                .eq("id", conversation_id)\
+                .limit(1)\
+                .execute().data or []
+        except Exception as e:
+            # Column abhi migrate nahi hua / DB down: summary ke bina chalo
+            print(f"⚠️ Conversation summary load failed: {e}")
+            rows = []
+        row = rows[0] if rows else {}
+        until = (row["summary_until"], row.get("summary_until_id") or 0) if row.get("summary_until") else None
+        return _State(row.get("summary") or "", until)
+
+    def _state(self, conversation_id):
+        with self._lock:
+            state = self._states.get(conversation_id)
+            if state is not None:
+                self._states.move_to_end(conversation_id)
+                return state
+        state = self._load_state(conversation_id)
+        with self._lock:
+            state = self._states.setdefault(conversation_id, state)
+            while len(self._states) > self.max_conversations:
+                self._states.popitem(last=False)
+        return state
+
+    # --- PUBLIC API ---
+    def context(self, conversation_id):
+        """Request path: summary (cached) + recent turns (ChatSync cache). None = naya conversation."""
+        if not conversation_id:
+            return None
+        state = self._state(conversation_id)
+        rows, prev_cursor, _ = self.message_source.messages(conversation_id, limit=self.window)
+        with state.lock:
+            summary, until = state.summary, state.summary_until
+            recent = [row for row in rows if until is None or message_key(row) > until]
+            # Window se bahar gaye par summary me nahi aaye messages: background fold
+            window_start = message_key(rows[0]) if rows else None
+            needs_fold = prev_cursor is not None and window_start != state.checked_window \
+                and (until is None or until < window_start)
+            if needs_fold:
+                state.checked_window = window_start
+        if needs_fold:
+            self._schedule_fold(conversation_id, window_start)
+        return MemoryContext(self, conversation_id, summary, recent)
+
+    def clean_rewrite(self, text, original):
+        self.rewrites += 1
+        line = next((line for line in (text or "").splitlines() if line.strip()), "")
+        line = line.strip().strip('"\'').strip()
+        return line[:MEMORY_REWRITE_MAX_CHARS] if line else original
+
+    def rewrite_failed(self, error, query, memory):
+        # LLM na mile to bhi retrieval ko pichhle sawaal ka context do
+        self.rewrite_failures += 1
+        print(f"⚠️ Query rewrite failed, using previous question as context: {error}")
+        previous = memory.last_user_query()
+        return f"{previous} {query}".strip()[:MEMORY_REWRITE_MAX_CHARS] if previous else query
+
+    # --- ROLLING SUMMARY (background) ---
+    def _schedule_fold(self, conversation_id, window_start):
+        with self._lock:
+            if conversation_id in self._queued:
+                return
+            self._queued.add(conversation_id)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="memory-summarizer", daemon=True)
+                self._worker.start()
+        self._folds.put((conversation_id, window_start))
+
+    def _run(self):
+        while True:
+            conversation_id, window_start = self._folds.get()
+            try:
+                self.fold(conversation_id, window_start)
+            except Exception as e:
+                self.fold_failures += 1
+                print(f"⚠️ Conversation summary update failed: {e}")
+            finally:
+                with self._lock:
+                    self._queued.discard(conversation_id)
+
+    def _older_messages(self, conversation_id, after, before):
+        """`after` < (created_at, id) < `before`. `before` client side: ek query me ek hi or_ keyset."""
+        query = self.client.table("messages")\
+            .select(MESSAGE_COLUMNS)\
+            .eq("conversation_id", conversation_id)
+        if after:
+            query = query.or_(keyset_filter(after, newer=True))
+        rows = query.order("created_at").order("id").limit(self.fold_batch).execute().data or []
+        return [row for row in rows if message_key(row) < before]
+
+    def summarize(self, summary, rows):
+        max_words = self.summary_tokens * CHARS_PER_TOKEN // 6  # ~6 chars/word
+        try:
+            text = self.summarizer.invoke({"summary": summary or "None", "messages": format_messages(rows),
+                                           "max_words": max_words})
+        except Exception as e:
+            # LLM down: user ke sawaal hi summary me jodo (extractive), kuch na khoye
+            print(f"⚠️ Summary LLM failed, using extractive summary: {e}")
+            questions = "; ".join(clip(row.get("content"), 30) for row in rows if row.get("role") == "user")
+            text = f"{summary} User also asked: {questions}".strip() if questions else summary
+        # Budget hard cap: model lamba likhe tab bhi prompt size fixed; purani baatein pehle katti hain
+        text = (text or "").strip()
+        max_chars = self.summary_tokens * CHARS_PER_TOKEN
+        return text if len(text) <= max_chars else "... " + text[-max_chars:].split(" ", 1)[-1]
+
+    def fold(self, conversation_id, window_start):
+        """summary_until se window_start tak ke messages summary me, batch by batch (purane pehle)."""
+        state = self._state(conversation_id)
+        while True:
+            with state.lock:
+                summary, until = state.summary, state.summary_until
+            rows = self._older_messages(conversation_id, until, window_start)
+            if not rows:
+                return
+            summary = self.summarize(summary, rows)
+            until = message_key(rows[-1])
+            with state.lock:
+                state.summary, state.summary_until = summary, until
+            self.folds += 1
+            try:
+                self.client.table("conversations")\
+                    .update({"summary": summary, "summary_until": until[0], "summary_until_id": until[1]})\
+                    .eq("id", conversation_id)\
+                    .execute()
+            except Exception as e:
+                # Summary sirf cache hai: DB me na likhe to agli baar dobara ban jayegi
+                print(f"⚠️ Conversation summary save failed: {e}")
+            if len(rows) < self.fold_batch:
+                return
+
+    def stats(self):
+        with self._lock:
+            size = len(self._states)
+        return {"conversations": size, "summary_loads": self.summary_loads, "folds": self.folds,
+                "fold_failures": self.fold_failures, "fold_queue": self._folds.qsize(),
+                "rewrites": self.rewrites, "rewrite_failures": self.rewrite_failures}
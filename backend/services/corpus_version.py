@@ -0,0 +1,132 @@
+"""
+Corpus version: jab bhi `documents` table me naye chunks likhe jaate hain, version badal jata hai
+aur server ke saare corpus-dependent caches (answer cache, local vector/keyword index) apne aap
+invalid ho jaate hain.
+
+Ingest aksar server se alag machine pe chalta hai, isliye version Supabase me rehta hai
+(ek baar SQL editor me):
+    create table corpus_version (id int primary key, version text not null, reason text,
+                                 updated_at timestamptz not null default now());
+
+Local file (.cache/corpus_version) sirf fallback hai: table na ho / client set na ho. File wala
+invalidation tabhi kaam karta hai jab ingest aur server ek hi host pe chalein; warna server ko
+bump dikhta hi nahi aur answers ANSWER_CACHE_TTL tak purane milte hain.
+"""
+import os
+import threading
+import time
+
+# --- CONFIGURATION ---
+DEFAULT_CORPUS_VERSION_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "corpus_version"
+)
+# Version har request pe na padhein (DB round trip / file stat), itne seconds me ek baar kaafi hai
+CHECK_INTERVAL = float(os.getenv("CORPUS_VERSION_CHECK_INTERVAL", "5"))
+# Shared version ki Supabase table; "" = sirf local file (single-host setup)
+CORPUS_VERSION_TABLE = os.getenv("CORPUS_VERSION_TABLE", "corpus_version")
+CORPUS_VERSION_ROW = 1
+
+_client = None
+_cached_version = None
+_last_checked = 0.0
+_table_ok = False  # Table se ek baar bhi padh paaye to DB blip pe file pe nahi palatte
+_warned = False
+_refresh_lock = threading.Lock()
+
+
+def use_corpus_version_client(client):
+    """Server startup pe Supabase client do: version tab sab hosts me shared rehta hai."""
+    global _client
+    _client = client
+
+
+def corpus_version_file():
+    # Call time pe padho: ingest scripts load_dotenv() import ke baad karte hain
+    return os.getenv("CORPUS_VERSION_FILE", DEFAULT_CORPUS_VERSION_FILE)
+
+
+def _write_file(version, reason):
+    path = corpus_version_file()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        f.write(version + ("\n" + reason if reason else ""))
+    os.replace(tmp_path, path)
+
+
+def _read_file():
+    try:
+        with open(corpus_version_file()) as f:
+            return f.readline().strip() or "0"
+    except OSError:
+        return "0"
+
+
+def _read_table(client):
+    res = client.table(CORPUS_VERSION_TABLE).select("version").eq("id", CORPUS_VERSION_ROW).limit(1).execute()
+    return res.data[0]["version"] if res.data else "0"
+
+
+def bump_corpus_version(reason="", client=None):
+    """
+    Ingestion ke baad call karo: naya version likhta hai aur return karta hai.
+    `client` (ingest script ka Supabase client) do taaki dusre host ka server bhi bump dekhe.
+    """
+    version = f"{time.time():.6f}"
+    _write_file(version, reason)
+    client = client or _client
+    shared = False
+    if client is not None and CORPUS_VERSION_TABLE:
+        try:
+            client.table(CORPUS_VERSION_TABLE).upsert(
+                [{"id": CORPUS_VERSION_ROW, "version": version, "reason": reason or None}]
+            ).execute()
+            shared = True
+        except Exception as e:
+            print(f"⚠️ Corpus version not saved to Supabase ({e}): sirf same-host server ko bump dikhega")
+    print(f"🔖 Corpus version bumped: {version} {reason}".rstrip() + ("" if shared else " (local file only)"))
+    return version
+
+
+def _refresh():
+    """_refresh_lock caller ke paas: table (ya file) padh ke cached version update karta hai."""
+    global _cached_version, _last_checked, _table_ok, _warned
+    version = None
+    if _client is not None and CORPUS_VERSION_TABLE:
+        try:
+            version = _read_table(_client)
+            _table_ok = True
+        except Exception as e:
+            if not _warned:
+                _warned = True
+                print(f"⚠️ Corpus version table unreadable ({e}): local file pe fallback")
+            if _table_ok:
+                version = _cached_version  # DB blip: caches bina wajah invalid na hon
+    if version is None:
+        version = _read_file()
+    _cached_version = version
+    _last_checked = time.monotonic()
+    return version
+
+
+def _refresh_and_release():
+    try:
+        _refresh()
+    finally:
+        _refresh_lock.release()
+
+
+def get_corpus_version(force=False):
+    """
+    Current corpus version ("0" agar kabhi bump nahi hua). Sirf pehli call (ya force) read ka wait
+    karti hai; baad me CHECK_INTERVAL purana hone pe refresh background thread me hota hai aur
+    request ko tab tak purana version milta hai (DB round trip request path pe nahi).
+    """
+    if not force and _cached_version is not None:
+        if time.monotonic() - _last_checked >= CHECK_INTERVAL and _refresh_lock.acquire(blocking=False):
+            threading.Thread(target=_refresh_and_release, name="corpus-version", daemon=True).start()
+        return _cached_version
+    with _refresh_lock:
+        if not force and _cached_version is not None:
+            return _cached_version
+        return _refresh()
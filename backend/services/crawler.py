@@ -0,0 +1,336 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib import robotparser
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from services.html_extract import parse_html
+
+# --- CONFIGURATION ---
+DEFAULT_FRONTIER_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "crawl_frontier.sqlite3"
+)
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+
+
+def canonicalize_url(url):
+    """Same page ke alag-alag URL roop (case, port, fragment, params order) ko ek banata hai."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+
+    # "/a/./b/../c" -> "/a/c"
+    segments = []
+    for segment in parts.path.split("/"):
+        if segment == "..":
+            if len(segments) > 1:
+                segments.pop()
+        elif segment != ".":
+            segments.append(segment)
+    path = "/".join(segments) or "/"
+    if not path.startswith("/"):
+        path = "/" + path
+
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def default_extract_links(soup, base_url):
+    links = []
+    for a_tag in soup.find_all("a", href=True):
+        links.append((urljoin(base_url, a_tag["href"]), a_tag.get_text(strip=True)))
+    return links
+
+
+class Frontier:
+    """
+    SQLite-backed crawl frontier. Crash/restart ke baad pending URLs wahin se resume
+    hote hain; ETag/Last-Modified bhi yahin rehte hain conditional GET ke liye.
+
+    Validators pehle `pending_*` me rakhe ja sakte hain (hold_validators) aur upload ke baad hi
+    asli columns me jaate hain (commit_validators): beech me fail hua page agle run me 304 nahi dega.
+    """
+
+    def __init__(self, path=None):
+        path = path or os.getenv("CRAWL_FRONTIER_PATH", DEFAULT_FRONTIER_PATH)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS urls (
+                    url TEXT PRIMARY KEY,
+                    depth INTEGER NOT NULL,
+                    title TEXT,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS urls_by_status ON urls (status, depth)")
+            # Purani frontier files me ye columns nahi the
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(urls)")}
+            for column in ("pending_etag", "pending_last_modified"):
+                if column not in columns:
+                    self._db.execute(f"ALTER TABLE urls ADD COLUMN {column} TEXT")
+
+    def start_run(self, resume=False):
+        """Naya run: purane done/failed pages dobara (conditional GET se) check honge."""
+        if resume:
+            return
+        with self._lock, self._db:
+            self._db.execute("UPDATE urls SET status = 'pending', pending_etag = NULL, pending_last_modified = NULL "
+                             "WHERE status IN ('done', 'failed', 'unchanged')")
+
+    def add(self, url, depth, title=""):
+        with self._lock, self._db:
+            cur = self._db.execute(
+                "INSERT OR IGNORE INTO urls (url, depth, title) VALUES (?, ?, ?)", (url, depth, title)
+            )
+            return cur.rowcount > 0
+
+    def pending(self, limit):
+        with self._lock:
+            return self._db.execute(
+                "SELECT url, depth, title FROM urls WHERE status = 'pending' ORDER BY depth, rowid LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+    def validators(self, url):
+        with self._lock:
+            row = self._db.execute("SELECT etag, last_modified FROM urls WHERE url = ?", (url,)).fetchone()
+        return row or (None, None)
+
+    def mark(self, url, status, etag=None, last_modified=None):
+        with self._lock, self._db:
+            if etag or last_modified:
+                self._db.execute(
+                    "UPDATE urls SET status = ?, etag = ?, last_modified = ?, fetched_at = ? WHERE url = ?",
+                    (status, etag, last_modified, time.time(), url),
+                )
+            else:
+                self._db.execute(
+                    "UPDATE urls SET status = ?, fetched_at = ? WHERE url = ?", (status, time.time(), url)
+                )
+
+    def hold_validators(self, url, etag, last_modified):
+        """Naye validators yaad rakho par conditional GET me abhi purane hi jayenge."""
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE urls SET pending_etag = ?, pending_last_modified = ? WHERE url = ?",
+                (etag, last_modified, url),
+            )
+
+    def commit_validators(self, url):
+        """Page ka content store ho gaya: held validators ab agle run ke conditional GET me."""
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE urls SET etag = pending_etag, last_modified = pending_last_modified, "
+                "pending_etag = NULL, pending_last_modified = NULL "
+                "WHERE url = ? AND (pending_etag IS NOT NULL OR pending_last_modified IS NOT NULL)",
+                (url,),
+            )
+
+    def urls(self, min_depth=0):
+        with self._lock:
+            return self._db.execute(
+                "SELECT url, title FROM urls WHERE depth >= ?", (min_depth,)
+            ).fetchall()
+
+
+class Crawler:
+    """
+    Thread-pool crawler:
+    - per-host concurrency limit + per-host delay (global sleep ki jagah)
+    - har worker thread ka apna keep-alive requests.Session
+    - ETag/Last-Modified se conditional GET (304 => page unchanged)
+    - robots.txt respect, depth limit, persistent frontier
+
+    on_page(url, depth, title, soup) -> True agar page kaam ka tha (max_pages me count hota hai).
+    on_unchanged(url, depth, title) 304 pages ke liye call hota hai.
+    defer_validators=True: kaam ke pages ke ETag/Last-Modified sirf hold hote hain; caller content
+    store hone ke baad frontier.commit_validators(url) kare (warna fail hua upload 304 ke peeche chhup jaata).
+    """
+
+    def __init__(self, frontier, on_page, on_unchanged=None, extract_links=default_extract_links,
+                 link_filter=None, max_depth=1, max_pages=200, max_workers=8, per_host_concurrency=2,
+                 per_host_delay=1.0, timeout=20, headers=None, verify=True, respect_robots=True,
+                 defer_validators=False):
+        self.frontier = frontier
+        self.on_page = on_page
+        self.on_unchanged = on_unchanged
+        self.extract_links = extract_links
+        self.link_filter = link_filter or (lambda url, title: True)
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_workers = max_workers
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_delay = per_host_delay
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.verify = verify
+        self.respect_robots = respect_robots
+        self.defer_validators = defer_validators
+        self._local = threading.local()
+        self._robots = {}
+        self._robots_lock = threading.Lock()
+        self._next_slot = {}  # host -> earliest next request time
+        self._in_flight = {}  # host -> active requests
+        self.stats = {"fetched": 0, "not_modified": 0, "failed": 0, "blocked": 0, "useful": 0, "bytes": 0}
+
+    # --- HTTP ---
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=self.per_host_concurrency)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(self.headers)
+            self._local.session = session
+        return session
+
+    def _allowed_by_robots(self, url):
+        if not self.respect_robots:
+            return True
+        parts = urlsplit(url)
+        root = f"{parts.scheme}://{parts.netloc}"
+        with self._robots_lock:
+            parser = self._robots.get(root)
+        if parser is None:
+            parser = robotparser.RobotFileParser()
+            try:
+                res = self._session().get(root + "/robots.txt", timeout=self.timeout, verify=self.verify)
+                parser.parse(res.text.splitlines() if res.status_code == 200 else [])
+            except Exception:
+                parser.parse([])
+            with self._robots_lock:
+                self._robots[root] = parser
+        return parser.can_fetch(self.headers.get("User-Agent", "*"), url)
+
+    def _fetch(self, url, not_before):
+        """Worker thread: host slot ka wait, conditional GET, HTML parse."""
+        delay = not_before - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        if not self._allowed_by_robots(url):
+            return "blocked", None, None
+        etag, last_modified = self.frontier.validators(url)
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        response = self._session().get(url, headers=headers, timeout=self.timeout, verify=self.verify)
+        if response.status_code == 304:
+            return "not_modified", None, None
+        if response.status_code != 200:
+            return "failed", None, None
+        soup = parse_html(response.content)
+        return "ok", soup, (response.headers.get("ETag"), response.headers.get("Last-Modified"), len(response.content))
+
+    # --- SCHEDULER ---
+    def _reserve_slot(self, host):
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.per_host_delay
+        self._in_flight[host] = self._in_flight.get(host, 0) + 1
+        return slot
+
+    def seed(self, url, title=""):
+        self.frontier.add(canonicalize_url(url), 0, title)
+
+    def run(self):
+        started = time.perf_counter()
+        buffer = deque()
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crawler") as pool:
+            while True:
+                if self.stats["useful"] < self.max_pages:
+                    if not buffer:
+                        seen = {p[0] for p in pending.values()}
+                        buffer.extend(r for r in self.frontier.pending(self.max_workers * 4) if r[0] not in seen)
+                    # Jin hosts ke paas capacity hai unke URLs submit karo
+                    deferred = deque()
+                    while buffer and len(pending) < self.max_workers:
+                        url, depth, title = buffer.popleft()
+                        host = urlsplit(url).netloc
+                        if self._in_flight.get(host, 0) >= self.per_host_concurrency:
+                            deferred.append((url, depth, title))
+                            continue
+                        future = pool.submit(self._fetch, url, self._reserve_slot(host))
+                        pending[future] = (url, depth, title, host)
+                    buffer.extendleft(reversed(deferred))
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, depth, title, host = pending.pop(future)
+                    self._in_flight[host] -= 1
+                    self._handle(future, url, depth, title)
+
+        elapsed = time.perf_counter() - started
+        self.stats["elapsed_seconds"] = round(elapsed, 2)
+        self.stats["pages_per_second"] = round((self.stats["fetched"] + self.stats["not_modified"]) / elapsed, 2) if elapsed else 0.0
+        print(f"🕸️ Crawl stats: {self.stats}")
+        return self.stats
+
+    def _handle(self, future, url, depth, title):
+        try:
+            status, soup, validators = future.result()
+        except Exception as e:
+            print(f"   ⚠️ Error fetching {url}: {e}")
+            status, soup, validators = "failed", None, None
+
+        if status == "blocked":
+            self.stats["blocked"] += 1
+            self.frontier.mark(url, "blocked")
+            return
+        if status == "failed":
+            self.stats["failed"] += 1
+            self.frontier.mark(url, "failed")
+            return
+        if status == "not_modified":
+            self.stats["not_modified"] += 1
+            self.frontier.mark(url, "unchanged")
+            if self.on_unchanged:
+                self.on_unchanged(url, depth, title)
+            return
+
+        etag, last_modified, size = validators
+        self.stats["fetched"] += 1
+        self.stats["bytes"] += size
+        if depth < self.max_depth:
+            for link, link_title in self.extract_links(soup, url):
+                link = canonicalize_url(link)
+                if link != url and link.startswith("http") and self.link_filter(link, link_title):
+                    self.frontier.add(link, depth + 1, link_title)
+        try:
+            useful = self.on_page(url, depth, title, soup)
+        except Exception as e:
+            # Page process nahi hua: validators mat rakho, agla run poora GET kare
+            print(f"   ⚠️ Error processing {url}: {e}")
+            self.frontier.mark(url, "done")
+            return
+        if useful:
+            self.stats["useful"] += 1
+        if useful and self.defer_validators:
+            self.frontier.hold_validators(url, etag, last_modified)
+            self.frontier.mark(url, "done")
+        else:
+            self.frontier.mark(url, "done", etag=etag, last_modified=last_modified)
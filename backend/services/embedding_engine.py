@@ -0,0 +1,162 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# --- CONFIGURATION ---
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+INGEST_EMBED_WORKERS = int(os.getenv("INGEST_EMBED_WORKERS", str(os.cpu_count() or 1)))
+# Ek batch me (longest text ka length x batch size) itne approx tokens tak
+INGEST_EMBED_BATCH_TOKENS = int(os.getenv("INGEST_EMBED_BATCH_TOKENS", "16384"))
+INGEST_EMBED_MAX_BATCH = int(os.getenv("INGEST_EMBED_MAX_BATCH", "128"))
+INGEST_EMBED_PRECISION = os.getenv("INGEST_EMBED_PRECISION", "float32")  # float32 | float16 | int8
+CHARS_PER_TOKEN = 4  # MiniLM tokenizer ke liye mota andaza
+
+# --- WORKER PROCESS STATE ---
+_worker_model = None
+
+
+def _init_worker(model_name):
+    """Har worker process me model sirf ek baar load hota hai."""
+    global _worker_model
+    try:
+        import torch
+        torch.set_num_threads(1)  # N processes x N threads = oversubscription
+    except ImportError:
+        pass
+    from langchain_huggingface import HuggingFaceEmbeddings
+    _worker_model = HuggingFaceEmbeddings(model_name=model_name)
+
+
+def _embed_batch(texts):
+    return np.asarray(_worker_model.embed_documents(texts), dtype=np.float32)
+
+
+def length_buckets(texts, max_batch=INGEST_EMBED_MAX_BATCH, max_tokens=INGEST_EMBED_BATCH_TOKENS):
+    """
+    Texts ko length ke hisab se sort karke batches banata hai, taaki ek batch me
+    padding kam ho: batch ka cost ~ (sabse lamba text) x (batch size).
+    Returns list of index-lists (original order me wapas jodne ke liye).
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    batches, current, longest = [], [], 0
+    for i in order:
+        length = max(1, len(texts[i]) // CHARS_PER_TOKEN)
+        longest_if_added = max(longest, length)
+        if current and (len(current) >= max_batch or longest_if_added * (len(current) + 1) > max_tokens):
+            batches.append(current)
+            current, longest_if_added = [], length
+        current.append(i)
+        longest = longest_if_added
+    if current:
+        batches.append(current)
+    return batches
+
+
+def quantize(matrix, precision=INGEST_EMBED_PRECISION):
+    """Storage ke liye reduced precision. int8 me har row ka apna scale hota hai."""
+    if precision == "float16":
+        return matrix.astype(np.float16), None
+    if precision == "int8":
+        scales = np.abs(matrix).max(axis=1, keepdims=True) / 127.0
+        scales[scales == 0] = 1.0
+        return np.round(matrix / scales).astype(np.int8), scales.astype(np.float32)
+    return matrix.astype(np.float32), None
+
+
+def dequantize(array, scales=None):
+    if scales is not None:
+        return array.astype(np.float32) * scales
+    return array.astype(np.float32)
+
+
+class EmbeddingEngine(Embeddings):
+    """
+    Bulk ingestion ke liye local embeddings:
+    - length-bucketed dynamic batches
+    - ProcessPool jisme har worker apna model rakhta hai (saare cores busy)
+    - optional float16/int8 output
+
+    LangChain `Embeddings` interface hai, isliye SupabaseVectorStore / pipeline me seedha lagta hai.
+    """
+
+    def __init__(self, model_name=EMBEDDING_MODEL, workers=INGEST_EMBED_WORKERS,
+                 max_batch=INGEST_EMBED_MAX_BATCH, max_tokens=INGEST_EMBED_BATCH_TOKENS,
+                 precision=INGEST_EMBED_PRECISION):
+        self.model_name = model_name
+        self.workers = max(1, workers)
+        self.max_batch = max_batch
+        self.max_tokens = max_tokens
+        self.precision = precision
+        self._local_model = None
+        self._lock = threading.Lock()
+        # Pool abhi bana lo (pipeline threads start hone se pehle fork hona safe hai)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(model_name,)
+        ) if self.workers > 1 else None
+
+    def _run_batches(self, texts, batches):
+        if self._pool is not None:
+            futures = [self._pool.submit(_embed_batch, [texts[i] for i in batch]) for batch in batches]
+            return [f.result() for f in futures]
+        with self._lock:
+            if self._local_model is None:
+                from langchain_huggingface import HuggingFaceEmbeddings
+                self._local_model = HuggingFaceEmbeddings(model_name=self.model_name)
+            model = self._local_model
+        return [np.asarray(model.embed_documents([texts[i] for i in batch]), dtype=np.float32) for batch in batches]
+
+    def encode(self, texts):
+        """float32 matrix (len(texts) x dim), input order me."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        batches = length_buckets(texts, self.max_batch, self.max_tokens)
+        results = self._run_batches(texts, batches)
+        matrix = np.empty((len(texts), results[0].shape[1]), dtype=np.float32)
+        for batch, vectors in zip(batches, results):
+            matrix[batch] = vectors
+        return matrix
+
+    def encode_quantized(self, texts):
+        return quantize(self.encode(texts), self.precision)
+
+    def embed_documents(self, texts):
+        array, scales = self.encode_quantized(list(texts))
+        # pgvector column float32 hai: stored precision ke barabar round karke bhejo
+        return dequantize(array, scales).tolist()
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+
+
+class VectorUpserter:
+    """
+    Precomputed vectors ko seedha `documents` table me bulk upsert karta hai
+    (embedding aur upload alag). SupabaseVectorStore.add_vectors jaisa interface,
+    par vectors compact text format me jaate hain taaki payload chhota rahe.
+    """
+
+    def __init__(self, client, table="documents", batch_size=500, precision=INGEST_EMBED_PRECISION):
+        self.client = client
+        self.table = table
+        self.batch_size = batch_size
+        # float16 ~ 3-4 significant digits; usse zyada digits bhejna bekaar hai
+        self.digits = 4 if precision in ("float16", "int8") else 7
+
+    def _format(self, vector):
+        return "[" + ",".join(f"{x:.{self.digits}g}" for x in vector) + "]"
+
+    def add_vectors(self, vectors, documents, ids):
+        rows = [
+            {"id": cid, "content": doc.page_content, "metadata": doc.metadata, "embedding": self._format(vec)}
+            for cid, doc, vec in zip(ids, documents, vectors)
+        ]
+        for i in range(0, len(rows), self.batch_size):
+            self.client.table(self.table).upsert(rows[i:i + self.batch_size]).execute()
+        return list(ids)
@@ -0,0 +1,204 @@
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# --- CONFIGURATION ---
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "50"))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "200"))
+HISTORY_CACHE_USERS = int(os.getenv("HISTORY_CACHE_USERS", "1024"))
+# Sidebar ko bas yahi chahiye (select("*") nahi)
+HISTORY_COLUMNS = "id, title, created_at"
+# ETag me time bucket: /chat ke bahar hue writes (dusra host, SQL console) bhi itne seconds me dikh jaate hain
+HISTORY_ETAG_TTL = int(os.getenv("HISTORY_ETAG_TTL", "300"))
+HISTORY_VERSIONS_PATH = os.getenv(
+    "HISTORY_VERSIONS_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "history_versions.sqlite3"),
+)
+
+
+def encode_cursor(row):
+    raw = json.dumps([row["created_at"], row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Returns (created_at, id). Kharab cursor pe ValueError. id: UUID (purane messages ka bigint ho sakta hai)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("invalid cursor")
+    if not isinstance(created_at, str) or isinstance(row_id, bool) or not isinstance(row_id, (str, int)):
+        raise ValueError("invalid cursor")
+    return created_at, row_id
+
+
+def keyset_filter(key, newer):
+    """
+    PostgREST or_ filter: (created_at, id) `key` se strictly baad (newer) ya pehle. Sirf created_at
+    pe gt/lt kaafi nahi: ek statement me insert hue rows ka same now() hota hai, boundary pe row chhoot jaata.
+    """
+    created_at, row_id = key
+    op = "gt" if newer else "lt"
+    return f'created_at.{op}."{created_at}",and(created_at.eq."{created_at}",id.{op}."{row_id}")'
+
+
+def fetch_history_page(client, user_id, cursor=None, limit=HISTORY_PAGE_SIZE):
+    """
+    Keyset pagination (created_at DESC, id DESC): OFFSET ki tarah purane rows scan nahi hote,
+    har page ka cost history ki length se independent. Returns (rows, next_cursor).
+    limit=None: poori list (bina pagination wale clients), next_cursor None.
+    """
+    query = client.table("conversations")\
+        .select(HISTORY_COLUMNS)\
+        .eq("user_id", user_id)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.or_(keyset_filter((created_at, row_id), newer=False))
+    query = query\
+        .order("created_at", desc=True)\
+        .order("id", desc=True)
+    if limit is None:
+        return query.execute().data or [], None
+    # Ek extra row: pata chal jaata hai ki agla page hai ya nahi
+    rows = query.limit(limit + 1).execute().data or []
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+class VersionCounter:
+    """
+    Per-key version counter (user ki history, conversation ke messages), SQLite file me
+    taaki ek host ke saare gunicorn workers same ETag / cache validity dekhein.
+    `epoch`: file banne pe ek random id. Redeploy / ephemeral disk pe counters 0 se shuru hote
+    hain; epoch badalne se purane "h3-..." ETags dobara match nahi hote.
+    """
+
+    def __init__(self, path=HISTORY_VERSIONS_PATH, table="versions"):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.table = table
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            # Pehla worker likhta hai, baaki wahi padhte hain (same host = same epoch)
+            self._db.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', ?)", (uuid.uuid4().hex[:8],))
+            self.epoch = self._db.execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()[0]
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute(f"SELECT version FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, keys):
+        """Returns {key: new_version}."""
+        keys = list(set(keys))
+        with self._lock, self._db:
+            self._db.executemany(
+                f"INSERT INTO {self.table} (key, version) VALUES (?, 1) "
+                "ON CONFLICT(key) DO UPDATE SET version = version + 1",
+                [(key,) for key in keys],
+            )
+            return {key: self._db.execute(f"SELECT version FROM {self.table} WHERE key = ?", (key,)).fetchone()[0]
+                    for key in keys}
+
+
+class HistoryCache:
+    """Chhota per-user LRU: user -> (version, {(cursor, limit): (rows, next_cursor)})."""
+
+    def __init__(self, max_users=HISTORY_CACHE_USERS):
+        self.max_users = max_users
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id, version, cursor, limit):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and entry[0] == version:
+                page = entry[1].get((cursor, limit))
+                if page is not None:
+                    self._users.move_to_end(user_id)
+                    self.hits += 1
+                    return page
+            self.misses += 1
+            return None
+
+    def put(self, user_id, version, cursor, limit, page):
+        if self.max_users <= 0:
+            return
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None or entry[0] != version:
+                entry = self._users[user_id] = (version, {})
+            entry[1][(cursor, limit)] = page
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"users": len(self._users), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": round(self.hits / total, 4) if total else 0.0}
+
+
+class HistoryService:
+    """
+    /history ke liye: version counter se ETag (304 me DB touch nahi hota), phir
+    response cache, phir keyset query. `on_write` WriteBehindQueue ka listener hai.
+    """
+
+    def __init__(self, client, versions=None, cache=None, etag_ttl=HISTORY_ETAG_TTL):
+        self.client = client
+        self.versions = versions or VersionCounter()
+        self.cache = cache or HistoryCache()
+        self.etag_ttl = etag_ttl
+        self.not_modified = 0
+        self._lock = threading.Lock()  # Request threads ek saath count badhate hain
+
+    def etag(self, user_id, cursor, limit):
+        """
+        Version counter sirf is host ke /chat writes dekhta hai: epoch (counter reset) aur time
+        bucket (bahar ke writes) ETag me, taaki purana ETag hamesha ke liye 304 na deta rahe.
+        """
+        version = self.versions.get(user_id)
+        bucket = int(time.time() // self.etag_ttl) if self.etag_ttl > 0 else 0
+        digest = hashlib.sha1(f"{user_id}|{cursor}|{limit}|{bucket}".encode("utf-8")).hexdigest()[:12]
+        # Response cache bhi isi (version, bucket) pe: bucket badle to DB se taaza page
+        return (version, bucket), f"h{self.versions.epoch}.{version}-{digest}"
+
+    def page(self, user_id, version, cursor=None, limit=HISTORY_PAGE_SIZE):
+        page = self.cache.get(user_id, version, cursor, limit)
+        if page is None:
+            page = fetch_history_page(self.client, user_id, cursor=cursor, limit=limit)
+            self.cache.put(user_id, version, cursor, limit, page)
+        return page
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def on_write(self, batch):
+        # Naya conversation DB me aa gaya: us user ke saare cached pages/ETags purane
+        user_ids = {row.get("user_id") for row in batch.get("conversations", ()) if row.get("user_id")}
+        if user_ids:
+            self.versions.bump(user_ids)
+            for user_id in user_ids:
+                self.cache.invalidate(user_id)
+
+    def stats(self):
+        return {"not_modified": self.not_modified, **self.cache.stats()}
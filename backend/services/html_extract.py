@@ -0,0 +1,246 @@
+"""
+HTML -> saaf, structure wala text (teeno ingest scripts + crawler ke liye ek jagah).
+
+Pehle `soup.find('body').get_text()` + clean_text se menu, footer, "Skip to main content",
+language switchers sab chunks ban jaate the. Ab:
+  1. Fast parser (lxml installed ho to, warna html.parser)
+  2. Scripts/styles, <nav>/<aside>, page header/footer, menu/breadcrumb/social jaise class/id
+     wale blocks aur link-heavy lists (bina <nav> ke menus, gov portals pe aam) hatao
+  3. Main content: <main>/role=main/akela <article>, warna body se neeche utro jab tak ek hi
+     child me zyada tar (non-link) text ho
+  4. Headings, paragraphs aur tables "\\n\\n" blocks, list items/table rows alag lines:
+     splitter ke "\\n\\n" boundaries ab asli sections pe padte hain
+"""
+import os
+import re
+import threading
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.element import CData, Comment, Declaration, Doctype, ProcessingInstruction
+
+try:
+    import lxml  # Optional: pip install lxml (html.parser se kai guna tez)
+except ImportError:
+    lxml = None
+
+# --- CONFIGURATION ---
+HTML_PARSER = os.getenv("HTML_PARSER", "lxml" if lxml is not None else "html.parser")
+# Is se zyada hissa links ka text ho to block menu/link list hai, content nahi
+LINK_DENSITY_LIMIT = 0.6
+# Child me node ke non-link text ka itna hissa ho (aur kul text ka aadha) to main content usi ke andar hai
+MAIN_CONTENT_SHARE = 0.75
+# Link lists isse zyada content ho to page khud link list hai (A-Z scheme index): mat hatao
+LINK_LISTS_MAX_SHARE = 0.5
+
+JUNK_TAGS = ["script", "style", "noscript", "template", "svg", "canvas", "iframe", "object", "embed",
+             "button", "select", "input", "textarea", "nav", "aside", "dialog"]
+BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "search", "menu", "menubar", "complementary"}
+# class/id ke words (header nahi: "page-header" me aksar scheme ka title hota hai)
+BOILERPLATE = re.compile(
+    r"(?:^|[-_\s])(?:nav|navbar|navigation|menu|menubar|mainmenu|submenu|footer|breadcrumbs?|sidebar|"
+    r"side-?nav|cookie|social|share|sharing|skip|skiplink|login|search|searchbox|widget|advert|ads|"
+    r"modal|popup|topbar|top-?header|copyright|accessibility|screen-?reader|language|gigw|"
+    r"visitor|counter|marquee|ticker)(?:[-_\s]|$)", re.I)
+CONTENT_ROOTS = ["main", "article"]
+HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "header", "footer", "blockquote", "pre", "form",
+              "fieldset", "table", "ul", "ol", "dl", "figure", "figcaption",
+              "address", "center", "details", "summary", "caption"}
+LINE_TAGS = {"li", "tr", "dt", "dd", "br", "hr"}
+CELL_TAGS = {"td", "th"}
+LINK_LIST_TAGS = {"ul", "ol", "div", "table", "td", "p"}
+_SKIP_STRINGS = (Comment, Declaration, Doctype, CData, ProcessingInstruction)
+_BLOCK = "\x1e"  # Block boundary, render ke baad "\n\n" (lines ke "\n" se alag)
+_CELL = "\x1f"  # Table cells ka separator, render ke baad " | "
+_INLINE_SPACES = re.compile(r"[^\S\n]+")
+
+
+def parse_html(content):
+    """Bytes/str -> BeautifulSoup, configured fast parser se."""
+    return BeautifulSoup(content, HTML_PARSER)
+
+
+def flat_text(soup):
+    """Purana tareeka (body.get_text + whitespace collapse): sirf before/after report ke liye."""
+    body = soup.find("body")
+    return re.sub(r"\s+", " ", (body or soup).get_text()).strip()
+
+
+def _measure(node, sizes):
+    """Har tag ka (text chars, link text chars, links) ek hi bottom-up pass me: sizes[id(tag)]."""
+    text = links = count = 0
+    for child in node.children:
+        if isinstance(child, Tag):
+            child_text, child_links, child_count = _measure(child, sizes)
+            text, links, count = text + child_text, links + child_links, count + child_count
+        elif not isinstance(child, _SKIP_STRINGS):
+            text += len(child.strip())
+    if node.name == "a":
+        links, count = text, count + 1
+    sizes[id(node)] = (text, links, count)
+    return text, links, count
+
+
+def _inside_content(tag):
+    return any(parent.name in CONTENT_ROOTS or parent.get("role") == "main" for parent in tag.parents)
+
+
+def _holds_content(tag):
+    return tag.name in CONTENT_ROOTS or tag.get("role") == "main" or \
+        tag.find(CONTENT_ROOTS) is not None or tag.find(attrs={"role": "main"}) is not None
+
+
+def _is_boilerplate(tag):
+    if tag.name in JUNK_TAGS:
+        return True
+    if tag.name in ("body", "html"):
+        return False
+    classes = tag.get("class") or []
+    names = " ".join([*(classes if isinstance(classes, list) else [classes]), tag.get("id") or ""])
+    matched = (tag.get("role") in BOILERPLATE_ROLES or
+               (tag.name in ("header", "footer") and not _inside_content(tag)) or
+               (bool(names.strip()) and BOILERPLATE.search(names) is not None))
+    # Galat naam wala wrapper (e.g. id="nav-wrapper" me <main>) content samet na ude
+    return matched and not _holds_content(tag)
+
+
+def remove_boilerplate(node):
+    """Top-down: boilerplate tag poora subtree samet hatta hai, baaki me neeche jao."""
+    for child in list(node.children):
+        if isinstance(child, Tag):
+            if _is_boilerplate(child):
+                child.decompose()
+            else:
+                remove_boilerplate(child)
+
+
+def _link_lists(node, sizes, found):
+    for child in node.children:
+        if not isinstance(child, Tag):
+            continue
+        text, links, count = sizes[id(child)]
+        if child.name in LINK_LIST_TAGS and count >= 3 and text and links / text > LINK_DENSITY_LIMIT:
+            found.append(child)  # Bahar wala block mila, andar wale alag se nahi
+        else:
+            _link_lists(child, sizes, found)
+    return found
+
+
+def drop_link_lists(root):
+    """Bina <nav> ke menus (ul/ol/div jo zyada tar links hain), jab tak wahi page ka content na hon."""
+    sizes = {}
+    total = _measure(root, sizes)[0]
+    blocks = _link_lists(root, sizes, [])
+    if not blocks or sum(sizes[id(block)][0] for block in blocks) > LINK_LISTS_MAX_SHARE * total:
+        return
+    for block in blocks:
+        block.decompose()
+
+
+def find_main_content(soup):
+    """Explicit <main>/role=main/akela <article>; warna body se us child me utro jisme zyada text ho."""
+    explicit = soup.find_all("main") + soup.find_all(attrs={"role": "main"})
+    if not explicit:
+        articles = soup.find_all("article")
+        explicit = articles if len(articles) == 1 else []
+    if explicit:
+        return max(explicit, key=lambda tag: len(tag.get_text(" ", strip=True)))
+
+    node = soup.find("body") or soup
+    sizes = {}
+    _measure(node, sizes)
+    weight = lambda tag: sizes[id(tag)][0] - sizes[id(tag)][1]  # Non-link text
+    while True:
+        children = [child for child in node.children if isinstance(child, Tag) and child.name not in LINE_TAGS]
+        best = max(children, key=weight, default=None)
+        if best is None or weight(node) <= 0 or weight(best) < MAIN_CONTENT_SHARE * weight(node) \
+                or sizes[id(best)][0] < 0.5 * sizes[id(node)][0]:
+            return node
+        # Page ka <h1> (scheme ka naam) content ka hissa hai: usse neeche mat utro
+        if node.find("h1") is not None and best.find("h1") is None:
+            return node
+        node = best
+
+
+def _render(node, out):
+    for child in node.children:
+        if isinstance(child, NavigableString):
+            if not isinstance(child, _SKIP_STRINGS):
+                out.append(str(child).replace("\n", " "))
+            continue
+        name = child.name
+        if name in HEADINGS or name in BLOCK_TAGS:
+            out.append(_BLOCK)
+            _render(child, out)
+            out.append(_BLOCK)
+        elif name in LINE_TAGS:
+            out.append("\n")
+            _render(child, out)
+            out.append("\n")
+        elif name in CELL_TAGS:
+            _render(child, out)
+            out.append(_CELL)
+        else:
+            _render(child, out)
+
+
+def render_text(node):
+    """Block structure ke saath text: blocks ke beech "\\n\\n", list items/rows ke beech "\\n"."""
+    out = []
+    _render(node, out)
+    blocks = []
+    for block in "".join(out).split(_BLOCK):
+        lines = []
+        for line in block.split("\n"):
+            cells = [_INLINE_SPACES.sub(" ", cell).strip() for cell in line.split(_CELL)]
+            line = " | ".join(cell for cell in cells if cell)
+            if line:
+                lines.append(line)
+        if lines:
+            blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+def extract_main_text(content):
+    """HTML (bytes/str/soup) -> main content ka structured text. Soup diya ho to wo badal jaata hai."""
+    soup = content if isinstance(content, BeautifulSoup) else parse_html(content)
+    remove_boilerplate(soup)
+    root = find_main_content(soup)
+    drop_link_lists(root)
+    return render_text(root)
+
+
+class ExtractionReport:
+    """Har page ke chunks: purane flat text se kitne bante, ab kitne. Ingest ke end me summary."""
+
+    def __init__(self, text_splitter):
+        self.text_splitter = text_splitter
+        self.pages = []
+        self._lock = threading.Lock()
+
+    def record(self, source, before_text, after_text):
+        before = len(self.text_splitter.split_text(before_text)) if before_text else 0
+        after = len(self.text_splitter.split_text(after_text)) if after_text else 0
+        with self._lock:
+            self.pages.append({"source": source, "before_chunks": before, "after_chunks": after,
+                               "before_chars": len(before_text or ""), "after_chars": len(after_text or "")})
+        return before, after
+
+    def summary(self):
+        with self._lock:
+            before = sum(page["before_chunks"] for page in self.pages)
+            after = sum(page["after_chunks"] for page in self.pages)
+            return {"pages": len(self.pages), "before_chunks": before, "after_chunks": after,
+                    "saved": round(1 - after / before, 3) if before else 0.0}
+
+    def print_report(self):
+        with self._lock:
+            pages = sorted(self.pages, key=lambda page: page["source"])
+        if not pages:
+            return
+        print("🧾 HTML extraction (chunks before -> after):")
+        for page in pages:
+            print(f"   {page['before_chunks']:4d} -> {page['after_chunks']:4d}  {page['source']}")
+        summary = self.summary()
+        print(f"   total {summary['before_chunks']} -> {summary['after_chunks']} chunks "
+              f"({summary['saved']:.0%} fewer to embed/store)")
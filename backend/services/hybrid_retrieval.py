@@ -0,0 +1,303 @@
+import json
+import math
+import os
+import re
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from services.corpus_version import get_corpus_version
+from services.partitions import PartitionCodes
+
+# --- CONFIGURATION ---
+KEYWORD_INDEX_PATH = os.getenv(
+    "KEYWORD_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "keyword_index.json"),
+)
+KEYWORD_INDEX_MAX_AGE = float(os.getenv("KEYWORD_INDEX_MAX_AGE", "3600"))  # Seconds
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))  # Har retriever se itne candidates
+HYBRID_MAX_CHUNKS = int(os.getenv("HYBRID_MAX_CHUNKS", "6"))
+HYBRID_MIN_CHUNKS = int(os.getenv("HYBRID_MIN_CHUNKS", "1"))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+# Adaptive cutoff: chunk tabhi rakho jab kam se kam ek signal top result ke kareeb ho
+HYBRID_SIMILARITY_MARGIN = float(os.getenv("HYBRID_SIMILARITY_MARGIN", "0.15"))
+HYBRID_BM25_RATIO = float(os.getenv("HYBRID_BM25_RATIO", "0.4"))
+BM25_K1 = 1.5
+BM25_B = 0.75
+PAGE_SIZE = 1000
+
+TOKEN_RE = re.compile(r"[0-9a-z\u0900-\u097f]+")
+# English + Hinglish filler words; scheme names jaise "pm", "yojana" rakhe hain
+STOPWORDS = frozenset("""
+a an the is are was were be been of in on at to for from by with and or not what which who whom how
+when where why do does did can could should i me my we our you your it its this that these those
+about any all as if into than then there their them they he she his her also will would
+kya hai hain ka ke ki ko se me mein main mujhe hum tum aap kaise kab kaun kitna kitne kitni
+liye karna karne karu chahiye bare baare batao bataiye ye yeh wo woh aur ya par bhi tak
+""".split())
+
+
+def tokenize(text):
+    """Lowercase word tokens (Latin + Devanagari), stopwords hata ke."""
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    `documents` table ke chunks ka in-memory inverted index (Okapi BM25).
+    "MYSY", "Sukanya Samriddhi" jaise exact scheme names yahan seedhe match hote hain,
+    jo MiniLM embedding me aksar dhundle pad jaate hain.
+    """
+
+    def __init__(self, ids, contents, metadatas, version=None):
+        self.ids = list(ids)
+        self.contents = list(contents)
+        self.metadatas = list(metadatas)
+        self.version = version
+        self.built_at = time.time()
+
+        postings = {}
+        lengths = np.zeros(len(self.ids), dtype=np.float32)
+        for i, text in enumerate(self.contents):
+            tokens = tokenize(text)
+            lengths[i] = len(tokens)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                postings.setdefault(token, []).append((i, tf))
+
+        n = len(self.ids)
+        self.avg_length = float(lengths.mean()) if n else 0.0
+        # Length normalization pehle se: score = idf * tf * (k1+1) / (tf + norm)
+        self._norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / (self.avg_length or 1.0))
+        self._postings = {}
+        for token, entries in postings.items():
+            docs = np.fromiter((d for d, _ in entries), dtype=np.int64, count=len(entries))
+            tfs = np.fromiter((tf for _, tf in entries), dtype=np.float32, count=len(entries))
+            idf = math.log(1 + (n - len(entries) + 0.5) / (len(entries) + 0.5))
+            self._postings[token] = (docs, tfs, idf)
+        self._partition_codes = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def partition_codes(self):
+        if self._partition_codes is None:
+            self._partition_codes = PartitionCodes(self.metadatas)
+        return self._partition_codes
+
+    @classmethod
+    def from_rows(cls, rows, version=None):
+        rows = [r for r in rows if r.get("content")]
+        return cls([r["id"] for r in rows], [r["content"] for r in rows],
+                   [r.get("metadata") or {} for r in rows], version=version)
+
+    @classmethod
+    def from_supabase(cls, client, version=None, table="documents"):
+        # Embedding column nahi chahiye: payload vector snapshot se kaafi chhota
+        rows, start = [], 0
+        while True:
+            page = client.table(table)\
+                .select("id, content, metadata")\
+                .order("id")\
+                .range(start, start + PAGE_SIZE - 1)\
+                .execute()
+            rows.extend(page.data or [])
+            if not page.data or len(page.data) < PAGE_SIZE:
+                break
+            start += PAGE_SIZE
+        return cls.from_rows(rows, version=version)
+
+    def search(self, query_text, match_count=HYBRID_CANDIDATES, partition=None):
+        """Rows `match_documents` jaise (id/content/metadata) + `bm25` score, best pehle."""
+        if not len(self) or match_count <= 0:
+            return []
+        scores = np.zeros(len(self), dtype=np.float32)
+        for token in set(tokenize(query_text)):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            docs, tfs, idf = posting
+            scores[docs] += idf * tfs * (BM25_K1 + 1) / (tfs + self._norm[docs])
+        if partition is not None:
+            # Dusre partitions ke rows top-k tak pahunchte hi nahi
+            scores[~self.partition_codes.mask(partition)] = 0.0
+
+        k = min(match_count, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [{
+            "id": self.ids[i],
+            "content": self.contents[i],
+            "metadata": self.metadatas[i],
+            "bm25": float(scores[i]),
+        } for i in top]
+
+    # --- PERSISTENCE ---
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Har worker ki apni tmp file: saath me rebuild karne wale ek dusre ka adhoora JSON swap nahi karte
+        tmp_path = f"{path}.tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": self.version, "built_at": self.built_at, "ids": self.ids,
+                           "contents": self.contents, "metadatas": self.metadatas}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(meta["ids"], meta["contents"], meta["metadatas"], version=meta.get("version"))
+        index.built_at = meta.get("built_at", index.built_at)
+        return index
+
+
+class LocalKeywordStore:
+    """
+    LocalVectorStore jaisa wrapper: disk snapshot se start, corpus version badle to
+    background rebuild. Index ready na ho to search() None deta hai (sirf vector search chalega).
+    """
+
+    def __init__(self, client, path=KEYWORD_INDEX_PATH, max_age=KEYWORD_INDEX_MAX_AGE):
+        self.client = client
+        self.path = path
+        self.max_age = max_age
+        self._index = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def _refresh(self, version):
+        try:
+            index = BM25Index.from_supabase(self.client, version=version)
+            print(f"🔤 Keyword index built: {len(index)} chunks")
+            with self._lock:
+                self._index = index
+        except Exception as e:
+            print(f"⚠️ Keyword index refresh failed: {e}")
+            return
+        finally:
+            self._refreshing = False
+        try:
+            # Snapshot sirf agle start ke liye: save fail ho to bhi naya index serve hota rahe
+            index.save(self.path)
+        except Exception as e:
+            print(f"⚠️ Keyword index snapshot not saved: {e}")
+
+    def load_snapshot(self):
+        """Sirf disk snapshot (koi network nahi): warmup ke liye. DB se download pehli search pe."""
+        with self._lock:
+            if self._index is None and os.path.exists(self.path):
+                try:
+                    self._index = BM25Index.load(self.path)
+                    print(f"🔤 Keyword index loaded from disk: {len(self._index)} chunks")
+                except Exception as e:
+                    print(f"⚠️ Keyword index snapshot unreadable: {e}")
+            return self._index
+
+    def ensure_loaded(self):
+        version = get_corpus_version()
+        index = self._index if self._index is not None else self.load_snapshot()
+        stale = index is None or index.version != version or time.time() - index.built_at > self.max_age
+        if stale and not self._refreshing:
+            with self._lock:
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh, args=(version,), daemon=True).start()
+        return index
+
+    def search(self, query_text, match_count=HYBRID_CANDIDATES, partition=None):
+        index = self.ensure_loaded()
+        if index is None:
+            return None
+        return index.search(query_text, match_count=match_count, partition=partition)
+
+
+def reciprocal_rank_fusion(result_lists, k=HYBRID_RRF_K):
+    """
+    Kai ranked lists ko id ke hisab se jodta hai: score = sum(1 / (k + rank)).
+    Har row me dono signals (similarity / bm25) jo mile wo merge ho jaate hain.
+    """
+    fused = {}
+    for results in result_lists:
+        for rank, row in enumerate(results or (), start=1):
+            entry = fused.get(row["id"])
+            if entry is None:
+                entry = fused[row["id"]] = dict(row, rrf_score=0.0)
+            else:
+                entry.update({key: value for key, value in row.items() if key not in entry})
+            entry["rrf_score"] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda row: row["rrf_score"], reverse=True)
+
+
+def adaptive_cutoff(rows, max_chunks=HYBRID_MAX_CHUNKS, min_chunks=HYBRID_MIN_CHUNKS,
+                    similarity_margin=HYBRID_SIMILARITY_MARGIN, bm25_ratio=HYBRID_BM25_RATIO):
+    """
+    Fixed threshold ki jagah query ke best result ke relative cutoff: chunk tabhi rehta hai
+    jab uski vector similarity top se `similarity_margin` ke andar ho ya BM25 score top ka
+    kam se kam `bm25_ratio` ho. Baaki noise prompt tak nahi pahunchta.
+    """
+    top_similarity = max((r["similarity"] for r in rows if "similarity" in r), default=None)
+    top_bm25 = max((r["bm25"] for r in rows if "bm25" in r), default=None)
+    kept = []
+    for row in rows:
+        if len(kept) >= max_chunks:
+            break
+        strong_vector = top_similarity is not None and row.get("similarity", -1.0) >= top_similarity - similarity_margin
+        strong_keyword = top_bm25 is not None and row.get("bm25", 0.0) >= bm25_ratio * top_bm25
+        if strong_vector or strong_keyword or len(kept) < min_chunks:
+            kept.append(row)
+    return kept
+
+
+class HybridRetriever:
+    """
+    Vector (match_documents / local index) + BM25, RRF se fuse, phir adaptive cutoff.
+    `vector_search(query_vector, match_threshold, match_count, partition)` rows ki list deta hai;
+    `partition` (services.partitions.PartitionFilter) dono retrievers ko same subset pe rakhta hai.
+    """
+
+    def __init__(self, vector_search, keyword_store, candidates=HYBRID_CANDIDATES, match_threshold=0.1,
+                 vector_search_batch=None):
+        self.vector_search = vector_search
+        self.vector_search_batch = vector_search_batch
+        self.keyword_store = keyword_store
+        self.candidates = candidates
+        self.match_threshold = match_threshold
+
+    def keyword_search(self, query_text, partition=None):
+        # Query vector ki zaroorat nahi: async path ise embedding ke saath-saath chalata hai
+        if self.keyword_store is None:
+            return None
+        return self.keyword_store.search(query_text, match_count=self.candidates, partition=partition)
+
+    def fuse(self, vector_rows, keyword_rows, max_chunks=HYBRID_MAX_CHUNKS):
+        fused = reciprocal_rank_fusion([vector_rows, keyword_rows])
+        return adaptive_cutoff(fused, max_chunks=max_chunks)
+
+    def retrieve(self, query_text, query_vector, max_chunks=HYBRID_MAX_CHUNKS, partition=None):
+        vector_rows = self.vector_search(query_vector, match_threshold=self.match_threshold,
+                                         match_count=self.candidates, partition=partition)
+        return self.fuse(vector_rows, self.keyword_search(query_text, partition), max_chunks=max_chunks)
+
+    def retrieve_batch(self, query_texts, query_vectors, max_chunks=HYBRID_MAX_CHUNKS, partitions=None):
+        """retrieve() kai queries ke liye: vector side ek batched lookup (BM25 local hai, per query)."""
+        partitions = partitions or [None] * len(query_texts)
+        if self.vector_search_batch is not None:
+            vector_lists = self.vector_search_batch(query_vectors, match_threshold=self.match_threshold,
+                                                    match_count=self.candidates, partitions=partitions)
+        else:
+            vector_lists = [self.vector_search(v, match_threshold=self.match_threshold, match_count=self.candidates,
+                                               partition=p) for v, p in zip(query_vectors, partitions)]
+        return [self.fuse(rows, self.keyword_search(text, partition), max_chunks=max_chunks)
+                for text, rows, partition in zip(query_texts, vector_lists, partitions)]
@@ -0,0 +1,264 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# --- CONFIGURATION ---
+DEFAULT_MANIFEST_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "ingest_manifest.sqlite3"
+)
+# Chunk IDs content se bante hain: same text => same `documents.id`, dobara upload nahi
+CHUNK_NAMESPACE = uuid.UUID("6f1c2a52-93c4-4d0b-9a47-3f0d6b2b8e11")
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id_for(text):
+    return str(uuid.uuid5(CHUNK_NAMESPACE, content_hash(text)))
+
+
+class IngestManifest:
+    """
+    SQLite manifest: har source (URL/PDF/text) ka content hash aur uske chunks.
+    Ek chunk kai sources me ho sakta hai (refcount), isliye DB row tabhi delete
+    hoti hai jab koi bhi source use reference na kare.
+    """
+
+    def __init__(self, path=None):
+        path = path or os.getenv("INGEST_MANIFEST_PATH", DEFAULT_MANIFEST_PATH)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Pipeline stages alag threads se use karte hain (ManifestSync lock rakhta hai)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS sources (
+                source TEXT PRIMARY KEY,
+                scope TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS chunk_refs (
+                source TEXT NOT NULL,
+                chunk_id TEXT NOT NULL,
+                PRIMARY KEY (source, chunk_id)
+            );
+            CREATE INDEX IF NOT EXISTS chunk_refs_by_chunk ON chunk_refs (chunk_id);
+        """)
+
+    def source_hash(self, source):
+        row = self.db.execute("SELECT content_hash FROM sources WHERE source = ?", (source,)).fetchone()
+        return row[0] if row else None
+
+    def sources_in_scope(self, scope):
+        return [r[0] for r in self.db.execute("SELECT source FROM sources WHERE scope = ?", (scope,))]
+
+    def chunk_ids(self, source):
+        return {r[0] for r in self.db.execute("SELECT chunk_id FROM chunk_refs WHERE source = ?", (source,))}
+
+    def is_referenced(self, chunk_id, excluding_source=None):
+        row = self.db.execute(
+            "SELECT 1 FROM chunk_refs WHERE chunk_id = ? AND source IS NOT ? LIMIT 1",
+            (chunk_id, excluding_source),
+        ).fetchone()
+        return row is not None
+
+    def record_source(self, source, scope, source_hash, chunk_ids):
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO sources (source, scope, content_hash, updated_at) VALUES (?, ?, ?, ?)",
+                (source, scope, source_hash, time.time()),
+            )
+            self.db.execute("DELETE FROM chunk_refs WHERE source = ?", (source,))
+            self.db.executemany(
+                "INSERT OR IGNORE INTO chunk_refs (source, chunk_id) VALUES (?, ?)",
+                [(source, cid) for cid in chunk_ids],
+            )
+
+    def forget_source(self, source):
+        with self.db:
+            self.db.execute("DELETE FROM sources WHERE source = ?", (source,))
+            self.db.execute("DELETE FROM chunk_refs WHERE source = ?", (source,))
+
+
+def _delete_rows(client, ids, table="documents", batch_size=100):
+    ids = list(ids)
+    for i in range(0, len(ids), batch_size):
+        client.table(table).delete().in_("id", ids[i:i + batch_size]).execute()
+
+
+class SourcePlan:
+    """Ek source ke liye kya upload/delete karna hai (embedding se pehle hi tay)."""
+
+    def __init__(self, source, source_hash, first_time, new_docs, new_ids, chunk_ids, old_ids):
+        self.source = source
+        self.source_hash = source_hash
+        self.first_time = first_time
+        self.new_docs = new_docs
+        self.new_ids = new_ids
+        self.chunk_ids = chunk_ids
+        self.old_ids = old_ids
+
+
+class ManifestSync:
+    """
+    Source-by-source sync, taaki streaming pipeline har source ko alag se
+    plan -> (embed) -> apply kar sake. Thread-safe: pipeline stages alag threads me chalte hain.
+    """
+
+    def __init__(self, client, scope, manifest=None, table="documents"):
+        self.client = client
+        self.scope = scope
+        self.manifest = manifest or IngestManifest()
+        self.table = table
+        self._lock = threading.RLock()
+        self.seen_sources = set()
+        self.failed_sources = set()
+        # plan() ho chuka par record_source nahi: source -> chunk ids (provisional references)
+        self._in_flight = {}
+        self.report = {
+            "sources_total": 0, "sources_unchanged": 0, "sources_changed": 0, "sources_removed": 0,
+            "chunks_total": 0, "chunks_uploaded": 0, "chunks_skipped": 0, "chunks_deleted": 0,
+            "sources_failed": 0,
+        }
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.report[key] += n
+
+    def mark_failed(self, source):
+        # Fetch/parse fail: purane chunks rakho, "gayab" mat samjho
+        with self._lock:
+            self.failed_sources.add(source)
+            self._in_flight.pop(source, None)
+
+    def mark_item_failed(self, stage, item, error):
+        """Pipeline `on_error` hook: beech me fail hua source delete nahi hona chahiye."""
+        if isinstance(item, tuple) and item and isinstance(item[0], SourcePlan):
+            self.mark_failed(item[0].source)
+        elif isinstance(item, dict) and "source" in item:
+            self.mark_failed(item["source"])
+
+    def _planned_elsewhere(self, chunk_id, source):
+        return any(chunk_id in ids for other, ids in self._in_flight.items() if other != source)
+
+    def plan(self, source, docs):
+        """Unchanged source ho to None; warna SourcePlan (sirf naye chunks embed honge)."""
+        with self._lock:
+            self.seen_sources.add(source)
+            self.report["sources_total"] += 1
+            self.report["chunks_total"] += len(docs)
+            manifest = self.manifest
+            new_hash = content_hash("\x1e".join(d.page_content for d in docs))
+            old_hash = manifest.source_hash(source)
+            if old_hash == new_hash:
+                self.report["sources_unchanged"] += 1
+                self.report["chunks_skipped"] += len(docs)
+                return None
+
+            old_ids = manifest.chunk_ids(source)
+            new_docs, new_ids, seen = [], [], set()
+            for doc in docs:
+                cid = chunk_id_for(doc.page_content)
+                if cid in seen:
+                    self.report["chunks_skipped"] += 1  # Same source me duplicate chunk
+                    continue
+                seen.add(cid)
+                if cid in old_ids or manifest.is_referenced(cid):
+                    self.report["chunks_skipped"] += 1
+                    continue
+                new_docs.append(doc)
+                new_ids.append(cid)
+            # Jo chunks dusre source ke bharose skip hue (ya naye hain) unhe apply tak koi stale na maane
+            self._in_flight[source] = seen
+            return SourcePlan(source, new_hash, old_hash is None, new_docs, new_ids, seen, old_ids)
+
+    def apply(self, plan, vector_store, vectors=None, batch_size=20):
+        """Upload + stale delete + manifest update. `vectors` diye hon to dobara embed nahi hota."""
+        try:
+            if plan.first_time:
+                # Manifest se pehle ke runs ki (random ID wali) duplicate rows saaf karo
+                self.client.table(self.table).delete().eq("metadata->>source", plan.source).execute()
+
+            for i in range(0, len(plan.new_docs), batch_size):
+                docs = plan.new_docs[i:i + batch_size]
+                ids = plan.new_ids[i:i + batch_size]
+                if vectors is not None:
+                    vector_store.add_vectors(vectors[i:i + batch_size], docs, ids)
+                else:
+                    vector_store.add_documents(docs, ids=ids)
+            self._count("chunks_uploaded", len(plan.new_docs))
+
+            # Stale check, delete aur manifest write ek locked step: beech me dusre source ka plan()
+            # is source ke purane reference ke bharose koi chunk skip kare aur wo yahan delete ho jaye, aisa nahi
+            with self._lock:
+                stale = [cid for cid in plan.old_ids - plan.chunk_ids
+                         if not self.manifest.is_referenced(cid, excluding_source=plan.source)
+                         and not self._planned_elsewhere(cid, plan.source)]
+                _delete_rows(self.client, stale, table=self.table)
+                self.manifest.record_source(plan.source, self.scope, plan.source_hash, plan.chunk_ids)
+                self._in_flight.pop(plan.source, None)
+            self._count("chunks_deleted", len(stale))
+            self._count("sources_changed")
+            print(f"   🔄 {plan.source}: +{len(plan.new_docs)} / -{len(stale)} chunks")
+            return True
+        except Exception as e:
+            self._count("sources_failed")
+            self.mark_failed(plan.source)
+            print(f"   ❌ Sync failed for {plan.source}: {e}")
+            return False
+
+    def finish(self):
+        """Is scope ke jo sources is run me na mile na fail hue, unke chunks hatao + report."""
+        report = self.report
+        skip = self.seen_sources | self.failed_sources
+        for source in self.manifest.sources_in_scope(self.scope):
+            if source in skip:
+                continue
+            try:
+                stale = [cid for cid in self.manifest.chunk_ids(source)
+                         if not self.manifest.is_referenced(cid, excluding_source=source)]
+                _delete_rows(self.client, stale, table=self.table)
+                self.manifest.forget_source(source)
+                report["sources_removed"] += 1
+                report["chunks_deleted"] += len(stale)
+                print(f"   🗑️ Source removed: {source} (-{len(stale)} chunks)")
+            except Exception as e:
+                print(f"   ❌ Cleanup failed for {source}: {e}")
+
+        total = report["chunks_total"] or 1
+        print(f"📊 Ingestion report: {report['chunks_uploaded']} uploaded, {report['chunks_skipped']} skipped "
+              f"({100 * report['chunks_skipped'] / total:.0f}% work saved), {report['chunks_deleted']} deleted | "
+              f"sources: {report['sources_unchanged']} unchanged, {report['sources_changed']} changed, "
+              f"{report['sources_removed']} removed")
+        return report
+
+
+def sync_documents(documents, vector_store, client, scope, failed_sources=(), batch_size=20,
+                   manifest=None, table="documents"):
+    """
+    Sirf naye/badle hue chunks embed + upload karta hai, hataye gaye chunks delete karta hai.
+
+    - documents: is run ke saare LangChain Documents (metadata["source"] zaroori)
+    - scope: script ka naam; is scope ke jo sources is baar nahi mile wo delete hote hain
+    - failed_sources: jo fetch fail hue (network error), unhe "gayab" mat samjho
+    """
+    syncer = ManifestSync(client, scope, manifest=manifest, table=table)
+    for source in failed_sources:
+        syncer.mark_failed(source)
+
+    by_source = {}
+    for doc in documents:
+        by_source.setdefault(doc.metadata.get("source", "unknown"), []).append(doc)
+
+    for source, docs in by_source.items():
+        plan = syncer.plan(source, docs)
+        if plan is not None:
+            syncer.apply(plan, vector_store, batch_size=batch_size)
+    return syncer.finish()
+
+
+def corpus_changed(report):
+    return bool(report["chunks_uploaded"] or report["chunks_deleted"])
@@ -0,0 +1,221 @@
+import itertools
+import queue
+import threading
+import time
+
+import requests
+
+from services.partitions import tag_documents
+
+# --- CONFIGURATION ---
+DEFAULT_QUEUE_SIZE = 16  # Stages ke beech bounded queue: upar wala stage aage nikal nahi sakta
+REPORT_INTERVAL = 5.0  # Seconds
+
+_DONE = object()
+
+
+class Stage:
+    """
+    Pipeline ka ek step. `fn(item)` generator hai: ek input se 0..N outputs yield kar sakta hai.
+    Har stage ke apne `workers` threads hote hain aur aage wali queue `queue_size` pe bounded hai.
+    """
+
+    def __init__(self, name, fn, workers=1, queue_size=DEFAULT_QUEUE_SIZE):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.queue_size = queue_size
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _record(self, produced, elapsed, failed):
+        with self._lock:
+            self.items_in += 1
+            self.items_out += produced
+            self.busy_seconds += elapsed
+            if failed:
+                self.errors += 1
+
+    def stats(self, elapsed):
+        with self._lock:
+            return {
+                "in": self.items_in,
+                "out": self.items_out,
+                "errors": self.errors,
+                "per_second": round(self.items_in / elapsed, 2) if elapsed else 0.0,
+                "busy_seconds": round(self.busy_seconds, 2),
+            }
+
+
+class Pipeline:
+    """
+    source -> stage1 -> stage2 -> ... generator stages, bounded queues se jude hue.
+
+    - Sab stages saath chalte hain (fetch ka network, split ka CPU, embed, upload overlap)
+    - Queue bhar jaye to upar wala stage ruk jata hai (backpressure), memory flat rehti hai
+    - Har REPORT_INTERVAL pe per-stage progress + throughput print hota hai
+    """
+
+    def __init__(self, source, stages, report_interval=REPORT_INTERVAL, on_error=None):
+        self.source = source
+        self.on_error = on_error  # on_error(stage_name, item, exc)
+        self.stages = list(stages)
+        self.report_interval = report_interval
+        self._queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        self.source_count = 0
+
+    def _feed(self):
+        first = self._queues[0]
+        try:
+            for item in self.source:
+                first.put(item)
+                self.source_count += 1
+        except Exception as e:
+            print(f"   ❌ Pipeline source failed: {e}")
+        for _ in range(self.stages[0].workers):
+            first.put(_DONE)
+
+    def _work(self, index, finished):
+        stage = self.stages[index]
+        inbox = self._queues[index]
+        outbox = self._queues[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                break
+            produced, failed = 0, False
+            start = time.perf_counter()
+            try:
+                for output in stage.fn(item) or ():
+                    produced += 1
+                    if outbox is not None:
+                        outbox.put(output)
+            except Exception as e:
+                failed = True
+                print(f"   ⚠️ [{stage.name}] {e}")
+                if self.on_error:
+                    self.on_error(stage.name, item, e)
+            stage._record(produced, time.perf_counter() - start, failed)
+
+        # Is stage ka aakhri worker agle stage ko band karne ka signal deta hai
+        with finished["lock"]:
+            finished[index] += 1
+            last = finished[index] == stage.workers
+        if last and outbox is not None:
+            for _ in range(self.stages[index + 1].workers):
+                outbox.put(_DONE)
+
+    def _report(self, started):
+        elapsed = time.perf_counter() - started
+        parts = []
+        for stage, q in zip(self.stages, self._queues):
+            s = stage.stats(elapsed)
+            parts.append(f"{stage.name}: {s['in']} in ({s['per_second']}/s, q={q.qsize()})")
+        print(f"   📈 {elapsed:6.1f}s | " + " | ".join(parts))
+
+    def run(self):
+        started = time.perf_counter()
+        finished = {"lock": threading.Lock(), **{i: 0 for i in range(len(self.stages))}}
+        threads = [threading.Thread(target=self._feed, name="pipeline-source", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work, args=(index, finished), name=f"pipeline-{stage.name}-{n}", daemon=True
+                ))
+        for thread in threads:
+            thread.start()
+
+        while any(thread.is_alive() for thread in threads):
+            threads[-1].join(self.report_interval)
+            if any(thread.is_alive() for thread in threads):
+                self._report(started)
+
+        elapsed = time.perf_counter() - started
+        summary = {"elapsed_seconds": round(elapsed, 2), "sources": self.source_count,
+                   "stages": {stage.name: stage.stats(elapsed) for stage in self.stages}}
+        self._report(started)
+        print(f"🏁 Pipeline finished in {elapsed:.1f}s")
+        return summary
+
+
+# --- COMMON STAGES ---
+# Item ek dict hai: {"source": ..., "metadata": {...}} + stage-wise fields (html/text/docs/...)
+
+def fetch_html(headers=None, timeout=20, verify=True, on_fail=None):
+    """item["url"] fetch karke item["html"] set karta hai. Har worker thread ka apna keep-alive session."""
+    local = threading.local()
+
+    def stage(item):
+        if "url" not in item:
+            # Text/PDF jaise local sources seedha aage
+            yield item
+            return
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+            session.headers.update(headers or {})
+        url = item["url"]
+        try:
+            response = session.get(url, timeout=timeout, verify=verify)
+        except Exception as e:
+            print(f"   ⚠️ Error fetching {url}: {e}")
+            if on_fail:
+                on_fail(item["source"])
+            return
+        if response.status_code != 200:
+            print(f"   ❌ Failed Status {response.status_code}: {url}")
+            if on_fail:
+                on_fail(item["source"])
+            return
+        item["html"] = response.content
+        yield item
+
+    return stage
+
+
+def split_text(text_splitter, tag_sample_pages=5):
+    """
+    item["text"] (ya item["pages"]: list ya generator) ko chunks (item["docs"]) me todta hai.
+    Pages generator ho (PdfExtractor) to har page aate hi split hota hai, poora document ruke bina.
+    Har chunk ko region/category partition tags yahin milte hain (pehle kuch pages se).
+    """
+    def stage(item):
+        if "pages" in item:
+            pages = iter(item.pop("pages"))
+            head = list(itertools.islice(pages, tag_sample_pages))
+            tags = tag_documents(item, head)
+            docs = text_splitter.split_documents(head)
+            for page in pages:
+                page.metadata.update(tags)
+                docs.extend(text_splitter.split_documents([page]))
+            item["docs"] = docs
+        else:
+            tag_documents(item)
+            item["docs"] = text_splitter.create_documents([item.pop("text")], metadatas=[item["metadata"]])
+        yield item
+
+    return stage
+
+
+def embed_new_chunks(syncer, embeddings):
+    """Manifest se plan banao; sirf naye chunks embed hote hain, unchanged source yahin ruk jata hai."""
+    def stage(item):
+        plan = syncer.plan(item["source"], item["docs"])
+        if plan is None:
+            return
+        vectors = embeddings.embed_documents([d.page_content for d in plan.new_docs]) if plan.new_docs else []
+        yield plan, vectors
+
+    return stage
+
+
+def upload_chunks(syncer, vector_store, batch_size=20):
+    def stage(planned):
+        plan, vectors = planned
+        if syncer.apply(plan, vector_store, vectors=vectors, batch_size=batch_size):
+            yield plan.source
+
+    return stage
@@ -0,0 +1,48 @@
+import importlib.util
+import threading
+
+
+class LazyObject:
+    """
+    Heavy client (Supabase, HF embeddings, prompt) ka proxy: `factory` pehle attribute access
+    par hi chalti hai, ek hi baar (thread-safe). Import/construct ka kharcha cold start pe nahi,
+    pehli zaroorat (ya prewarm) pe lagta hai. Operators (`|`, `[]`) proxy nahi hote: unke liye
+    `resolve(obj)` se asli object lo.
+    """
+
+    def __init__(self, factory, name=None):
+        self._factory = factory
+        self._obj = None
+        self._lock = threading.Lock()
+        self.name = name or getattr(factory, "__name__", "lazy")
+
+    @property
+    def ready(self):
+        return self._obj is not None
+
+    def resolve(self):
+        if self._obj is None:
+            with self._lock:
+                if self._obj is None:
+                    self._obj = self._factory()
+        return self._obj
+
+    def __getattr__(self, attr):
+        # Sirf tab call hota hai jab attribute proxy pe khud na ho
+        return getattr(self.resolve(), attr)
+
+    def __repr__(self):
+        return f"<LazyObject {self.name} ({'ready' if self.ready else 'not built'})>"
+
+
+def resolve(obj):
+    """LazyObject ho to asli object, warna wahi."""
+    return obj.resolve() if isinstance(obj, LazyObject) else obj
+
+
+def module_available(name):
+    """Optional dependency install hai ya nahi, bina import kiye (import ka kharcha nahi lagta)."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
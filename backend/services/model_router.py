@@ -0,0 +1,442 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from services.lazy import resolve
+from services.telemetry import LLM_SECONDS, LLM_FALLBACKS, run_in_context
+
+# --- CONFIGURATION ---
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "30"))  # Seconds
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+# p95 tabhi bharosemand hai jab kam se kam itne samples hon
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+# Hedge pool sirf sync (Flask) path ka hai, ASGI path tasks use karta hai. Ek worker ke threads x 2
+# (primary + hedge) rakho: default ~4 concurrent sync chats; zyada threads ho to env se badhao,
+# warna pool hi concurrent LLM calls ki limit ban jaata hai
+LLM_HEDGE_WORKERS = int(os.getenv("LLM_HEDGE_WORKERS", "8"))
+LATENCY_WINDOW = 200
+
+
+class CircuitBreaker:
+    """
+    closed -> (lagataar failures) -> open -> (cooldown) -> half-open -> closed/open.
+    Open hone par provider ko cooldown tak skip kiya jata hai.
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, cooldown=BREAKER_COOLDOWN, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                # Cooldown khatam: sirf ek trial request jaane do
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release(self):
+        """Request bina result ke chhodi gayi (client chala gaya): half-open trial wapas do."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._trial_in_flight or self._consecutive_failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_in_flight = False
+
+
+class Provider:
+    """
+    Ek LLM backend. `factory` pehli call pe sirf ek baar chalti hai, phir wahi
+    client (aur uska HTTP connection pool) har request me reuse hota hai.
+    Tests me factory koi bhi fake LangChain chat model return kar sakti hai.
+    """
+
+    def __init__(self, name, factory, breaker=None, context_tokens=None):
+        self.name = name
+        self.context_tokens = context_tokens  # Is model ke prompt me context ka hard budget
+        self._factory = factory
+        self._llm = None
+        self._build_lock = threading.Lock()
+        self.breaker = breaker or CircuitBreaker()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._stats_lock = threading.Lock()
+        self.successes = 0
+        self.failures = 0
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            with self._build_lock:
+                if self._llm is None:
+                    self._llm = self._factory()
+        return self._llm
+
+    def record(self, ok, latency):
+        with self._stats_lock:
+            if ok:
+                self.successes += 1
+                self._latencies.append(latency)
+            else:
+                self.failures += 1
+        LLM_SECONDS.observe(latency, provider=self.name, outcome="ok" if ok else "error")
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def p95(self):
+        with self._stats_lock:
+            if len(self._latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def error_rate(self):
+        with self._stats_lock:
+            total = self.successes + self.failures
+            return self.failures / total if total else 0.0
+
+    def stats(self):
+        p95 = self.p95()
+        return {
+            "state": self.breaker.state,
+            "successes": self.successes,
+            "failures": self.failures,
+            "error_rate": round(self.error_rate(), 4),
+            "p95_seconds": round(p95, 4) if p95 is not None else None,
+        }
+
+
+class ModelRouter:
+    """
+    Providers ko priority order me try karta hai (pehla = primary).
+    - Circuit open ho to provider skip (timeout ka wait nahi).
+    - hedge=True ho to primary apne p95 se slow hote hi backup ko bhi bhej deta hai,
+      jo pehle successfully lautta hai uska answer use hota hai.
+    """
+
+    def __init__(self, providers, prompt, hedge=LLM_HEDGE_ENABLED, max_workers=LLM_HEDGE_WORKERS):
+        self.providers = list(providers)
+        self.prompt = prompt
+        self.hedge = hedge
+        self._chains = {}
+        self._chain_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge") if hedge else None
+
+    def chain_for(self, provider):
+        chain = self._chains.get(provider.name)
+        if chain is None:
+            with self._chain_lock:
+                chain = self._chains.get(provider.name)
+                if chain is None:
+                    # Import yahin: LangChain ka kharcha cold start pe nahi, pehli call/prewarm pe
+                    from langchain_core.output_parsers import StrOutputParser
+                    chain = resolve(self.prompt) | provider.llm | StrOutputParser()
+                    self._chains[provider.name] = chain
+        return chain
+
+    def _pop_allowed(self, remaining):
+        # allow() half-open trial "consume" karta hai, isliye sirf usi provider
+        # pe call karo jise sach me request bhejni hai
+        while remaining:
+            provider = remaining.pop(0)
+            if provider.breaker.allow():
+                return provider
+        return None
+
+    def _run(self, provider, inputs):
+        start = time.perf_counter()
+        try:
+            result = self.chain_for(provider).invoke(inputs)
+        except Exception:
+            provider.record(False, time.perf_counter() - start)
+            raise
+        provider.record(True, time.perf_counter() - start)
+        return result
+
+    def _abandoned(self, provider, started, start):
+        if started:
+            provider.record(True, time.perf_counter() - start)
+        else:
+            provider.breaker.release()
+
+    def _served_by(self, provider):
+        # Sirf usi provider ke liye jiska answer user ko gaya: haara hua hedge fallback nahi hai
+        if provider is not self.providers[0]:
+            LLM_FALLBACKS.inc(provider=provider.name)
+
+    def _candidates(self):
+        """
+        invoke/ainvoke ka order: circuit jinhe allow kare (lazily, taaki half-open trial sirf
+        usi provider ka consume ho jise sach me bhej rahe hain); koi nahi to sab, phir bhi try.
+        """
+        remaining = list(self.providers)
+        attempted = False
+        while True:
+            provider = self._pop_allowed(remaining)
+            if provider is None:
+                break
+            attempted = True
+            yield provider
+        if not attempted:
+            # Sab circuits open hain: phir bhi user ko khali haath mat bhejo
+            print("⚠️ All LLM circuits open, trying every provider anyway.")
+            yield from self.providers
+
+    def invoke(self, inputs):
+        if self.hedge and len(self.providers) > 1:
+            return self._invoke_hedged(inputs)
+
+        last_error = None
+        for provider in self._candidates():
+            try:
+                print(f"🤖 Trying Model ({provider.name})...")
+                result = self._run(provider, inputs)
+                self._served_by(provider)
+                return result
+            except Exception as e:
+                print(f"⚠️ {provider.name} Failed: {e}")
+                last_error = e
+        raise last_error
+
+    def stream(self, inputs):
+        """
+        Tokens yield karta hai. Primary pehle token se pehle fail ho to agla
+        provider try hota hai; pehla token nikal chuka ho to error upar jata hai
+        (aadha answer dusre model se jodna sahi nahi hoga).
+        """
+        last_error = None
+        for provider in self._candidates():
+            print(f"🤖 Streaming Model ({provider.name})...")
+            start = time.perf_counter()
+            started = False
+            try:
+                for token in self.chain_for(provider).stream(inputs):
+                    if not token:
+                        continue
+                    if not started:
+                        started = True
+                        print(f"⚡ First token from {provider.name} in {time.perf_counter() - start:.2f}s")
+                    yield token
+            except (GeneratorExit, asyncio.CancelledError):
+                # Client beech me chala gaya: tokens aa rahe the to provider theek hai
+                self._abandoned(provider, started, start)
+                raise
+            except Exception as e:
+                provider.record(False, time.perf_counter() - start)
+                print(f"⚠️ {provider.name} Failed: {e}")
+                if started:
+                    raise
+                last_error = e
+                continue
+            provider.record(True, time.perf_counter() - start)
+            self._served_by(provider)
+            return
+        raise last_error
+
+    def _invoke_hedged(self, inputs):
+        remaining = list(self.providers)
+        pending = {}
+        last_error = None
+
+        started_at = {}
+
+        def run(provider):
+            started_at[provider.name] = time.monotonic()
+            return self._run(provider, inputs)
+
+        def launch(provider):
+            print(f"🤖 Trying Model ({provider.name})...")
+            # Executor thread ke logs me bhi request ID rahe
+            pending[self._executor.submit(run_in_context(run), provider)] = provider
+            return provider
+
+        pop_next = self._pop_allowed
+        latest = pop_next(remaining)
+        if latest is None:
+            print("⚠️ All LLM circuits open, trying every provider anyway.")
+            remaining = list(self.providers)
+            pop_next = lambda providers: providers.pop(0) if providers else None
+            latest = pop_next(remaining)
+        launch(latest)
+
+        while pending:
+            # Latest provider apne p95 tak nahi lauta to agla provider bhi bhej do. Ghadi tab se chalti
+            # hai jab call sach me shuru hui: pool ki queue me wait karna "slow provider" nahi hai
+            p95 = latest.p95() if remaining else None
+            began = started_at.get(latest.name)
+            timeout = p95 if p95 is None or began is None else max(0.0, began + p95 - time.monotonic())
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                began = started_at.get(latest.name)
+                if began is None or time.monotonic() - began < p95:
+                    continue  # Abhi queue me tha / abhi p95 tak chala hi nahi
+                backup = pop_next(remaining)
+                if backup is not None:
+                    print(f"⏱️ {latest.name} slower than p95, hedging with {backup.name}...")
+                    latest = launch(backup)
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"⚠️ {provider.name} Failed: {e}")
+                    last_error = e
+                    continue
+                self._served_by(provider)
+                return result
+            if not pending:
+                backup = pop_next(remaining)
+                if backup is not None:
+                    latest = launch(backup)
+        raise last_error
+
+    # --- ASYNC (ASGI path): same fallback/breaker/hedge logic, thread ke bina ---
+    async def _arun(self, provider, inputs):
+        start = time.perf_counter()
+        try:
+            result = await self.chain_for(provider).ainvoke(inputs)
+        except Exception:
+            provider.record(False, time.perf_counter() - start)
+            raise
+        provider.record(True, time.perf_counter() - start)
+        return result
+
+    async def ainvoke(self, inputs):
+        if self.hedge and len(self.providers) > 1:
+            return await self._ainvoke_hedged(inputs)
+
+        last_error = None
+        for provider in self._candidates():
+            try:
+                print(f"🤖 Trying Model ({provider.name})...")
+                result = await self._arun(provider, inputs)
+                self._served_by(provider)
+                return result
+            except Exception as e:
+                print(f"⚠️ {provider.name} Failed: {e}")
+                last_error = e
+        raise last_error
+
+    async def astream(self, inputs):
+        """stream() ka async generator version (pehle token ke baad fallback nahi)."""
+        last_error = None
+        for provider in self._candidates():
+            print(f"🤖 Streaming Model ({provider.name})...")
+            start = time.perf_counter()
+            started = False
+            try:
+                async for token in self.chain_for(provider).astream(inputs):
+                    if not token:
+                        continue
+                    if not started:
+                        started = True
+                        print(f"⚡ First token from {provider.name} in {time.perf_counter() - start:.2f}s")
+                    yield token
+            except (GeneratorExit, asyncio.CancelledError):
+                # Client beech me chala gaya: tokens aa rahe the to provider theek hai
+                self._abandoned(provider, started, start)
+                raise
+            except Exception as e:
+                provider.record(False, time.perf_counter() - start)
+                print(f"⚠️ {provider.name} Failed: {e}")
+                if started:
+                    raise
+                last_error = e
+                continue
+            provider.record(True, time.perf_counter() - start)
+            self._served_by(provider)
+            return
+        raise last_error
+
+    async def _ainvoke_hedged(self, inputs):
+        remaining = list(self.providers)
+        pending = {}
+        last_error = None
+
+        def launch(provider):
+            print(f"🤖 Trying Model ({provider.name})...")
+            pending[asyncio.ensure_future(self._arun(provider, inputs))] = provider
+            return provider
+
+        pop_next = self._pop_allowed
+        latest = pop_next(remaining)
+        if latest is None:
+            print("⚠️ All LLM circuits open, trying every provider anyway.")
+            remaining = list(self.providers)
+            pop_next = lambda providers: providers.pop(0) if providers else None
+            latest = pop_next(remaining)
+        launch(latest)
+
+        try:
+            while pending:
+                timeout = latest.p95() if remaining else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    backup = pop_next(remaining)
+                    if backup is not None:
+                        print(f"⏱️ {latest.name} slower than p95, hedging with {backup.name}...")
+                        latest = launch(backup)
+                    continue
+                for task in done:
+                    provider = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        print(f"⚠️ {provider.name} Failed: {e}")
+                        last_error = e
+                        continue
+                    self._served_by(provider)
+                    return result
+                if not pending:
+                    backup = pop_next(remaining)
+                    if backup is not None:
+                        latest = launch(backup)
+        finally:
+            # Thread pool ke ulat yahan haarne wali request sach me cancel ho jaati hai
+            for task in pending:
+                task.cancel()
+        raise last_error
+
+    def context_budget(self, default):
+        """Fallback/hedge me same prompt kisi bhi provider ko ja sakta hai: sabse chhota budget."""
+        budgets = [p.context_tokens for p in self.providers if p.context_tokens]
+        return min(budgets) if budgets else default
+
+    def stats(self):
+        return {p.name: p.stats() for p in self.providers}
@@ -0,0 +1,288 @@
+"""
+Metadata partitions: har chunk ko ingest pe `region` (central / state) aur `category`
+(scheme / institution) tag milta hai, aur query time pe ek sasta keyword classifier decide
+karta hai ki kaunse partitions me dhundna hai. "PM Kisan eligibility" sirf central schemes me,
+"Gujarat scholarship" Gujarat + central schemes me, CHARUSAT ki baat ho tabhi CHARUSAT ke pages.
+Bina tag wale purane chunks har partition me gine jaate hain (backfill ke liye `python -m services.partitions`).
+
+RPC backend ke liye filtered function (ek baar SQL editor me):
+    create index documents_region_idx on documents ((metadata->>'region'));
+    create index documents_category_idx on documents ((metadata->>'category'));
+    create or replace function match_documents_filtered(query_embedding vector(384), match_threshold float,
+        match_count int, regions text[] default null, categories text[] default null)
+    returns table (id uuid, content text, metadata jsonb, similarity float) language sql stable as $$
+      select id, content, metadata, 1 - (embedding <=> query_embedding) as similarity from documents
+      where (regions is null or metadata->>'region' is null or metadata->>'region' = any(regions))
+        and (categories is null or metadata->>'category' is null or metadata->>'category' = any(categories))
+        and 1 - (embedding <=> query_embedding) > match_threshold
+      order by embedding <=> query_embedding limit match_count;
+    $$;
+"""
+import os
+import re
+import threading
+from collections import namedtuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+# --- CONFIGURATION ---
+PARTITIONED_RETRIEVAL_ENABLED = os.getenv("PARTITIONED_RETRIEVAL_ENABLED", "true").lower() == "true"
+# Supabase function jo regions/categories filter leta hai (na ho to match_documents + client-side filter)
+PARTITION_RPC = os.getenv("PARTITION_RPC", "match_documents_filtered")
+# Region detect karne ke liye source text ke shuru ke itne characters kaafi hain
+TAG_SAMPLE_CHARS = 5000
+
+CENTRAL = "central"
+SCHEME = "scheme"
+INSTITUTION = "institution"
+_TOKENS = re.compile(r"[0-9a-z\u0900-\u097f]+")
+
+# State -> extra cues (shehar, state-only schemes, Hindi naam). State ka apna naam hamesha cue hai.
+STATE_CUES = {
+    "gujarat": ["gujarati", "ahmedabad", "surat", "vadodara", "rajkot", "gandhinagar", "anand", "changa",
+                "mysy", "mariyojana", "mukhyamantri", "गुजरात"],
+    "maharashtra": ["mumbai", "pune", "nagpur", "महाराष्ट्र"],
+    "rajasthan": ["jaipur", "jodhpur", "राजस्थान"],
+    "uttar_pradesh": ["lucknow", "kanpur", "उत्तर प्रदेश"],
+    "madhya_pradesh": ["bhopal", "indore", "मध्य प्रदेश"],
+    "bihar": ["patna", "बिहार"],
+    "karnataka": ["bengaluru", "bangalore"],
+    "tamil_nadu": ["chennai"],
+    "west_bengal": ["kolkata"],
+    "telangana": ["hyderabad"],
+    "delhi": ["दिल्ली"],
+}
+for _state in ("andhra_pradesh", "assam", "chhattisgarh", "goa", "haryana", "himachal_pradesh", "jharkhand",
+               "kerala", "odisha", "punjab", "uttarakhand", "jammu_and_kashmir"):
+    STATE_CUES.setdefault(_state, [])
+# Institutions (abhi sirf CHARUSAT) -> unka state
+INSTITUTIONS = {"charusat": "gujarat", "charotar university": "gujarat", "चारुसेट": "gujarat"}
+# "pm", "bharat" jaise words = central scheme ki baat
+CENTRAL_CUES = frozenset("""
+pm pradhan pradhanmantri central centre kendra kendriya national bharat india nationwide
+पीएम प्रधानमंत्री केंद्र केंद्रीय भारत
+""".split())
+
+
+def _phrases(text):
+    """Normalized " tok tok " string: multi-word cues bhi simple `in` check se."""
+    return " " + " ".join(_TOKENS.findall((text or "").lower())) + " "
+
+
+def _cue_hits(padded, cues):
+    return sum(padded.count(f" {cue} ") for cue in cues)
+
+
+def _state_scores(padded):
+    scores = {}
+    for state, cues in STATE_CUES.items():
+        hits = _cue_hits(padded, [state.replace("_", " "), *cues])
+        if hits:
+            scores[state] = hits
+    return scores
+
+
+# --- INGEST TIME ---
+def partition_tags(source, text, metadata=None):
+    """
+    Source ke `region` aur `category` tags. Pehle se diye gaye tags (metadata me) nahi badalte.
+    Order: data/*.txt ki "State:" line, URL ka host, institution, text me state ka zikr, warna central.
+    """
+    metadata = metadata or {}
+    sample = (text or "")[:TAG_SAMPLE_CHARS]
+    padded = _phrases(sample)
+    host = urlparse(source).netloc.lower() if "://" in (source or "") else ""
+    source_padded = _phrases(source)
+
+    institution = next((name for name in INSTITUTIONS if f" {name} " in source_padded), None)
+    if institution is None:
+        institution = next((name for name in INSTITUTIONS if _cue_hits(padded, [name]) >= 2), None)
+    category = metadata.get("category") or (INSTITUTION if institution else SCHEME)
+
+    region = metadata.get("region")
+    if not region:
+        state_line = re.search(r"^\s*State:\s*(.+)$", sample, re.MULTILINE)
+        host_state = next((state for state in STATE_CUES if state.replace("_", "") in host.replace("-", "")), None)
+        if state_line:
+            scores = _state_scores(_phrases(state_line.group(1)))
+            region = max(scores, key=scores.get) if scores else CENTRAL
+        elif host_state:
+            region = host_state
+        elif institution:
+            region = INSTITUTIONS[institution]
+        else:
+            scores = _state_scores(padded)
+            best = max(scores, key=scores.get) if scores else None
+            region = best if best and scores[best] >= 2 else CENTRAL
+    return {"region": region, "category": category}
+
+
+def tag_documents(item, pages=None):
+    """Pipeline item (text ya PDF pages) ke metadata me tags; pages ho to har page me bhi."""
+    text = item.get("text") or " ".join(page.page_content for page in (pages or [])[:5])
+    tags = partition_tags(item.get("source", ""), text, item.get("metadata"))
+    item.setdefault("metadata", {}).update(tags)
+    for page in pages or ():
+        page.metadata.update(tags)
+    return tags
+
+
+# --- QUERY TIME ---
+class PartitionFilter(namedtuple("PartitionFilter", "regions categories")):
+    """None = us axis pe koi filter nahi. Bina tag wale rows hamesha match."""
+
+    def matches(self, metadata):
+        metadata = metadata or {}
+        region, category = metadata.get("region"), metadata.get("category")
+        return ((self.regions is None or region is None or region in self.regions) and
+                (self.categories is None or category is None or category in self.categories))
+
+    def rpc_params(self):
+        return {"regions": list(self.regions) if self.regions is not None else None,
+                "categories": list(self.categories) if self.categories is not None else None}
+
+
+def classify_query(query_text):
+    """
+    Sasta keyword classifier (regex + set lookups, koi model nahi) -> PartitionFilter.
+      institution ka naam  -> us institution ka state (institution + schemes)
+      state ka zikr        -> wo state + central schemes
+      sirf central cues    -> central schemes
+      koi cue nahi         -> saari schemes (institution pages nahi)
+    """
+    padded = _phrases(query_text)
+    institution = next((name for name in INSTITUTIONS if f" {name} " in padded), None)
+    if institution:
+        return PartitionFilter((INSTITUTIONS[institution],), None)
+    states = _state_scores(padded)
+    if states:
+        return PartitionFilter(tuple(sorted(states)) + (CENTRAL,), (SCHEME,))
+    if any(token in CENTRAL_CUES for token in padded.split()):
+        return PartitionFilter((CENTRAL,), (SCHEME,))
+    return PartitionFilter(None, (SCHEME,))
+
+
+class PartitionCodes:
+    """
+    Index ke rows (metadatas) ke region/category integer codes. `rows(filter)` us partition ke
+    row numbers deta hai (filter-wise cached), taaki search sirf wahi subset score kare.
+    """
+
+    def __init__(self, metadatas):
+        regions, categories = {None: 0}, {None: 0}
+        self.region_codes = np.empty(len(metadatas), dtype=np.int32)
+        self.category_codes = np.empty(len(metadatas), dtype=np.int32)
+        for i, metadata in enumerate(metadatas):
+            metadata = metadata or {}
+            self.region_codes[i] = regions.setdefault(metadata.get("region"), len(regions))
+            self.category_codes[i] = categories.setdefault(metadata.get("category"), len(categories))
+        self.regions = regions
+        self.categories = categories
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _axis(self, codes, vocab, allowed):
+        if allowed is None:
+            return None
+        # Code 0 = tag hi nahi (purane rows): hamesha shamil
+        wanted = [0] + [vocab[value] for value in allowed if value in vocab]
+        return np.isin(codes, wanted)
+
+    def _entry(self, partition):
+        with self._lock:
+            cached = self._cache.get(partition)
+        if cached is not None:
+            return cached
+        mask = np.ones(len(self.region_codes), dtype=bool)
+        for axis in (self._axis(self.region_codes, self.regions, partition.regions),
+                     self._axis(self.category_codes, self.categories, partition.categories)):
+            if axis is not None:
+                mask &= axis
+        entry = (mask, np.flatnonzero(mask))
+        with self._lock:
+            if len(self._cache) > 64:
+                self._cache.clear()
+            self._cache[partition] = entry
+        return entry
+
+    def mask(self, partition):
+        """Boolean mask (None = saare rows)."""
+        return None if partition is None else self._entry(partition)[0]
+
+    def rows(self, partition):
+        """Row numbers (None = saare rows)."""
+        return None if partition is None else self._entry(partition)[1]
+
+
+class PartitionMetrics:
+    """/metrics: kitni queries filtered gayi, kitni baar filter ne kuch nahi diya (fallback), scan fraction."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.filtered = 0
+        self.fallbacks = 0
+        self._scan_sum = 0.0
+        self._scan_count = 0
+
+    def record(self, partition, scan_fraction=None):
+        with self._lock:
+            self.queries += 1
+            self.filtered += partition is not None
+            if scan_fraction is not None:
+                self._scan_sum += scan_fraction
+                self._scan_count += 1
+
+    def record_fallback(self):
+        with self._lock:
+            self.fallbacks += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queries": self.queries,
+                "filtered": self.filtered,
+                "fallbacks": self.fallbacks,
+                "filtered_rate": round(self.filtered / self.queries, 4) if self.queries else 0.0,
+                # Local index pe average kitna hissa score hua (1.0 = poora corpus)
+                "scan_fraction": round(self._scan_sum / self._scan_count, 4) if self._scan_count else 1.0,
+            }
+
+
+partition_metrics = PartitionMetrics()
+
+
+# --- BACKFILL (purane chunks) ---
+def backfill_partitions(client, table="documents", page_size=1000):
+    """Bina tag wale rows ko source + content se tag karo (ingest se pehle ke chunks ke liye)."""
+    updated, start = 0, 0
+    while True:
+        page = client.table(table).select("id, content, metadata").order("id")\
+            .range(start, start + page_size - 1).execute()
+        rows = page.data or []
+        for row in rows:
+            metadata = row.get("metadata") or {}
+            if metadata.get("region") and metadata.get("category"):
+                continue
+            metadata.update(partition_tags(metadata.get("source", ""), row.get("content", ""), metadata))
+            client.table(table).update({"metadata": metadata}).eq("id", row["id"]).execute()
+            updated += 1
+        if len(rows) < page_size:
+            break
+        start += page_size
+    return updated
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from supabase import create_client
+    from services.corpus_version import bump_corpus_version
+
+    load_dotenv()
+    client = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    count = backfill_partitions(client)
+    print(f"🗂️ Partition tags backfilled: {count} chunks")
+    if count:
+        # Local vector/keyword indexes naye tags ke saath rebuild hon
+        bump_corpus_version("partition_backfill", client=client)
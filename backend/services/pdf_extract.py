@@ -0,0 +1,192 @@
+"""
+PDF ingestion: pages process pool me extract hote hain (pypdf CPU-bound hai, threads GIL pe atakte),
+aur order me jaise-jaise bante hain splitter ko milte hain, poora document memory me load kiye bina.
+Saaf kiya hua text file ke content hash pe SQLite me cache hota hai: unchanged PDF dobara parse nahi hota.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# --- CONFIGURATION ---
+PDF_TEXT_CACHE_PATH = os.getenv(
+    "PDF_TEXT_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "pdf_text.sqlite3"),
+)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 2)))
+# Ek task me itne pages: chhota = jaldi pehla page (streaming), bada = kam baar PDF kholna
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+# fork: workers turant bante hain (spawn har worker me __main__ dobara import karta, ingest scripts clients banate)
+PDF_START_METHOD = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+# Extraction/cleaning badle to ise badlo, purana cache apne aap bekaar
+EXTRACTOR_VERSION = 1
+
+_SPACES = re.compile(r"\s+")
+
+
+def clean_pdf_text(text):
+    """Newlines/extra spaces ek space me (ingest_charusat.clean_text jaisa)."""
+    return _SPACES.sub(" ", text or "").strip()
+
+
+def file_hash(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def page_count(path):
+    from pypdf import PdfReader
+    return len(PdfReader(path).pages)
+
+
+def extract_page_range(path, start, stop):
+    """Worker process me chalta hai: pages [start, stop) ka saaf text."""
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    return [clean_pdf_text(reader.pages[i].extract_text()) for i in range(start, min(stop, len(reader.pages)))]
+
+
+class PdfTextCache:
+    """Content hash -> pages ka saaf text (JSON list), SQLite me. Rename/move ke baad bhi hit."""
+
+    def __init__(self, path=PDF_TEXT_CACHE_PATH):
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("CREATE TABLE IF NOT EXISTS pdf_text "
+                                 "(key TEXT PRIMARY KEY, pages TEXT NOT NULL, extracted_at REAL NOT NULL)")
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ PDF text cache disabled: {e}")
+                self._db = None
+
+    @staticmethod
+    def key(digest):
+        return f"v{EXTRACTOR_VERSION}:{digest}"
+
+    def get(self, digest):
+        if self._db is None:
+            return None
+        with self._lock:
+            row = self._db.execute("SELECT pages FROM pdf_text WHERE key = ?", (self.key(digest),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, digest, pages):
+        if self._db is None:
+            return
+        with self._lock:
+            try:
+                self._db.execute("INSERT OR REPLACE INTO pdf_text (key, pages, extracted_at) VALUES (?, ?, ?)",
+                                 (self.key(digest), json.dumps(pages, ensure_ascii=False), time.time()))
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ PDF text cache write failed: {e}")
+
+
+class PdfExtractor:
+    """
+    `pages(path, metadata)` LangChain Documents ka generator (ek per page, order me). Cache miss pe
+    saare page ranges ek saath process pool ko jaate hain; pehla range aate hi yield shuru.
+    Pipeline ke kai threads ek hi pool share karte hain.
+    """
+
+    def __init__(self, workers=PDF_WORKERS, pages_per_task=PDF_PAGES_PER_TASK, cache=None):
+        self.workers = max(1, workers)
+        self.pages_per_task = max(1, pages_per_task)
+        self.cache = cache if cache is not None else PdfTextCache()
+        self._pool = None
+        self._lock = threading.Lock()
+        self.files_parsed = 0
+        self.files_cached = 0
+        self.pages_parsed = 0
+        self.pages_cached = 0
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context(PDF_START_METHOD))
+            return self._pool
+
+    def start(self):
+        """
+        Workers abhi bana do, Pipeline.run se pehle: fork tab hona chahiye jab dusre threads
+        (aur unke locks) abhi bane hi nahi. Pool saare workers pehle submit pe hi start karta hai.
+        """
+        self._executor().submit(int).result()
+
+    def _extract(self, path):
+        """Pool se pages ka text, order me, jaise-jaise ranges complete hon."""
+        total = page_count(path)
+        pool = self._executor()
+        futures = [pool.submit(extract_page_range, path, start, start + self.pages_per_task)
+                   for start in range(0, total, self.pages_per_task)]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # Consumer beech me ruk gaya (error): baaki ranges ka kaam mat karo
+            for future in futures:
+                future.cancel()
+
+    def page_texts(self, path):
+        """Saaf page texts ka generator; cache hit pe bina parse, miss pe parse ke baad cache me."""
+        digest = file_hash(path)
+        cached = self.cache.get(digest)
+        if cached is not None:
+            with self._lock:
+                self.files_cached += 1
+                self.pages_cached += len(cached)
+            yield from cached
+            return
+
+        texts = []
+        for text in self._extract(path):
+            texts.append(text)
+            yield text
+        # Poora file extract hua tabhi cache (adha parse hua file agli baar phir se)
+        self.cache.put(digest, texts)
+        with self._lock:
+            self.files_parsed += 1
+            self.pages_parsed += len(texts)
+
+    def pages(self, path, metadata=None):
+        from langchain_core.documents import Document
+        for number, text in enumerate(self.page_texts(path)):
+            yield Document(page_content=text, metadata=dict(metadata or {}, page=number))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "files_parsed": self.files_parsed,
+                "files_cached": self.files_cached,
+                "pages_parsed": self.pages_parsed,
+                "pages_cached": self.pages_cached,
+            }
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def iter_pdf_files(root):
+    """root ke andar (sub-folders bhi, e.g. data/charusat_pdfs) saare PDFs, stable order me."""
+    for folder, dirs, files in os.walk(root):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.lower().endswith(".pdf"):
+                yield os.path.join(folder, filename)
@@ -0,0 +1,306 @@
+import atexit
+import glob
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from services.telemetry import DB_WRITE_SECONDS
+
+try:
+    import httpx  # supabase-py ka transport: connect/read timeouts isi ke exceptions hain
+    _OUTAGE_ERRORS = (ConnectionError, TimeoutError, httpx.TransportError)
+except ImportError:
+    _OUTAGE_ERRORS = (ConnectionError, TimeoutError)
+
+# --- CONFIGURATION ---
+PERSIST_BATCH_SIZE = int(os.getenv("PERSIST_BATCH_SIZE", "50"))  # Rows per bulk insert
+PERSIST_FLUSH_INTERVAL = float(os.getenv("PERSIST_FLUSH_INTERVAL", "0.5"))  # Seconds
+PERSIST_RETRY_INTERVAL = float(os.getenv("PERSIST_RETRY_INTERVAL", "30"))  # Spool retry
+PERSIST_MAX_QUEUE = int(os.getenv("PERSIST_MAX_QUEUE", "10000"))
+# Itni baar fail hua row (e.g. FK violation, galat conversation_id) quarantine me, baaki spool aage badhta hai
+PERSIST_MAX_ATTEMPTS = int(os.getenv("PERSIST_MAX_ATTEMPTS", "5"))
+PERSIST_SPOOL_DIR = os.getenv(
+    "PERSIST_SPOOL_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "spool"),
+)
+
+_STOP = object()
+
+
+def new_id():
+    """Client-side UUID: response ko DB insert ka wait nahi karna padta."""
+    return str(uuid.uuid4())
+
+
+def utc_now():
+    # Microsecond precision, taaki same request ke user/ai messages ka order bana rahe
+    return datetime.now(timezone.utc).isoformat()
+
+
+class WriteBehindQueue:
+    """
+    Conversations aur messages ko background thread se bulk me Supabase me likhta hai.
+
+    - enqueue_* turant return karte hain (request path pe koi DB wait nahi)
+    - batch PERSIST_BATCH_SIZE rows ya PERSIST_FLUSH_INTERVAL seconds pe flush hota hai
+    - har flush me pehle conversations, phir messages (foreign key ke liye)
+    - dono tables upsert on `id` (client-side UUID): timeout ke baad commit ho chuka batch dobara
+      likhne (row-by-row retry, spool replay) se duplicate messages nahi bante
+    - fail hua batch row-by-row dobara likha jata hai; sirf fail hue rows disk spool (JSON file) me.
+      Connection/timeout error (outage) pe row-by-row nahi, poora batch seedha spool
+    - spool retry: file atomic rename se claim (kai gunicorn workers same dir share karte hain),
+      PERSIST_MAX_ATTEMPTS ke baad row quarantine/ me, ek kharab file baaki files ko nahi rokti
+    - process exit pe queue drain hoti hai
+    """
+
+    def __init__(self, client, batch_size=PERSIST_BATCH_SIZE, flush_interval=PERSIST_FLUSH_INTERVAL,
+                 retry_interval=PERSIST_RETRY_INTERVAL, spool_dir=PERSIST_SPOOL_DIR, max_queue=PERSIST_MAX_QUEUE,
+                 max_attempts=PERSIST_MAX_ATTEMPTS):
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.spool_dir = spool_dir
+        self.quarantine_dir = os.path.join(spool_dir, "quarantine")
+        self.max_attempts = max_attempts
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._spool_lock = threading.Lock()
+        self._listeners = []
+        self.rows_written = 0
+        self.batches_written = 0
+        self.batches_spooled = 0
+        self.batches_recovered = 0
+        self.rows_quarantined = 0
+        atexit.register(self.shutdown)
+
+    # --- PUBLIC API ---
+    def enqueue_conversation(self, row):
+        self._put(("conversations", row))
+
+    def enqueue_messages(self, rows):
+        for row in rows:
+            self._put(("messages", row))
+
+    def add_listener(self, fn):
+        """fn({table: rows}) har successful DB write ke baad (spool retry bhi) call hota hai."""
+        self._listeners.append(fn)
+
+    def shutdown(self, timeout=10):
+        """Bachi hui queue flush karke background thread band karta hai."""
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        if thread.is_alive():
+            print("⚠️ Persistence queue did not drain in time.")
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "rows_written": self.rows_written,
+            "batches_written": self.batches_written,
+            "batches_spooled": self.batches_spooled,
+            "batches_recovered": self.batches_recovered,
+            "rows_quarantined": self.rows_quarantined,
+        }
+
+    # --- INTERNALS ---
+    def _ensure_started(self):
+        # Lazy start: gunicorn fork ke baad har worker apna thread chalata hai
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="persistence-writer", daemon=True)
+            self._thread.start()
+
+    def _put(self, item):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Queue bhar gayi: memory mat badhao, seedha disk pe likh do
+            table, row = item
+            self._spool({table: [row]})
+
+    def _run(self):
+        pending = []
+        deadline = None
+        last_retry = float("-inf")  # Start pe purana spool turant retry
+        stopping = False
+        while not stopping:
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+                if item is _STOP:
+                    stopping = True
+                else:
+                    pending.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            if pending and (stopping or len(pending) >= self.batch_size or now >= deadline):
+                self._flush(pending)
+                pending = []
+                deadline = None
+            if stopping or now - last_retry >= self.retry_interval:
+                self._retry_spool()
+                last_retry = now
+
+    def _flush(self, items):
+        batch = {}
+        for table, row in items:
+            batch.setdefault(table, []).append(row)
+        failed, error = self._write_or_split(batch)
+        if failed:
+            print(f"❌ DB Save Failed ({sum(len(r) for r in failed.values())} rows), spooling: {error}")
+            self._spool(failed)
+
+    def _write_or_split(self, batch):
+        """
+        Pehle poora batch ek bulk upsert me; fail ho to row-by-row, taaki ek kharab row
+        (dusre user ke) sahi rows ko na roke. DB tak pahunch hi nahi (connection/timeout) to
+        har row ka alag timeout mat khao, poora batch wapas. Returns (fail hue rows ka batch, last error).
+        """
+        try:
+            self._write(batch)
+            self.batches_written += 1
+            return {}, None
+        except _OUTAGE_ERRORS as e:
+            return batch, e
+        except Exception as e:
+            error = e
+        failed = {}
+        # Conversations pehle, taaki unke messages ka foreign key mil jaaye
+        for table in ("conversations", "messages"):
+            for row in batch.get(table) or []:
+                try:
+                    self._write({table: [row]})
+                except Exception as e:
+                    error = e
+                    failed.setdefault(table, []).append(row)
+        return failed, error
+
+    def _write(self, batch):
+        # Conversations pehle (foreign key); dono upsert on id => retry/spool replay dobara chale to bhi safe
+        # Listeners ko DB ke lautaye rows milte hain
+        written = {}
+        if batch.get("conversations"):
+            start = time.perf_counter()
+            response = self.client.table("conversations").upsert(batch["conversations"]).execute()
+            DB_WRITE_SECONDS.observe(time.perf_counter() - start, table="conversations")
+            written["conversations"] = response.data or batch["conversations"]
+        if batch.get("messages"):
+            start = time.perf_counter()
+            response = self.client.table("messages").upsert(batch["messages"]).execute()
+            DB_WRITE_SECONDS.observe(time.perf_counter() - start, table="messages")
+            written["messages"] = response.data or batch["messages"]
+        self.rows_written += sum(len(rows) for rows in batch.values())
+        for listener in self._listeners:
+            try:
+                listener(written)
+            except Exception as e:
+                print(f"⚠️ Persistence listener failed: {e}")
+
+    def _spool(self, batch, attempts=0):
+        with self._spool_lock:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            path = os.path.join(self.spool_dir, f"{time.time():.6f}-{uuid.uuid4().hex[:8]}.json")
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"attempts": attempts, "batch": batch}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self.batches_spooled += 1
+
+    def _quarantine(self, batch, error):
+        os.makedirs(self.quarantine_dir, exist_ok=True)
+        path = os.path.join(self.quarantine_dir, f"{time.time():.6f}-{uuid.uuid4().hex[:8]}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"error": str(error), "batch": batch}, f, ensure_ascii=False)
+        rows = sum(len(r) for r in batch.values())
+        self.rows_quarantined += rows
+        print(f"🚫 {rows} rows failed {self.max_attempts} times, quarantined to {path}: {error}")
+
+    def _claim(self, path):
+        """Atomic rename: jo worker pehle rename kare wahi file replay karta hai (duplicate inserts nahi)."""
+        claimed = f"{path[:-len('.json')]}.{os.getpid()}.claimed"
+        try:
+            os.rename(path, claimed)
+        except OSError:
+            return None  # Kisi aur worker ne le liya
+        return claimed
+
+    def _release_stale_claims(self):
+        # Claim karke crash hua worker: uski files wapas spool me
+        for path in glob.glob(os.path.join(self.spool_dir, "*.claimed")):
+            try:
+                pid = int(path.rsplit(".", 2)[-2])
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                try:
+                    os.rename(path, f"{path.rsplit('.', 2)[0]}.json")
+                except OSError:
+                    pass
+            except (ValueError, OSError):
+                pass
+
+    def _db_reachable(self):
+        try:
+            self.client.table("conversations").select("id").limit(1).execute()
+            return True
+        except Exception:
+            return False
+
+    def _retry_spool(self):
+        self._release_stale_claims()
+        progress = False  # Is pass me koi row likha gaya? Nahi => DB down, attempts mat gino
+        failures = []
+        for path in sorted(glob.glob(os.path.join(self.spool_dir, "*.json"))):
+            if not progress and len(failures) >= 3:
+                break  # Lagatar files poori fail: outage lagta hai, DB ko hammer mat karo
+            claimed = self._claim(path)
+            if claimed is None:
+                continue
+            try:
+                with open(claimed, encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Unreadable spool file {os.path.basename(path)}, quarantining: {e}")
+                os.makedirs(self.quarantine_dir, exist_ok=True)
+                os.replace(claimed, os.path.join(self.quarantine_dir, os.path.basename(path)))
+                continue
+            # Purani files (attempts se pehle) seedha {table: rows} thi
+            batch, attempts = (data["batch"], data.get("attempts", 0)) if "batch" in data else (data, 0)
+            failed, error = self._write_or_split(batch)
+            os.remove(claimed)
+            rows, failed_rows = (sum(len(r) for r in b.values()) for b in (batch, failed))
+            progress = progress or failed_rows < rows
+            if failed:
+                failures.append((failed, error, attempts))
+            else:
+                self.batches_recovered += 1
+                print(f"♻️ Recovered spooled batch {os.path.basename(path)}")
+
+        # DB ne kuch rows liye (ya probe chala) aur ye phir bhi fail: row hi kharab hai, attempt gino
+        reachable = progress or (failures and self._db_reachable())
+        for failed, error, attempts in failures:
+            attempts += 1 if reachable else 0
+            if attempts >= self.max_attempts:
+                self._quarantine(failed, error)
+            else:
+                print(f"⚠️ Spool retry failed ({sum(len(r) for r in failed.values())} rows, "
+                      f"attempt {attempts}/{self.max_attempts}), will try again later: {error}")
+                self._spool(failed, attempts)
@@ -0,0 +1,260 @@
+import asyncio
+import hashlib
+import os
+import queue
+import re
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+
+from services.lazy import LazyObject
+
+# --- CONFIGURATION ---
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "remote").lower()  # remote | local
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))  # In-memory LRU entries
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "query_embeddings.sqlite3"),
+)
+# Local model ke liye micro-batching: itne requests ya itna wait, jo pehle ho
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "32"))
+EMBEDDING_MAX_WAIT_MS = float(os.getenv("EMBEDDING_MAX_WAIT_MS", "5"))
+
+_PUNCTUATION = re.compile(r"[?!.,;:'\"()\[\]{}।]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_query(text):
+    """"PM Kisan eligibility?" aur "pm kisan  eligibility" ko same key milni chahiye."""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = _PUNCTUATION.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+class EmbeddingCache:
+    """
+    In-memory LRU + SQLite store (restart ke baad bhi embeddings bache rehte hain).
+    LRU aur SQLite ke alag locks: ek slow commit memory hits ko nahi rokta.
+    """
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH, max_size=EMBEDDING_CACHE_SIZE):
+        self.max_size = max_size
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()  # Sirf LRU + counters
+        self._db_lock = threading.Lock()  # SQLite connection
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("CREATE TABLE IF NOT EXISTS query_embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Embedding disk cache disabled: {e}")
+                self._db = None
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def get_memory(self, key):
+        """Sirf in-memory LRU (koi I/O nahi): event loop pe safe. Miss gina nahi jaata, get() ginega."""
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            return vector
+
+    def get(self, key):
+        vector = self.get_memory(key)
+        if vector is not None:
+            return vector
+        row = None
+        if self._db is not None:
+            with self._db_lock:
+                row = self._db.execute("SELECT vector FROM query_embeddings WHERE key = ?", (key,)).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            vector = array("f", row[0]).tolist()
+            self._remember(key, vector)
+            self.disk_hits += 1
+            return vector
+
+    def put(self, key, vector):
+        with self._lock:
+            self._remember(key, vector)
+        if self._db is not None:
+            try:
+                with self._db_lock:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO query_embeddings (key, vector) VALUES (?, ?)",
+                        (key, array("f", vector).tobytes()),
+                    )
+                    self._db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Embedding disk cache write failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._memory),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+
+class CachedEmbeddings:
+    """
+    Kisi bhi LangChain embeddings ke aage normalized-query cache. Embeddings interface
+    (embed_query/embed_documents) duck-typed hai: langchain_core import cold start pe nahi.
+    """
+
+    def __init__(self, base, model_name=EMBEDDING_MODEL, cache=None):
+        self.base = base
+        self.model_name = model_name
+        self.cache = cache if cache is not None else EmbeddingCache()
+
+    def _key(self, text):
+        return hashlib.sha1(f"{self.model_name}\n{normalize_query(text)}".encode("utf-8")).hexdigest()
+
+    def embed_query(self, text):
+        key = self._key(text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.base.embed_query(text)
+            self.cache.put(key, vector)
+        return vector
+
+    async def aembed_query(self, text):
+        # Loop pe sirf memory LRU; SQLite read (commit ke peeche atak sakta hai) thread me
+        key = self._key(text)
+        vector = self.cache.get_memory(key)
+        if vector is None:
+            vector = await asyncio.to_thread(self.cache.get, key)
+        if vector is None:
+            vector = await self.base.aembed_query(text)
+            # SQLite commit event loop pe nahi (hazaaron concurrent misses pe loop atakta tha)
+            await asyncio.to_thread(self.cache.put, key, vector)
+        return vector
+
+    def embed_queries(self, texts):
+        """
+        Kai queries (batch/eval): cache me na mile unhe ek hi embed_documents call me,
+        duplicate queries ek baar. Order input jaisa.
+        """
+        keys = [self._key(text) for text in texts]
+        vectors = [self.cache.get(key) for key in keys]
+        missing = {}
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None and key not in missing:
+                missing[key] = text
+        if missing:
+            fresh = dict(zip(missing, self.base.embed_documents(list(missing.values()))))
+            for key, vector in fresh.items():
+                self.cache.put(key, vector)
+            vectors = [vector if vector is not None else fresh[key] for key, vector in zip(keys, vectors)]
+        return vectors
+
+    def embed_documents(self, texts):
+        # Documents (ingestion) ko cache nahi karte, sirf queries
+        return self.base.embed_documents(texts)
+
+
+class _LoopEvent:
+    """threading.Event jaisa set(), par asyncio future resolve karta hai (kisi bhi thread se)."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.future = loop.create_future()
+
+    def set(self):
+        self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(None))
+
+
+class MicroBatchingEmbeddings:
+    """
+    Concurrent embed_query calls ko ek embed_documents batch me jodta hai.
+    Local model pe ek batch ka forward pass N alag calls se kaafi sasta hai.
+    """
+
+    def __init__(self, base, max_batch=EMBEDDING_MAX_BATCH, max_wait_ms=EMBEDDING_MAX_WAIT_MS):
+        self.base = base
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def embed_query(self, text):
+        done = threading.Event()
+        slot = {"text": text, "done": done}
+        self._queue.put(slot)
+        done.wait()
+        if "error" in slot:
+            raise slot["error"]
+        return slot["vector"]
+
+    async def aembed_query(self, text):
+        # Event loop thread block nahi hota: batcher thread future ko loop pe resolve karta hai
+        done = _LoopEvent(asyncio.get_running_loop())
+        slot = {"text": text, "done": done}
+        self._queue.put(slot)
+        await done.future
+        if "error" in slot:
+            raise slot["error"]
+        return slot["vector"]
+
+    def embed_documents(self, texts):
+        return self.base.embed_documents(texts)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self.max_batch:
+                    batch.append(self._queue.get(timeout=self.max_wait))
+            except queue.Empty:
+                pass
+            try:
+                vectors = self.base.embed_documents([slot["text"] for slot in batch])
+                for slot, vector in zip(batch, vectors):
+                    slot["vector"] = vector
+            except Exception as e:
+                for slot in batch:
+                    slot["error"] = e
+            for slot in batch:
+                slot["done"].set()
+
+
+def build_query_embeddings(backend=EMBEDDING_BACKEND):
+    """
+    Request path ke liye embeddings: remote (HF API) ya local model, dono cached.
+    Base model/client lazy hai: langchain_huggingface (aur local model) pehli query ya prewarm pe load.
+    """
+    if backend == "local":
+        def build_base():
+            # Same model jo ingest_local.py use karta hai, isliye vectors compatible hain
+            from langchain_huggingface import HuggingFaceEmbeddings
+            print("💻 Loading Local Embedding Model for queries...")
+            return MicroBatchingEmbeddings(HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL))
+    else:
+        def build_base():
+            from langchain_huggingface import HuggingFaceEndpointEmbeddings
+            return HuggingFaceEndpointEmbeddings(
+                model=EMBEDDING_MODEL,
+                huggingfacehub_api_token=os.getenv("HUGGINGFACEHUB_API_TOKEN")
+            )
+    return CachedEmbeddings(LazyObject(build_base, f"{backend}_embeddings"))
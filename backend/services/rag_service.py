@@ -1,106 +1,496 @@
-
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from supabase import create_client
+# .env pehle load karo: services ke modules import time pe config padhte hain
+load_dotenv()
+# Cold start: supabase, LangChain, Groq/Gemini, HF ke imports pehli zaroorat (ya prewarm) tak tale hain
+from services.lazy import LazyObject, resolve
+from services.corpus_version import use_corpus_version_client
 # LangChain VectorStore hata diya (Kyunki wo error de raha tha)
-# Cloud Embeddings
-from langchain_huggingface import HuggingFaceEndpointEmbeddings
-# LLMs
-from langchain_groq import ChatGroq
-from langchain_google_genai import ChatGoogleGenerativeAI
-# Prompts & Chains
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
-from langchain_core.output_parsers import StrOutputParser
+# Query Embeddings (Cached; Cloud ya Local)
+from services.query_embeddings import build_query_embeddings, normalize_query
+# In-process vector search (RPC round trip ke bina)
+from services.vector_index import LocalVectorStore
+# Vector + BM25 keyword search, kam par behtar chunks
+from services.hybrid_retrieval import HybridRetriever, LocalKeywordStore
+# Region/category partitions: query sirf relevant subset me dhundti hai
+from services.partitions import classify_query, partition_metrics, PARTITIONED_RETRIEVAL_ENABLED, PARTITION_RPC
+# Long-lived LLM clients + circuit breaker
+from services.model_router import ModelRouter, Provider
+# Curated schemes ke seedhe lookup sawaal: precomputed answer, na retrieval na LLM
+from services.scheme_index import fast_path, FAST_PATH_ENABLED
+# Near-duplicate questions ke liye LLM skip
+from services.answer_cache import answer_cache, ANSWER_CACHE_ENABLED
+# Overlap/duplicate hata ke, token budget me context
+from services.context_assembly import (
+    assemble_context, context_metrics, estimate_tokens, CONTEXT_ASSEMBLY_ENABLED, CONTEXT_TOKEN_BUDGET,
+)
+# Same sawaal ek saath aaye to ek hi computation
+from services.single_flight import single_flight, SINGLE_FLIGHT_ENABLED
+# Stage timings + /metrics counters
+from services.telemetry import span, run_in_context, CACHE_LOOKUPS, LLM_TOKENS
 
-load_dotenv()
+NO_HISTORY = "None"
+FALLBACK_MESSAGE = "⚠️ Sorry, I am facing a technical issue fetching the data."
+# Batch (eval / bulk answering): ek saath itni LLM calls, aur RPC backend pe itne parallel lookups
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "8"))
+BATCH_RETRIEVE_CONCURRENCY = int(os.getenv("BATCH_RETRIEVE_CONCURRENCY", "8"))
 
 # --- 1. SETUP DATABASE & EMBEDDINGS ---
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-# Cloud Embeddings (HuggingFace API)
-embeddings = HuggingFaceEndpointEmbeddings(
-    model="sentence-transformers/all-MiniLM-L6-v2",
-    huggingfacehub_api_token=os.getenv("HUGGINGFACEHUB_API_TOKEN")
-)
+def build_supabase_client():
+    from supabase import create_client
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
 
-def get_rag_response(query_text):
-    try:
-        # print(f"\n🔍 Searching via API for: {query_text}")
-        
-        # --- 1. MANUAL RETRIEVAL (Bypassing LangChain Wrapper) ---
-        # Pehle query ko vector me convert karo
+# Process-wide ek hi client (app.py ke routes bhi yahi use karte hain)
+supabase = LazyObject(build_supabase_client, "supabase")
+# Corpus version Supabase se: ingest dusre host pe chale tab bhi answer cache invalid ho
+use_corpus_version_client(supabase)
+
+# Embeddings: Cloud (HuggingFace API) ya Local model, dono ke aage query cache
+# EMBEDDING_BACKEND=remote|local
+embeddings = build_query_embeddings()
+
+# Retrieval backend: "rpc" (Supabase match_documents) ya "local" (in-process NumPy index)
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "rpc").lower()
+local_index = LocalVectorStore(supabase) if RETRIEVAL_BACKEND == "local" else None
+# Hybrid retrieval: scheme names jaise exact terms BM25 se, baaki vector se. BM25 index har worker
+# poori `documents` table download karke banata hai, isliye default sirf local backend pe (wahan vectors
+# bhi waise hi aate hain); rpc backend pe HYBRID_RETRIEVAL_ENABLED=true se hi
+HYBRID_RETRIEVAL_ENABLED = os.getenv(
+    "HYBRID_RETRIEVAL_ENABLED", "true" if RETRIEVAL_BACKEND == "local" else "false"
+).lower() == "true"
+
+# --- 2. PROMPT TEMPLATE (Ek baar build, har request me reuse) ---
+RAG_TEMPLATE = """
+You are Niti.ai, an advanced AI assistant for Indian Government Schemes.
+Your goal is to provide accurate, helpful, and detailed information based ONLY on the provided context.
+
+Context: {context}
+Conversation so far (only to understand follow-up questions): {history}
+User Question: {question}
+
+GUIDELINES:
+1. Answer the user's question directly using the context provided.
+2. If the answer is found in the context, explain it in detail (Eligibility, Benefits, Documents).
+3. If the context does NOT contain the answer, simply say: "Mujhe iske baare mein abhi jaankari nahi hai." (Do not mention other topics like Charusat or MYSY unless asked).
+4. Format the answer nicely with bullet points.
+5. Always reply in the same language as the user (Hinglish/Hindi/English).
+6. Do NOT mention that you are checking for Charusat or Scholarships unless the user specifically asked for them.
+
+Answer:
+"""
+
+def build_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_template(RAG_TEMPLATE)
+
+prompt = LazyObject(build_prompt, "prompt")
+
+# --- 3. DEFINE MODELS (Process-wide, lazily built once) ---
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))  # Seconds
+
+def build_groq_llm():
+    # Primary: Groq (Llama 3.3)
+    from langchain_groq import ChatGroq
+    return ChatGroq(
+        model="llama-3.3-70b-versatile",
+        temperature=0.3,
+        api_key=os.getenv("GROQ_API_KEY"),
+        timeout=LLM_TIMEOUT
+    )
+
+def build_gemini_llm():
+    # Backup: Gemini (Flash 1.5)
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model="gemini-1.5-flash",
+        temperature=0.3,
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        timeout=LLM_TIMEOUT
+    )
+
+# Context ka hard token budget har model ka alag (chhota prompt = kam latency/cost)
+model_router = ModelRouter([
+    Provider("Groq", build_groq_llm,
+             context_tokens=int(os.getenv("CONTEXT_TOKEN_BUDGET_GROQ", str(CONTEXT_TOKEN_BUDGET)))),
+    Provider("Gemini", build_gemini_llm,
+             context_tokens=int(os.getenv("CONTEXT_TOKEN_BUDGET_GEMINI", str(CONTEXT_TOKEN_BUDGET)))),
+], prompt)
+
+# DB me filtered function na ho (migration nahi chala) to pehli error ke baad match_documents hi
+filtered_rpc_available = True
+
+
+def missing_function_error(error):
+    # PostgREST: function schema cache me nahi (PGRST202)
+    return "PGRST202" in str(error) or "Could not find the function" in str(error)
+
+
+def filter_rows(rows, partition):
+    """Bina filter wale RPC ke rows pe partition filter; kuch na bache to saare (khali context se behtar)."""
+    if partition is None:
+        return rows
+    return [row for row in rows if partition.matches(row.get("metadata"))] or rows
+
+
+def retrieve_documents(query_vector, match_threshold=0.1, match_count=6, partition=None):
+    """Local index ready ho to wahi, warna Supabase RPC (partition ho to filtered function)."""
+    global filtered_rpc_available
+    if local_index is not None:
+        docs = local_index.search(query_vector, match_threshold=match_threshold, match_count=match_count,
+                                  partition=partition)
+        if docs is not None:
+            return docs
+
+    params = {
+        "query_embedding": query_vector,
+        "match_threshold": match_threshold, # Loose matching
+        "match_count": match_count
+    }
+    if partition is not None and filtered_rpc_available:
+        try:
+            return supabase.rpc(PARTITION_RPC, dict(params, **partition.rpc_params())).execute().data or []
+        except Exception as e:
+            if not missing_function_error(e):
+                raise
+            filtered_rpc_available = False
+            print(f"⚠️ {PARTITION_RPC} not found, using match_documents + client-side filter")
+
+    # Seedha Supabase RPC ko call karo (No Version Conflicts!)
+    response = supabase.rpc("match_documents", params).execute()
+    return filter_rows(response.data or [], partition)
+
+
+def retrieve_documents_batch(query_vectors, match_threshold=0.1, match_count=6, partitions=None):
+    """
+    retrieve_documents kai vectors ke liye. Local index: ek matmul me sab (partition-wise groups).
+    RPC: match_documents ek hi vector leta hai, isliye calls BATCH_RETRIEVE_CONCURRENCY tak parallel.
+    """
+    partitions = partitions or [None] * len(query_vectors)
+    if local_index is not None:
+        results = local_index.search_batch(query_vectors, match_threshold=match_threshold, match_count=match_count,
+                                           partitions=partitions)
+        if results is not None:
+            return results
+    search = lambda args: retrieve_documents(args[0], match_threshold, match_count, partition=args[1])
+    if len(query_vectors) <= 1:
+        return [search(args) for args in zip(query_vectors, partitions)]
+    with ThreadPoolExecutor(max_workers=min(BATCH_RETRIEVE_CONCURRENCY, len(query_vectors))) as pool:
+        return list(pool.map(search, zip(query_vectors, partitions)))
+
+
+hybrid_retriever = HybridRetriever(retrieve_documents, LocalKeywordStore(supabase),
+                                   vector_search_batch=retrieve_documents_batch) if HYBRID_RETRIEVAL_ENABLED else None
+
+
+def warmup_steps():
+    """
+    Prewarm (services/warmup.py) ke steps, pehli /chat jis order me inki zaroorat padti hai.
+    Network call koi nahi: sirf imports, client objects aur disk snapshots.
+    """
+    steps = [
+        ("supabase", supabase.resolve),
+        ("embeddings", lambda: resolve(embeddings.base)),
+        ("llm", lambda: [model_router.chain_for(provider) for provider in model_router.providers]),
+    ]
+    if hybrid_retriever is not None:
+        # Sirf disk snapshot; DB download (na ho / purana ho to) pehli search pe background me
+        steps.append(("keyword_index", hybrid_retriever.keyword_store.load_snapshot))
+    if local_index is not None:
+        steps.append(("vector_index", local_index.ensure_loaded))
+    if FAST_PATH_ENABLED:
+        steps.append(("scheme_index", fast_path.ensure_loaded))
+    return steps
+
+
+def fast_path_answer(query_text):
+    """Known scheme ka seedha sawaal (eligibility/benefits/documents) ho to precomputed answer, warna None."""
+    if not FAST_PATH_ENABLED:
+        return None
+    with span("fast_path"):
+        answer = fast_path.answer(query_text)
+    CACHE_LOOKUPS.inc(cache="fast_path", result="miss" if answer is None else "hit")
+    if answer is not None:
+        print("🏎️ Fast Path Hit (no LLM)")
+    return answer
+
+
+def choose_partition(query_text):
+    """Query ka PartitionFilter (partitions band ho to None), metrics ke saath."""
+    if not PARTITIONED_RETRIEVAL_ENABLED:
+        return None
+    partition = classify_query(query_text)
+    partition_metrics.record(partition, local_index.scan_fraction(partition) if local_index is not None else None)
+    return partition
+
+
+def retrieve_for_query(query_text, query_vector, partition):
+    def search(partition):
+        if hybrid_retriever is not None:
+            return hybrid_retriever.retrieve(query_text, query_vector, partition=partition)
+        return retrieve_documents(query_vector, partition=partition)
+
+    docs = search(partition)
+    if not docs and partition is not None:
+        # Classifier ne galat partition chuna ho sakta hai: poore corpus me dobara
+        partition_metrics.record_fallback()
+        docs = search(None)
+    return docs
+
+
+def prepare_rag_inputs(query_text, use_cache=True):
+    """
+    Retrieval + cache check. Returns (query_vector, chunk_ids, context_text, cached_answer).
+    cached_answer None na ho to LLM call karne ki zaroorat nahi.
+    """
+    # --- 1. MANUAL RETRIEVAL (Bypassing LangChain Wrapper) ---
+    # Pehle query ko vector me convert karo
+    with span("embed"):
         query_vector = embeddings.embed_query(query_text)
-        
-        # Seedha Supabase RPC ko call karo (No Version Conflicts!)
-        response = supabase.rpc("match_documents", {
-            "query_embedding": query_vector,
-            "match_threshold": 0.1, # Loose matching
-            "match_count": 6
-        }).execute()
-        
-        # Context String banao
-        context_text = ""
-        if response.data:
-            for doc in response.data:
-                context_text += doc['content'] + "\n\n"
+
+    with span("retrieve"):
+        docs = retrieve_for_query(query_text, query_vector, choose_partition(query_text))
+
+    return (query_vector, *build_context(query_vector, docs, use_cache))
+
+
+def answer_cacheable(history_text):
+    """
+    Answer cache sirf (query, chunks) pe key hai: history ke saath likha answer dusre
+    conversation (ya naye chat) ko nahi milna chahiye, isliye follow-ups cache ke bahar.
+    """
+    return ANSWER_CACHE_ENABLED and history_text == NO_HISTORY
+
+
+def build_context(query_vector, docs, use_cache=True):
+    """
+    Retrieval ke baad ka hissa (sync aur async path dono ka): answer cache check + context.
+    Returns (chunk_ids, context_text, cached_answer).
+    """
+    # Semantic Cache: same chunks + similar query => purana answer, LLM skip
+    chunk_ids = [doc.get('id') for doc in docs]
+    if ANSWER_CACHE_ENABLED and use_cache:
+        cached_answer = answer_cache.lookup(query_vector, chunk_ids)
+        CACHE_LOOKUPS.inc(cache="answer", result="miss" if cached_answer is None else "hit")
+        if cached_answer is not None:
+            print("⚡ Answer Cache Hit")
+            return chunk_ids, None, cached_answer
+
+    # Context String banao
+    context_text = ""
+    if docs and CONTEXT_ASSEMBLY_ENABLED:
+        with span("context"):
+            context_text, context_stats = assemble_context(
+                docs, token_budget=model_router.context_budget(CONTEXT_TOKEN_BUDGET)
+            )
+        context_metrics.record(context_stats)
+        print(f"✂️ Context: {context_stats['tokens_in']} -> {context_stats['tokens_out']} tokens "
+              f"({context_stats['chunks_in']} -> {context_stats['chunks_out']} chunks)")
+    elif docs:
+        for doc in docs:
+            context_text += doc['content'] + "\n\n"
+    else:
+        print("⚠️ No matches found in DB.")
+        context_text = "No specific data found."
+
+    return chunk_ids, context_text, None
+
+
+def record_tokens(context_text, query_text, answer, history_text=NO_HISTORY):
+    # Estimate (chars/4), tokenizer call hot path pe nahi
+    LLM_TOKENS.inc(estimate_tokens(RAG_TEMPLATE) + estimate_tokens(context_text) + estimate_tokens(query_text)
+                   + estimate_tokens(history_text), direction="in")
+    LLM_TOKENS.inc(estimate_tokens(answer), direction="out")
+
+
+def resolve_question(query_text, memory=None):
+    """
+    Conversation memory ho to follow-up ko standalone question banao (embedding isi ka hota hai).
+    Returns (question, history_text, single_flight_key).
+    """
+    if memory is None or memory.empty:
+        return query_text, NO_HISTORY, normalize_query(query_text)
+    with span("rewrite"):
+        question = memory.rewrite(query_text)
+    # Alag history => alag answer, isliye key me history ka digest bhi
+    return question, memory.prompt_text(), f"{normalize_query(question)}#{memory.digest()}"
+
+
+def generate_answer(query_text, history_text=NO_HISTORY):
+    """Retrieval + LLM, bina error handling ke (single-flight ke andar chalta hai)."""
+    cacheable = answer_cacheable(history_text)
+    query_vector, chunk_ids, context_text, cached_answer = prepare_rag_inputs(query_text, cacheable)
+    if cached_answer is not None:
+        return cached_answer
+
+    # --- 2. EXECUTION LOGIC (Groq -> Gemini via Router) ---
+    with span("llm"):
+        answer = model_router.invoke({"context": context_text, "history": history_text, "question": query_text})
+    record_tokens(context_text, query_text, answer, history_text)
+
+    if cacheable:
+        answer_cache.store(query_vector, chunk_ids, answer)
+    return answer
+
+
+def get_rag_response(query_text, memory=None):
+    """memory: conversation_memory.MemoryContext (follow-ups ke liye), naye conversation me None."""
+    try:
+        question, history_text, key = resolve_question(query_text, memory)
+        # Follow-up ho to rewrite ke baad wala standalone question hi match hota hai
+        answer = fast_path_answer(question)
+        if answer is not None:
+            return answer
+        if SINGLE_FLIGHT_ENABLED:
+            # Same normalized query pehle se chal rahi ho to usi ka answer
+            return single_flight.do(key, lambda: generate_answer(question, history_text))
+        return generate_answer(question, history_text)
+
+    except Exception as e:
+        print(f"❌ RAG Critical Error: {str(e)}")
+        return FALLBACK_MESSAGE
+
+
+def batch_rag_responses(queries, concurrency=BATCH_LLM_CONCURRENCY):
+    """
+    Bahut saare sawaal ek saath (eval / bulk answering), bina memory/single-flight ke:
+    fast path wale turant, baaki queries ka ek batched embedding call, ek batched retrieval,
+    phir LLM calls `concurrency` tak parallel. Har item complete hote hi yield hota hai
+    (completion order; `index` input ka position batata hai), per-item timings ke saath (ms).
+    """
+    queries = list(queries)
+    if not queries:
+        return
+    started = time.perf_counter()
+    ms = lambda seconds: round(seconds * 1000, 1)
+    pending = []
+    for i, query in enumerate(queries):
+        fast_answer = fast_path_answer(query)
+        if fast_answer is None:
+            pending.append(i)
         else:
-            print("⚠️ No matches found in DB.")
-            context_text = "No specific data found."
-
-        # --- 2. PROMPT TEMPLATE ---
-        
-        # 👇 OLD PROMPT HATA KAR YE NEW WALA RAKHEIN:
-        template = """
-        You are Niti.ai, an advanced AI assistant for Indian Government Schemes.
-        Your goal is to provide accurate, helpful, and detailed information based ONLY on the provided context.
-
-        Context: {context}
-        User Question: {question}
-
-        GUIDELINES:
-        1. Answer the user's question directly using the context provided.
-        2. If the answer is found in the context, explain it in detail (Eligibility, Benefits, Documents).
-        3. If the context does NOT contain the answer, simply say: "Mujhe iske baare mein abhi jaankari nahi hai." (Do not mention other topics like Charusat or MYSY unless asked).
-        4. Format the answer nicely with bullet points.
-        5. Always reply in the same language as the user (Hinglish/Hindi/English).
-        6. Do NOT mention that you are checking for Charusat or Scholarships unless the user specifically asked for them.
-
-        Answer:
-        """
-        
-        prompt = ChatPromptTemplate.from_template(template)
-
-        # --- 3. DEFINE MODELS ---
-        # Primary: Groq (Llama 3.3)
-        groq_llm = ChatGroq(
-            model="llama-3.3-70b-versatile",
-            temperature=0.3,
-            api_key=os.getenv("GROQ_API_KEY")
-        )
-
-        # Backup: Gemini (Flash 1.5)
-        gemini_llm = ChatGoogleGenerativeAI(
-            model="gemini-1.5-flash",
-            temperature=0.3,
-            google_api_key=os.getenv("GOOGLE_API_KEY")
-        )
-
-        # --- 4. EXECUTION LOGIC ---
+            yield {"index": i, "query": query, "cached": False, "fast_path": True, "response": fast_answer,
+                   "chunk_ids": [], "timings_ms": {"total": ms(time.perf_counter() - started)}}
+    if not pending:
+        return
+
+    pending_queries = [queries[i] for i in pending]
+    with span("embed"):
+        vectors = dict(zip(pending, embeddings.embed_queries(pending_queries)))
+    embedded = time.perf_counter()
+    with span("retrieve"):
+        vector_list = [vectors[i] for i in pending]
+        partitions = [choose_partition(query) for query in pending_queries]
+        if hybrid_retriever is not None:
+            docs_list = hybrid_retriever.retrieve_batch(pending_queries, vector_list, partitions=partitions)
+        else:
+            docs_list = retrieve_documents_batch(vector_list, partitions=partitions)
+        docs_by_index = {}
+        for i, docs, partition in zip(pending, docs_list, partitions):
+            if not docs and partition is not None:
+                # Filter ne kuch nahi diya (rare): sirf is query ke liye poora corpus
+                partition_metrics.record_fallback()
+                docs = retrieve_for_query(queries[i], vectors[i], None)
+            docs_by_index[i] = docs
+    retrieved = time.perf_counter()
+    print(f"📦 Batch: {len(pending)}/{len(queries)} queries embedded in {embedded - started:.2f}s, "
+          f"retrieved in {retrieved - embedded:.2f}s")
+
+    def answer(i):
+        item_started = time.perf_counter()
+        item = {"index": i, "query": queries[i], "cached": False, "fast_path": False}
+        timings = {"embed": ms(embedded - started), "retrieve": ms(retrieved - embedded),
+                   "queue": ms(item_started - retrieved)}  # embed/retrieve poore batch ke shared hain
         try:
-            print("🤖 Trying Primary Model (Groq)...")
-            chain = prompt | groq_llm | StrOutputParser()
-            return chain.invoke({"context": context_text, "question": query_text})
+            context_started = time.perf_counter()
+            chunk_ids, context_text, cached_answer = build_context(vectors[i], docs_by_index[i])
+            timings["context"] = ms(time.perf_counter() - context_started)
+            if cached_answer is not None:
+                item["response"], item["cached"] = cached_answer, True
+            else:
+                llm_started = time.perf_counter()
+                with span("llm"):
+                    result = model_router.invoke({"context": context_text, "history": NO_HISTORY,
+                                                  "question": queries[i]})
+                timings["llm"] = ms(time.perf_counter() - llm_started)
+                record_tokens(context_text, queries[i], result)
+                if ANSWER_CACHE_ENABLED:
+                    answer_cache.store(vectors[i], chunk_ids, result)
+                item["response"] = result
+            item["chunk_ids"] = chunk_ids
+        except Exception as e:
+            print(f"❌ Batch item {i} failed: {str(e)}")
+            item["response"], item["error"] = FALLBACK_MESSAGE, str(e)
+        timings["total"] = ms(time.perf_counter() - started)
+        item["timings_ms"] = timings
+        return item
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(queries))), thread_name_prefix="rag-batch")
+    try:
+        # Worker threads ke logs/spans bhi isi request ID pe
+        futures = [pool.submit(run_in_context(answer), i) for i in pending]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # Consumer beech me ruk jaye (client disconnect) to bache LLM calls shuru hi mat karo
+        pool.shutdown(wait=False, cancel_futures=True)
 
-        except Exception as groq_error:
-            print(f"⚠️ Groq Failed: {groq_error}")
-            print("🔄 Switching to Backup Model (Gemini)...")
-            
-            chain = prompt | gemini_llm | StrOutputParser()
-            return chain.invoke({"context": context_text, "question": query_text})
+
+def stream_rag_response(query_text, memory=None):
+    """
+    get_rag_response ka streaming version: answer ke tokens yield karta hai.
+    Error aane par wahi friendly message yield hota hai jo non-streaming path deta hai.
+    Same query pehle se chal rahi ho to uska poora answer ek hi event me milta hai.
+    """
+    query_text, history_text, key = resolve_question(query_text, memory)
+    answer = fast_path_answer(query_text)
+    if answer is not None:
+        yield answer
+        return
+    call, leader = single_flight.join(key) if SINGLE_FLIGHT_ENABLED else (None, True)
+    if not leader:
+        try:
+            yield call.wait()
+        except Exception as e:
+            print(f"❌ RAG Stream Error: {str(e)}")
+            yield FALLBACK_MESSAGE
+        return
+
+    parts, answer, error = [], None, None
+    cacheable = answer_cacheable(history_text)
+    try:
+        query_vector, chunk_ids, context_text, cached_answer = prepare_rag_inputs(query_text, cacheable)
+        if cached_answer is not None:
+            answer = cached_answer
+            yield cached_answer
+            return
+
+        with span("llm"):
+            for token in model_router.stream({"context": context_text, "history": history_text,
+                                              "question": query_text}):
+                parts.append(token)
+                yield token
+        answer = "".join(parts)
+        record_tokens(context_text, query_text, answer, history_text)
+
+        if cacheable:
+            answer_cache.store(query_vector, chunk_ids, answer)
 
     except Exception as e:
-        print(f"❌ RAG Critical Error: {str(e)}")
-        return "⚠️ Sorry, I am facing a technical issue fetching the data."
\ No newline at end of file
+        error = e
+        print(f"❌ RAG Stream Error: {str(e)}")
+        if parts:
+            # Aadha answer already chala gaya, caller ko batao
+            raise
+        yield FALLBACK_MESSAGE
+    finally:
+        # Client beech me chala jaye tab bhi waiting requests ko chhodna hai
+        if call is not None:
+            if answer is not None:
+                single_flight.finish(key, call, result=answer)
+            else:
+                single_flight.finish(key, call, error=error or RuntimeError("stream closed before completion"))
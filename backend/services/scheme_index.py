@@ -0,0 +1,452 @@
+"""
+Zero-LLM fast path: curated schemes (data/*.txt + ingest_charusat ka HARDCODED_RULES) ke
+seedhe lookup sawaal ("PM Kisan eligibility?", "Mudra loan kitna milta hai") ka jawab precomputed
+index se, bina embedding/retrieval/LLM ke.
+
+Index ingest ke waqt banta hai (`build_scheme_index`): har scheme ke aliases (naam, abbreviation,
+Latin script me spelling variants jaise "yojna", "kishan") aur har section (eligibility/benefits/
+documents/...) ka formatted answer. Query time pe ek Aho-Corasick automaton saare aliases + intent
+words ek hi pass me dhundta hai. Jawab tabhi jab match confident ho: ek hi scheme, intent saaf, aur
+koi anjaan content word nahi.
+
+Fast path sirf English (Latin script) sawaalon ke liye hai: canned answers data files ki English me
+hain. Hindi/Gujarati script aur Hinglish ("pm kisan kitna milta hai") dono RAG pe jaate hain
+(RAG_TEMPLATE: user ki bhasha me jawab). Baaki sab (comparison, personal situation, complaint) bhi RAG pe.
+"""
+import glob
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+
+from services.hybrid_retrieval import STOPWORDS
+
+# --- CONFIGURATION ---
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+SCHEME_INDEX_PATH = os.getenv("SCHEME_INDEX_PATH", os.path.join(BACKEND_DIR, ".cache", "scheme_index.json"))
+SCHEME_DATA_DIR = os.getenv("SCHEME_DATA_DIR", os.path.join(BACKEND_DIR, "data"))
+# Lamba sawaal = aksar personal situation/reasoning, LLM ko do
+FAST_PATH_MAX_WORDS = int(os.getenv("FAST_PATH_MAX_WORDS", "14"))
+# Scheme naam + intent + fillers ke baad itne anjaan words tak hi fast path. 0: "hospital", "ekyc"
+# jaisa ek bhi word section ke bahar ka sawaal ho sakta hai, galat canned answer se RAG behtar
+FAST_PATH_MAX_EXTRA_WORDS = int(os.getenv("FAST_PATH_MAX_EXTRA_WORDS", "0"))
+# Disk snapshot (ingest ne naya likha?) itne seconds me ek baar check
+FAST_PATH_RELOAD_INTERVAL = float(os.getenv("FAST_PATH_RELOAD_INTERVAL", "30"))
+INDEX_FORMAT = 1
+
+# Sirf Latin tokens: non-ASCII script wale sawaal match() me pehle hi RAG pe chale jaate hain
+_SEPARATORS = re.compile(r"[^0-9a-z]+")
+# Scheme naamon ke spelling variants -> ek canonical token (patterns aur queries dono pe lagta hai)
+SPELLINGS = {
+    "yojna": "yojana", "yojanaa": "yojana", "yojnaa": "yojana", "pradhanmantri": "pm",
+    "aayushman": "ayushman", "ayushmaan": "ayushman", "kishan": "kisan", "samridhi": "samriddhi",
+    "samrudhi": "samriddhi", "samruddhi": "samriddhi", "ujjwalah": "ujjwala", "ujwala": "ujjwala",
+    "ujjawala": "ujjwala", "vishvakarma": "vishwakarma", "vishwakarama": "vishwakarma", "mudhra": "mudra",
+    "awaas": "awas", "aawas": "awas", "grameen": "gramin", "pention": "pension", "penshan": "pension",
+    "documents": "document", "docs": "document",
+}
+_PHRASES = ((" pradhan mantri ", " pm "), (" p m ", " pm "))
+
+# Naam se apne aap na banne wale aliases (short forms, bol-chaal), scheme id ke hisaab se
+SCHEME_ALIASES = {
+    "pm_kisan": ["kisan samman nidhi", "pm kisan yojana", "kisan nidhi"],
+    "pm_mudra": ["mudra", "mudra loan", "mudra yojana"],
+    "ayushman_bharat": ["ayushman", "ayushman card", "pmjay", "pm jay", "jan arogya yojana"],
+    "sukanya_samriddhi": ["sukanya", "ssy", "sukanya yojana"],
+    "atal_pension": ["apy", "atal pension"],
+    "mysy": ["mukhyamantri yuva swavalamban", "yuva swavalamban"],
+    "pm_ujjwalah": ["ujjwala", "ujjwala gas", "pmuy"],
+    "pm_vishwakarma": ["vishwakarma"],
+    "pm_awaste": ["pmay g", "pmayg", "pm awas gramin", "awas yojana gramin", "gramin awas yojana",
+                  "pm awas yojana gramin"],
+    "digital_india_internship": ["meity internship", "digital india internship"],
+}
+
+# Intent -> trigger words/phrases (normalize ke baad match hote hain)
+INTENT_WORDS = {
+    "eligibility": ["eligibility", "eligible", "criteria", "qualify", "who can", "age limit"],
+    "benefits": ["benefit", "benefits", "stipend", "amount", "how much", "installment"],
+    "documents": ["document", "papers"],
+    "apply": ["apply", "application", "register", "registration", "how to apply"],
+    "overview": ["what is", "details", "detail", "information", "info"],
+}
+# Hinglish ke pehchaan wale words: English canned answer ki jagah RAG user ki bhasha me jawab de.
+# Scheme naam (yojana, awas, gramin) Hindi hote hue bhi naam hain, yahan nahi
+HINGLISH_WORDS = frozenset("""
+kya hai hain ka ke ki ko se mein liye aur ye yeh wo woh kaise kaun kon kitna kitni kitne milta milti milte
+milega paisa paise rashi labh laabh fayda faida fayde kist patra patrata yogyata umar umra dastavej dastavez
+kagaz kagaj kagzat kagzaat avedan kare karein karna jankari jaankari chahiye lagte lagta lagenge mujhe kripya
+bataye batayein batao btao bta sabhi saare sare
+""".split())
+# Ye words aaye to sawaal lookup nahi (comparison, complaint, "kyun"): RAG/LLM hi sahi
+DISQUALIFIERS = frozenset("""
+vs versus compare comparison difference fark farak antar better best why kyun kyu kyon nahi nahin
+not status problem issue reject rejected complaint shikayat band stopped when kab kabhi date last
+""".split())
+# Intent/scheme ke alawa ye words "extra" nahi gine jaate
+FILLERS = STOPWORDS | frozenset("""
+scheme schemes yojana please pls tell give list required require need needed
+under get getting full complete detail me rupaye rupees rs scheme's card loan
+""".split())
+
+# Data file headings -> section keys
+SECTION_KEYWORDS = (("eligib", "eligibility"), ("benefit", "benefits"), ("loan categor", "benefits"),
+                    ("document", "documents"), ("descri", "overview"), ("applica", "apply"), ("apply", "apply"),
+                    ("link", "link"))
+SECTION_TITLES = {"eligibility": "Eligibility", "benefits": "Benefits", "documents": "Documents Required",
+                  "apply": "How to Apply", "overview": "Overview"}
+
+
+def normalize(text):
+    """Lowercase, punctuation hata ke, spelling variants canonical. Space-padded (word boundary ke liye)."""
+    tokens = [SPELLINGS.get(t, t) for t in _SEPARATORS.split((text or "").lower()) if t]
+    padded = " " + " ".join(tokens) + " "
+    for phrase, canonical in _PHRASES:
+        padded = padded.replace(phrase, canonical)
+    return padded
+
+
+def slugify(text):
+    return "_".join(normalize(text).split())
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher: saare patterns (aliases + intent words) ek hi scan me, query length
+    ke linear time me, chahe patterns kitne bhi hon. Patterns space-padded hain isliye
+    match hamesha poore words pe hota hai.
+    """
+
+    def __init__(self, patterns):
+        # patterns: {pattern_text: value}
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern, value in patterns.items():
+            state = 0
+            for char in pattern:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append((len(pattern), value))
+
+        # BFS: fail link = longest proper suffix jo kisi pattern ka prefix bhi ho
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def __len__(self):
+        return len(self._goto)
+
+    def find(self, text):
+        """Saare (start, end, value) matches, overlapping bhi."""
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, value in self._out[state]:
+                yield i + 1 - length, i + 1, value
+
+
+def longest_matches(matches):
+    """Leftmost-longest, bina overlap ke (padding ka shared space overlap nahi maana jaata)."""
+    chosen, last_end = [], 0
+    for start, end, value in sorted(matches, key=lambda m: (m[0], -(m[1] - m[0]))):
+        if start >= last_end - 1:
+            chosen.append((start, end, value))
+            last_end = end
+    return chosen
+
+
+# --- INDEX BUILD (ingest time) ---
+def parse_scheme_file(text):
+    """`# Scheme Name:` format wali data/*.txt -> {name, state, sector, sections, link}."""
+    scheme = {"name": None, "state": None, "sector": None, "link": None, "sections": {}}
+    key, lines = None, []
+
+    def flush():
+        body = "\n".join(lines).strip()
+        if key and body:
+            if key == "link":
+                scheme["link"] = body.split()[0]
+            else:
+                # "Loan Categories" jaise extra headings usi section me jud jaate hain
+                existing = scheme["sections"].get(key)
+                scheme["sections"][key] = f"{existing}\n{body}" if existing else body
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.lower().startswith("# scheme name:"):
+            scheme["name"] = stripped.split(":", 1)[1].strip()
+        elif key is None and stripped.lower().startswith(("state:", "sector:")):
+            field, value = stripped.split(":", 1)
+            scheme[field.lower()] = value.strip()
+        elif stripped.startswith("## "):
+            flush()
+            heading = stripped[3:].lower()
+            key = next((k for word, k in SECTION_KEYWORDS if word in heading), None)
+            lines = []
+        elif key is not None:
+            lines.append(line.rstrip())
+    flush()
+    return scheme
+
+
+def parse_summary_rules(text):
+    """HARDCODED_RULES jaisa "1. Scheme Name:\\n   - bullet" text -> [{name, sections}]."""
+    schemes, current = [], None
+    for line in text.splitlines():
+        header = re.match(r"^\s*\d+\.\s+(.+?):\s*$", line)
+        if header:
+            current = {"name": header.group(1).strip(), "sections": {"benefits": []}}
+            schemes.append(current)
+        elif current is not None and line.strip().startswith("-"):
+            current["sections"]["benefits"].append(line.strip())
+    for scheme in schemes:
+        scheme["sections"] = {k: "\n".join(v) for k, v in scheme["sections"].items() if v}
+    return schemes
+
+
+def name_aliases(name):
+    """Naam se aliases: poora naam, bracket wala abbreviation, bina "Yojana/Scheme", bina "PM"."""
+    base = re.sub(r"\(.*?\)", " ", name)
+    aliases = {normalize(base).strip()}
+    aliases.update(normalize(abbr).strip() for abbr in re.findall(r"\((.*?)\)", name))
+    for alias in list(aliases):
+        trimmed = re.sub(r" (yojana|scheme)$", "", alias)
+        aliases.add(trimmed)
+        aliases.add(" ".join(word for word in trimmed.split() if word != "yojana"))
+        if trimmed.startswith("pm ") and len(trimmed.split()) > 2:
+            aliases.add(trimmed[3:])
+    # Ek akela generic word (e.g. "pm") alias nahi banega
+    return sorted(a for a in aliases if a and (len(a.split()) > 1 or len(a) >= 3) and a not in FILLERS)
+
+
+def format_answer(scheme, intents):
+    """Sections ko LLM answer jaisa markdown: heading, section body, official link."""
+    parts = []
+    for intent in intents:
+        if intent == "overview":
+            parts.append(f"**{scheme['name']}**\n\n{scheme['sections']['overview']}")
+            if "benefits" in scheme["sections"]:
+                parts.append(f"**Benefits**\n{scheme['sections']['benefits']}")
+        else:
+            parts.append(f"**{scheme['name']} — {SECTION_TITLES[intent]}**\n\n{scheme['sections'][intent]}")
+    if scheme.get("link"):
+        parts.append(f"🔗 Official Link: {scheme['link']}")
+    return "\n\n".join(parts)
+
+
+def build_scheme_index(data_dir=SCHEME_DATA_DIR, summary_texts=(), path=SCHEME_INDEX_PATH):
+    """
+    data/*.txt + summary texts (HARDCODED_RULES) se index banao, `path` pe likho (None = sirf memory).
+    Summary wali scheme kisi data file se alias share kare to usi me merge hoti hai (sirf missing sections).
+    """
+    schemes = {}
+    for file_path in sorted(glob.glob(os.path.join(data_dir, "*.txt"))):
+        with open(file_path, encoding="utf-8") as f:
+            parsed = parse_scheme_file(f.read())
+        if not parsed["name"] or not parsed["sections"]:
+            continue
+        scheme_id = os.path.splitext(os.path.basename(file_path))[0]
+        parsed.update(id=scheme_id, sources=[os.path.basename(file_path)],
+                      aliases=sorted(set(name_aliases(parsed["name"])) |
+                                     {normalize(a).strip() for a in SCHEME_ALIASES.get(scheme_id, [])}))
+        schemes[scheme_id] = parsed
+
+    for text in summary_texts:
+        for parsed in parse_summary_rules(text):
+            aliases = set(name_aliases(parsed["name"]))
+            target = next((s for s in schemes.values() if aliases & set(s["aliases"])), None)
+            if target is None:
+                scheme_id = slugify(re.sub(r"\(.*?\)", " ", parsed["name"]))
+                target = schemes.setdefault(scheme_id, {"id": scheme_id, "name": parsed["name"], "state": None,
+                                                        "sector": None, "link": None, "sections": {},
+                                                        "sources": [], "aliases": []})
+            for key, body in parsed["sections"].items():
+                target["sections"].setdefault(key, body)
+            target["aliases"] = sorted(set(target["aliases"]) | aliases)
+            target["sources"].append("manual_entry")
+
+    # Structured answers ek baar yahin ban jaate hain, query time pe sirf lookup
+    for scheme in schemes.values():
+        scheme["answers"] = {intent: format_answer(scheme, [intent])
+                             for intent in SECTION_TITLES if intent in scheme["sections"]}
+
+    index = {"format": INDEX_FORMAT, "built_at": time.time(), "schemes": schemes}
+    if path:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+        print(f"🏎️ Scheme index built: {len(schemes)} schemes, "
+              f"{sum(len(s['aliases']) for s in schemes.values())} aliases -> {path}")
+    return index
+
+
+# --- QUERY TIME ---
+class SchemeFastPath:
+    """
+    Index (disk snapshot, na ho to data/*.txt se memory me) + automaton. `answer(query)` confident
+    match pe precomputed answer deta hai, warna None. Ingest naya snapshot likhe to apne aap reload.
+    `index` diya ho (benchmarks) to wahi fixed rehta hai, disk nahi dekhta.
+    """
+
+    def __init__(self, path=SCHEME_INDEX_PATH, data_dir=SCHEME_DATA_DIR, max_words=FAST_PATH_MAX_WORDS,
+                 max_extra_words=FAST_PATH_MAX_EXTRA_WORDS, reload_interval=FAST_PATH_RELOAD_INTERVAL, index=None):
+        self.path = path
+        self.data_dir = data_dir
+        self.max_words = max_words
+        self.max_extra_words = max_extra_words
+        self.reload_interval = reload_interval
+        self._loaded = None  # (schemes, matcher): ek saath badalte hain, reload pe ek hi assignment
+        self._mtime = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disqualified = 0
+        self._fixed = index is not None
+        if self._fixed:
+            self._install(index)
+
+    def _install(self, index):
+        patterns = {}
+        for intent, words in INTENT_WORDS.items():
+            for word in words:
+                patterns[normalize(word)] = ("intent", intent)
+        for scheme_id, scheme in index["schemes"].items():
+            for alias in scheme["aliases"]:
+                patterns[f" {alias} "] = ("scheme", scheme_id)
+        self._loaded = (index["schemes"], AhoCorasick(patterns))
+
+    def ensure_loaded(self):
+        """Current (schemes, matcher) snapshot; caller poori query isi ek snapshot pe chalaye."""
+        now = time.monotonic()
+        loaded = self._loaded
+        if self._fixed or (loaded is not None and now - self._checked < self.reload_interval):
+            return loaded
+        with self._lock:
+            self._checked = now
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                mtime = None
+            if self._loaded is not None and mtime == self._mtime:
+                return self._loaded
+            try:
+                if mtime is not None:
+                    with open(self.path, encoding="utf-8") as f:
+                        index = json.load(f)
+                    if index.get("format") != INDEX_FORMAT:
+                        raise ValueError(f"format {index.get('format')} != {INDEX_FORMAT}")
+                    source = "disk"
+                else:
+                    # Ingest abhi chala nahi: curated files se memory me (HARDCODED_RULES ke bina)
+                    index = build_scheme_index(self.data_dir, path=None)
+                    source = self.data_dir
+                self._install(index)
+                self._mtime = mtime
+                print(f"🏎️ Scheme index loaded from {source}: {len(self._loaded[0])} schemes")
+            except Exception as e:
+                print(f"⚠️ Scheme index load failed: {e}")
+                if self._loaded is None:
+                    self._install({"schemes": {}})
+            return self._loaded
+
+    def _match(self, query_text):
+        """
+        Returns (scheme, intents) ya (None, reason); scheme record usi snapshot ka jisse match hua.
+        Confident tabhi: English sawaal, ek hi scheme, koi disqualifier nahi, intent saaf
+        (ya sirf scheme ka naam = overview), section index me ho.
+        """
+        schemes, matcher = self.ensure_loaded()
+        if any(char.isalpha() and not char.isascii() for char in query_text or ""):
+            return None, "language"  # Hindi/Gujarati script: canned answers English me, LLM jawab de
+        text = normalize(query_text)
+        words = text.split()
+        if not words or len(words) > self.max_words:
+            return None, "length"
+        if any(word in HINGLISH_WORDS for word in words):
+            return None, "language"  # Hinglish pe bhi wahi rule: English canned text nahi
+        if any(word in DISQUALIFIERS for word in words):
+            return None, "disqualified"
+
+        found = longest_matches(matcher.find(text))
+        scheme_ids = {value[1] for _, _, value in found if value[0] == "scheme"}
+        if len(scheme_ids) != 1:
+            return None, "no_scheme" if not scheme_ids else "ambiguous"
+        intents = []
+        for _, _, (kind, name) in found:
+            if kind == "intent" and name not in intents:
+                intents.append(name)
+
+        # Match hue hisse hata ke jo bacha, wo "extra" words (fillers chhod ke)
+        leftover = list(text)
+        for start, end, _ in found:
+            leftover[start:end] = " " * (end - start)
+        extra = [word for word in "".join(leftover).split() if word not in FILLERS]
+        if len(extra) > self.max_extra_words:
+            return None, "extra_words"
+
+        if len(intents) > 1 and "overview" in intents:
+            intents.remove("overview")  # "PM Kisan eligibility kya hai": overview nahi, eligibility
+        if not intents:
+            if extra:
+                return None, "no_intent"
+            intents = ["overview"]
+        scheme = schemes[scheme_ids.pop()]
+        if not all(intent in scheme["answers"] for intent in intents):
+            return None, "missing_section"
+        return scheme, intents
+
+    def match(self, query_text):
+        """Returns (scheme_id, intents) ya (None, reason)."""
+        scheme, detail = self._match(query_text)
+        return (scheme["id"] if scheme is not None else None), detail
+
+    def answer(self, query_text):
+        """Precomputed answer ya None (RAG chalao). Hit/miss stats yahin ginte hain."""
+        scheme, intents = self._match(query_text)
+        with self._lock:
+            if scheme is None:
+                self.misses += 1
+                self.disqualified += intents == "disqualified"
+                return None
+            self.hits += 1
+        if len(intents) == 1:
+            return scheme["answers"][intents[0]]
+        return format_answer(scheme, intents)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            schemes, matcher = self._loaded or ({}, None)
+            return {
+                "schemes": len(schemes),
+                "automaton_states": len(matcher) if matcher else 0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disqualified": self.disqualified,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+fast_path = SchemeFastPath()
@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl  # Cross-worker file lock (Linux/macOS); Windows pe sirf in-process coalescing
+except ImportError:
+    fcntl = None
+
+# --- CONFIGURATION ---
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+# "thread" = sirf is worker ke threads; "file" = gunicorn ke saare workers ek file lock se
+SINGLE_FLIGHT_SCOPE = os.getenv("SINGLE_FLIGHT_SCOPE", "thread").lower()
+SINGLE_FLIGHT_DIR = os.getenv(
+    "SINGLE_FLIGHT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "single_flight"),
+)
+# Dusre worker ka result itni der tak "abhi abhi bana" maana jaata hai
+SINGLE_FLIGHT_RESULT_TTL = float(os.getenv("SINGLE_FLIGHT_RESULT_TTL", "5"))
+
+
+class _Call:
+    """Ek in-flight computation. Leader resolve/reject karta hai, baaki wait()."""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+
+    def resolve(self, result):
+        self._result = result
+        self._done.set()
+
+    def reject(self, error):
+        self._error = error
+        self._done.set()
+
+    def wait(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise TimeoutError("single-flight leader did not finish in time")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class SingleFlight:
+    """
+    Same key ke concurrent requests ek hi computation share karte hain (Go ka singleflight).
+    Pehla caller leader banta hai; jab tak wo chal raha hai, baaki callers uska result lete hain.
+    Result cache nahi hota: leader khatam hote hi agla request naya computation karega.
+
+    scope="file" ho to leader pehle key ke lock file pe flock leta hai; dusre worker ka leader
+    usi key pe ho to ye wait karta hai aur uska (TTL ke andar likha) result padh leta hai.
+    """
+
+    def __init__(self, scope=SINGLE_FLIGHT_SCOPE, lock_dir=SINGLE_FLIGHT_DIR, result_ttl=SINGLE_FLIGHT_RESULT_TTL):
+        self.cross_process = scope == "file" and fcntl is not None
+        self.lock_dir = lock_dir
+        self.result_ttl = result_ttl
+        self._calls = {}
+        self._async_calls = {}  # ASGI path: key -> asyncio.Future (ek event loop per process)
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.cross_process_hits = 0
+        self.errors = 0
+
+    def join(self, key):
+        """
+        Returns (call, is_leader). Leader ko kaam karke finish() call karna hai;
+        follower sirf call.wait() karta hai.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            self.leaders += 1
+            return call, True
+
+    def finish(self, key, call, result=None, error=None):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            if error is not None:
+                self.errors += 1
+        if error is not None:
+            call.reject(error)
+        else:
+            call.resolve(result)
+
+    def do(self, key, fn):
+        """fn() ek baar chalta hai, us waqt same key pe aaye saare callers ko wahi result/exception."""
+        call, leader = self.join(key)
+        if not leader:
+            return call.wait()
+        try:
+            result = self._run_cross_process(key, fn) if self.cross_process else fn()
+        except Exception as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result=result)
+        return result
+
+    # --- ASYNC (ASGI path) ---
+    def ajoin(self, key):
+        """join() ka asyncio version: returns (future, is_leader). Running event loop me hi call karo."""
+        with self._lock:
+            future = self._async_calls.get(key)
+            if future is not None and not future.done():
+                self.coalesced += 1
+                return future, False
+            future = self._async_calls[key] = asyncio.get_running_loop().create_future()
+            self.leaders += 1
+            return future, True
+
+    def afinish(self, key, future, result=None, error=None):
+        with self._lock:
+            if self._async_calls.get(key) is future:
+                del self._async_calls[key]
+            if error is not None:
+                self.errors += 1
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+            future.exception()  # Koi follower na ho to "exception never retrieved" warning nahi
+        else:
+            future.set_result(result)
+
+    async def ado(self, key, fn):
+        """do() ka async version: `await fn()` ek baar; followers (shield ke saath) wahi result await karte hain."""
+        future, leader = self.ajoin(key)
+        if not leader:
+            # Follower cancel ho (client chala gaya) to leader ka kaam cancel na ho
+            return await asyncio.shield(future)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self.afinish(key, future, error=e if isinstance(e, Exception) else RuntimeError("single-flight leader cancelled"))
+            raise
+        self.afinish(key, future, result=result)
+        return result
+
+    # --- CROSS-WORKER (file lock) ---
+    def _paths(self, key):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        base = os.path.join(self.lock_dir, digest)
+        return base + ".lock", base + ".json"
+
+    def _read_fresh(self, result_path, key, since):
+        try:
+            with open(result_path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        fresh = entry.get("key") == key and entry.get("finished_at", 0) >= since - self.result_ttl
+        return entry if fresh else None
+
+    def _run_cross_process(self, key, fn):
+        os.makedirs(self.lock_dir, exist_ok=True)
+        lock_path, result_path = self._paths(key)
+        requested_at = time.time()
+        with open(lock_path, "a+") as lock_file:
+            # Dusra worker isi key pe kaam kar raha ho to yahan block hote hain
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                entry = self._read_fresh(result_path, key, requested_at)
+                if entry is not None:
+                    with self._lock:
+                        self.cross_process_hits += 1
+                    return entry["result"]
+                result = fn()
+                tmp_path = f"{result_path}.{os.getpid()}.tmp"
+                try:
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        json.dump({"key": key, "finished_at": time.time(), "result": result}, f, ensure_ascii=False)
+                    os.replace(tmp_path, result_path)
+                except (OSError, TypeError) as e:
+                    # Result share nahi hua to bhi is request ka answer sahi hai
+                    print(f"⚠️ Single-flight result not shared: {e}")
+                return result
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def stats(self):
+        with self._lock:
+            total = self.leaders + self.coalesced
+            return {
+                "in_flight": len(self._calls) + len(self._async_calls),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "coalesced_rate": round(self.coalesced / total, 4) if total else 0.0,
+                "cross_process_hits": self.cross_process_hits,
+                "errors": self.errors,
+                "scope": "file" if self.cross_process else "thread",
+            }
+
+
+single_flight = SingleFlight()
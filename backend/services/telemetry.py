@@ -0,0 +1,344 @@
+import bisect
+import contextvars
+import glob
+import io
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# --- CONFIGURATION ---
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # text | json
+# Gunicorn ke kai workers: har worker apna snapshot yahan likhta hai, /metrics sab jodta hai
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))  # Seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Request ka ID aur uske stage timings (thread/greenlet-safe)
+_request_id = contextvars.ContextVar("request_id", default=None)
+_timings = contextvars.ContextVar("timings", default=None)
+
+
+# --- METRICS ---
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        REGISTRY.register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    @staticmethod
+    def _encode_key(key):
+        # Snapshot JSON me jaata hai (keys string hi ho sakti hain); JSON list me "|" wale values bhi safe
+        return json.dumps(key, ensure_ascii=False)
+
+    def _decode_key(self, key):
+        if not self.labelnames:
+            return ()
+        try:
+            decoded = json.loads(key)
+        except ValueError:
+            decoded = None
+        if isinstance(decoded, list):
+            return tuple(decoded)
+        return tuple(key.split("|"))  # Purane worker snapshot ka "a|b" format
+
+    def _labels(self, key, extra=()):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        # Exposition format: sirf value me \, " aur newline escape hote hain
+        escaped = (f'{k}="{_escape_label_value(v)}"' for k, v in pairs)
+        return "{" + ",".join(escaped) + "}"
+
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return {self._encode_key(k): v for k, v in self._values.items()}
+
+    def render(self, values):
+        for key, value in values.items():
+            yield f"{self.name}_total{self._labels(self._decode_key(key))} {value}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {self._encode_key(k): [list(s[0]), s[1], s[2]] for k, s in self._values.items()}
+
+    def render(self, values):
+        for key, (counts, total, count) in values.items():
+            key = self._decode_key(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket{self._labels(key, [('le', le)])} {cumulative}"
+            yield f"{self.name}_sum{self._labels(key)} {total}"
+            yield f"{self.name}_count{self._labels(key)} {count}"
+
+
+def _merge(kind, values, other):
+    for key, value in other.items():
+        if key not in values:
+            values[key] = value
+        elif kind == "counter":
+            values[key] += value
+        else:
+            current = values[key]
+            current[0] = [a + b for a, b in zip(current[0], value[0])]
+            current[1] += value[1]
+            current[2] += value[2]
+
+
+class Registry:
+    """Process-wide metrics + stats collectors, Prometheus text format me render."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._flusher = None
+        self._flusher_pid = None
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+    def register_stats(self, prefix, stats_fn, documentation=""):
+        """Kisi bhi `stats()` dict ke numeric fields `<prefix>_<field>` gauges ban jaate hain."""
+        self._collectors.append((prefix, stats_fn, documentation))
+
+    def snapshot(self):
+        return {m.name: m.snapshot() for m in self._metrics}
+
+    # --- MULTI-WORKER ---
+    def _snapshot_path(self, pid=None):
+        return os.path.join(METRICS_DIR, f"metrics-{pid or os.getpid()}.json")
+
+    def flush(self):
+        if not METRICS_DIR:
+            return
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = self._snapshot_path()
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + ".tmp", path)
+
+    def ensure_flusher(self):
+        # Fork ke baad har worker apna thread (pid-aware, persistence queue jaisa)
+        if not METRICS_DIR or (self._flusher_pid == os.getpid() and self._flusher.is_alive()):
+            return
+        self._flusher_pid = os.getpid()
+
+        def run():
+            while True:
+                time.sleep(METRICS_FLUSH_INTERVAL)
+                try:
+                    self.flush()
+                except OSError as e:
+                    print(f"⚠️ Metrics flush failed: {e}")
+
+        self._flusher = threading.Thread(target=run, name="metrics-flusher", daemon=True)
+        self._flusher.start()
+
+    def _merged(self):
+        merged = self.snapshot()
+        if not METRICS_DIR:
+            return merged
+        own = self._snapshot_path()
+        for path in glob.glob(os.path.join(METRICS_DIR, "metrics-*.json")):
+            if path == own:
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    other = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for metric in self._metrics:
+                _merge(metric.kind, merged.setdefault(metric.name, {}), other.get(metric.name, {}))
+        return merged
+
+    def render(self):
+        values = self._merged()
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render(values.get(metric.name, {})))
+        worker = f'{{worker="{os.getpid()}"}}' if METRICS_DIR else ""
+        for prefix, stats_fn, documentation in self._collectors:
+            try:
+                stats = stats_fn()
+            except Exception as e:
+                print(f"⚠️ Stats collector {prefix} failed: {e}")
+                continue
+            for field, value in _flatten(stats):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{prefix}_{field}"
+                lines.append(f"# HELP {name} {documentation or prefix} ({field})")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name}{worker} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _flatten(stats, prefix=""):
+    for key, value in stats.items():
+        field = f"{prefix}{key}".lower().replace("-", "_").replace(" ", "_")
+        if isinstance(value, dict):
+            yield from _flatten(value, field + "_")
+        else:
+            yield field, value
+
+
+REGISTRY = Registry()
+
+# Request path ke standard metrics
+HTTP_SECONDS = Histogram("niti_http_request_seconds", "HTTP request latency (time to first byte)",
+                         ("route", "method", "status"))
+STAGE_SECONDS = Histogram("niti_stage_seconds", "Latency per pipeline stage", ("stage",))
+LLM_SECONDS = Histogram("niti_llm_seconds", "LLM call latency per provider", ("provider", "outcome"))
+LLM_FALLBACKS = Counter("niti_llm_fallback", "Answers served by a non-primary provider", ("provider",))
+CACHE_LOOKUPS = Counter("niti_cache_lookups", "Cache lookups by cache and result", ("cache", "result"))
+LLM_TOKENS = Counter("niti_llm_tokens", "Estimated LLM tokens (chars/4)", ("direction",))
+DB_WRITE_SECONDS = Histogram("niti_db_write_seconds", "Background DB batch write latency", ("table",))
+
+
+# --- SPANS ---
+def start_request(request_id=None):
+    """Naya request context: ID set karta hai aur stage timings ka list shuru."""
+    request_id = request_id or uuid.uuid4().hex[:12]
+    _request_id.set(request_id)
+    _timings.set([])
+    return request_id
+
+
+def end_request():
+    """Request khatam: thread pool me agli request/background log pe purana ID na chipke."""
+    _request_id.set(None)
+    _timings.set(None)
+
+
+def current_request_id():
+    return _request_id.get()
+
+
+def request_timings():
+    return _timings.get() or []
+
+
+@contextmanager
+def span(stage):
+    """
+    `with span("embed"):` -> stage latency histogram + request ke Server-Timing me entry.
+    Overhead: do perf_counter calls + ek lock, network calls ke saamne kuch nahi.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def server_timing_header(timings):
+    return ", ".join(f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in timings)
+
+
+# --- LOGS ---
+class _ContextStream(io.TextIOBase):
+    """
+    stdout wrapper: existing `print` lines me request ID jodta hai (text) ya har line ko
+    JSON record bana deta hai (LOG_FORMAT=json). Services ke print calls badalne nahi padte.
+    """
+
+    def __init__(self, stream, fmt):
+        self._stream = stream
+        self._format = fmt
+        self._local = threading.local()
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", "") + text
+        *lines, rest = buffer.split("\n")
+        self._local.buffer = rest
+        for line in lines:
+            self._stream.write(self._format_line(line) + "\n")
+        if lines:
+            self._stream.flush()
+        return len(text)
+
+    def _format_line(self, line):
+        request_id = _request_id.get()
+        if self._format == "json":
+            record = {"ts": datetime.now(timezone.utc).isoformat(), "message": line,
+                      "thread": threading.current_thread().name}
+            if request_id:
+                record["request_id"] = request_id
+            return json.dumps(record, ensure_ascii=False)
+        return f"[{request_id}] {line}" if request_id else line
+
+    def flush(self):
+        self._stream.flush()
+
+    def fileno(self):
+        return self._stream.fileno()
+
+    def isatty(self):
+        return self._stream.isatty()
+
+
+def install_log_context(fmt=LOG_FORMAT):
+    """Ek baar call karo (app startup): stdout pe request-aware wrapper."""
+    if not isinstance(sys.stdout, _ContextStream):
+        sys.stdout = _ContextStream(sys.stdout, fmt)
+
+
+def run_in_context(fn):
+    """Executor threads me request ID le jaane ke liye: pool.submit(run_in_context(fn), ...)."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
@@ -0,0 +1,422 @@
+import contextlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+
+try:
+    import fcntl  # Workers ke saath wale saves ek dusre ki generation na hatayein (Linux/macOS)
+except ImportError:
+    fcntl = None
+
+from services.corpus_version import get_corpus_version
+from services.partitions import PartitionCodes
+
+# --- CONFIGURATION ---
+VECTOR_INDEX_DIR = os.getenv(
+    "VECTOR_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "vector_index"),
+)
+VECTOR_INDEX_DTYPE = os.getenv("VECTOR_INDEX_DTYPE", "float32")  # float32 | float16
+VECTOR_INDEX_MODE = os.getenv("VECTOR_INDEX_MODE", "auto")  # exact | ivf | auto
+# auto mode me itne rows ke upar hi IVF banta hai, chhote corpus pe exact hi fast hai
+VECTOR_INDEX_ANN_MIN_ROWS = int(os.getenv("VECTOR_INDEX_ANN_MIN_ROWS", "200000"))
+VECTOR_INDEX_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "8"))
+# Dusre host pe ingestion hua ho to corpus version file nahi badlegi, isliye periodic refresh bhi
+VECTOR_INDEX_MAX_AGE = float(os.getenv("VECTOR_INDEX_MAX_AGE", "3600"))  # Seconds
+PAGE_SIZE = 1000
+SCORE_BLOCK_ROWS = 65536  # float16 ko itne rows ke blocks me float32 karke score karte hain
+# Partition corpus ke itne hisse se bada ho to subset copy ki jagah poora matmul + mask sasta hai
+PARTITION_DENSE_FRACTION = 0.5
+CURRENT_FILE = "CURRENT"  # Snapshot dir me: abhi wali generation ka naam
+
+
+@contextlib.contextmanager
+def _snapshot_lock(path):
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(path, ".lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _current_generation(path):
+    try:
+        with open(os.path.join(path, CURRENT_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _remove_old_generations(path, keep):
+    # Windows pe mmap wali files delete nahi hoti: jo na hate wo agle save pe phir try hogi
+    for name in os.listdir(path):
+        if name in keep or name.startswith(CURRENT_FILE) or name == ".lock":
+            continue
+        target = os.path.join(path, name)
+        if os.path.isdir(target):
+            shutil.rmtree(target, ignore_errors=True)
+        else:
+            with contextlib.suppress(OSError):
+                os.remove(target)  # Purane (generation se pehle wale) layout ki files
+
+
+def _parse_embedding(value):
+    # PostgREST pgvector column ko "[0.1,0.2,...]" string ke roop me bhejta hai
+    if isinstance(value, str):
+        value = json.loads(value)
+    return value
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class VectorIndex:
+    """
+    `documents` table ka in-memory snapshot: ek contiguous (N x D) matrix jisme
+    rows pehle se L2-normalized hain, taaki cosine similarity = ek matmul.
+
+    search() ka contract `match_documents` RPC jaisa hai: similarity > threshold,
+    top `match_count`, rows me id/content/metadata/similarity. `partition` (PartitionFilter)
+    ho to sirf us region/category ke rows score hote hain.
+    """
+
+    def __init__(self, ids, contents, metadatas, matrix, dtype=VECTOR_INDEX_DTYPE, version=None):
+        self.ids = list(ids)
+        self.contents = list(contents)
+        self.metadatas = list(metadatas)
+        self.matrix = matrix if matrix.dtype == np.dtype(dtype) else np.ascontiguousarray(matrix, dtype=dtype)
+        self.version = version
+        self.built_at = time.time()
+        # IVF (ANN) structures, build_ivf() ke baad set hote hain
+        self.centroids = None
+        self.list_order = None
+        self.list_offsets = None
+        self._partition_codes = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def partition_codes(self):
+        # Pehli filtered search pe banta hai (metadatas pe ek pass)
+        if self._partition_codes is None:
+            self._partition_codes = PartitionCodes(self.metadatas)
+        return self._partition_codes
+
+    def scan_fraction(self, partition):
+        """Partition ke liye corpus ka kitna hissa score hota hai (metrics ke liye)."""
+        if partition is None or not len(self):
+            return 1.0
+        return len(self.partition_codes.rows(partition)) / len(self)
+
+    # --- BUILD ---
+    @classmethod
+    def from_rows(cls, rows, dtype=VECTOR_INDEX_DTYPE, version=None):
+        ids, contents, metadatas, vectors = [], [], [], []
+        for row in rows:
+            embedding = _parse_embedding(row.get("embedding"))
+            if not embedding:
+                continue
+            ids.append(row["id"])
+            contents.append(row.get("content") or "")
+            metadatas.append(row.get("metadata") or {})
+            vectors.append(embedding)
+        matrix = _normalize_rows(np.asarray(vectors, dtype=np.float32)) if vectors else np.zeros((0, 0), np.float32)
+        return cls(ids, contents, metadatas, matrix, dtype=dtype, version=version)
+
+    @classmethod
+    def from_supabase(cls, client, dtype=VECTOR_INDEX_DTYPE, version=None, table="documents"):
+        rows, start = [], 0
+        while True:
+            page = client.table(table)\
+                .select("id, content, metadata, embedding")\
+                .order("id")\
+                .range(start, start + PAGE_SIZE - 1)\
+                .execute()
+            rows.extend(page.data or [])
+            if not page.data or len(page.data) < PAGE_SIZE:
+                break
+            start += PAGE_SIZE
+        return cls.from_rows(rows, dtype=dtype, version=version)
+
+    def build_ivf(self, nlist=None, iterations=10, sample_size=50000, seed=0):
+        """Spherical k-means se inverted lists banata hai (IVF). Bade corpus ke liye."""
+        n = len(self)
+        if n == 0:
+            return
+        nlist = nlist or max(1, min(n, int(4 * np.sqrt(n))))
+        rng = np.random.default_rng(seed)
+        sample = self.matrix[rng.choice(n, size=min(n, sample_size), replace=False)].astype(np.float32)
+        centroids = sample[rng.choice(len(sample), size=min(nlist, len(sample)), replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(len(centroids)):
+                members = sample[assign == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = _normalize_rows(centroids)
+
+        assign = np.empty(n, dtype=np.int32)
+        for start in range(0, n, SCORE_BLOCK_ROWS):
+            block = self.matrix[start:start + SCORE_BLOCK_ROWS].astype(np.float32, copy=False)
+            assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        self.centroids = centroids.astype(np.float32)
+        self.list_order = np.argsort(assign, kind="stable").astype(np.int64)
+        self.list_offsets = np.searchsorted(assign[self.list_order], np.arange(len(centroids) + 1)).astype(np.int64)
+
+    # --- SEARCH ---
+    def _score(self, q, rows=None):
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        if matrix.dtype == np.float32:
+            return matrix @ q
+        # float16 ke liye numpy matmul slow hai: blocks me upcast karo
+        scores = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+            block = matrix[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[start:start + len(block)] = block @ q
+        return scores
+
+    def _top(self, scores, rows, match_threshold, match_count):
+        """scores (candidate rows ke) -> RPC jaise result dicts, best pehle."""
+        k = min(match_count, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for i in top:
+            similarity = float(scores[i])
+            if similarity <= match_threshold:
+                break
+            row = int(rows[i]) if rows is not None else int(i)
+            results.append({
+                "id": self.ids[row],
+                "content": self.contents[row],
+                "metadata": self.metadatas[row],
+                "similarity": similarity,
+            })
+        return results
+
+    def search(self, query_vector, match_threshold=0.1, match_count=6, nprobe=VECTOR_INDEX_NPROBE, partition=None):
+        if len(self) == 0 or match_count <= 0:
+            return []
+        q = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if norm == 0:
+            return []
+        q = q / norm
+
+        if self.centroids is not None:
+            probes = np.argsort(-(self.centroids @ q))[:nprobe]
+            rows = np.concatenate([
+                self.list_order[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probes
+            ])
+            if partition is not None:
+                rows = rows[self.partition_codes.mask(partition)[rows]]
+            scores = self._score(q, rows)
+        elif partition is not None and self.scan_fraction(partition) < PARTITION_DENSE_FRACTION:
+            rows = self.partition_codes.rows(partition)
+            scores = self._score(q, rows)
+        else:
+            rows = None
+            scores = self._score(q)
+            if partition is not None:
+                scores = np.where(self.partition_codes.mask(partition), scores, -np.inf)
+        return self._top(scores, rows, match_threshold, match_count)
+
+    def _batch_scores(self, queries, rows=None):
+        """(rows x B) scores: ek matmul (float16 blocks me)."""
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        if matrix.dtype == np.float32:
+            return matrix @ queries
+        scores = np.empty((len(matrix), queries.shape[1]), dtype=np.float32)
+        for start in range(0, len(matrix), SCORE_BLOCK_ROWS):
+            block = matrix[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+            scores[start:start + len(block)] = block @ queries
+        return scores
+
+    def search_batch(self, query_vectors, match_threshold=0.1, match_count=6, nprobe=VECTOR_INDEX_NPROBE,
+                     partitions=None):
+        """
+        Kai queries ek saath: exact mode me ek (N x D) @ (D x B) matmul, har query ke liye
+        alag pass nahi. `partitions` (har query ka PartitionFilter) ho to same partition wali
+        queries ek group me, sirf us subset pe. IVF me har query ke probes alag hain, isliye search().
+        """
+        partitions = partitions or [None] * len(query_vectors)
+        if self.centroids is not None or len(self) == 0 or match_count <= 0:
+            return [self.search(q, match_threshold, match_count, nprobe, partition=p)
+                    for q, p in zip(query_vectors, partitions)]
+        queries = np.asarray(query_vectors, dtype=np.float32).reshape(len(query_vectors), -1)
+        norms = np.linalg.norm(queries, axis=1)
+        queries = _normalize_rows(queries)
+
+        groups = {}
+        for j, partition in enumerate(partitions):
+            groups.setdefault(partition, []).append(j)
+        results = [[] for _ in query_vectors]
+        for partition, members in groups.items():
+            rows = self.partition_codes.rows(partition) if partition is not None else None
+            scores = self._batch_scores(queries[members].T, rows)
+            for column, j in enumerate(members):
+                if norms[j]:
+                    results[j] = self._top(scores[:, column], rows, match_threshold, match_count)
+        return results
+
+    # --- PERSISTENCE (mmap reload) ---
+    def save(self, path):
+        """
+        Har save nayi generation dir (path/g...) likhta hai aur CURRENT use point karta hai. Pichhli
+        generation agle save tak rehti hai: dusre workers ne uski .npy files abhi mmap ki ho sakti hain.
+        """
+        os.makedirs(path, exist_ok=True)
+        # Har worker ka apna tmp dir: saath me rebuild karne wale ek dusre ki files nahi kaatte
+        tmp_path = f"{path}.tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        os.makedirs(tmp_path)
+        try:
+            np.save(os.path.join(tmp_path, "vectors.npy"), self.matrix)
+            if self.centroids is not None:
+                np.save(os.path.join(tmp_path, "centroids.npy"), self.centroids)
+                np.save(os.path.join(tmp_path, "list_order.npy"), self.list_order)
+                np.save(os.path.join(tmp_path, "list_offsets.npy"), self.list_offsets)
+            with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({
+                    "version": self.version,
+                    "built_at": self.built_at,
+                    "ids": self.ids,
+                    "contents": self.contents,
+                    "metadatas": self.metadatas,
+                }, f, ensure_ascii=False)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)  # Adhoora snapshot (disk full etc.) peeche na chhodo
+            raise
+        with _snapshot_lock(path):
+            previous = _current_generation(path)
+            generation = f"g{time.time_ns()}-{os.getpid()}"
+            try:
+                os.replace(tmp_path, os.path.join(path, generation))
+            except OSError:
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                raise
+            pointer = os.path.join(path, f"{CURRENT_FILE}.tmp-{os.getpid()}")
+            with open(pointer, "w", encoding="utf-8") as f:
+                f.write(generation)
+            os.replace(pointer, os.path.join(path, CURRENT_FILE))
+            _remove_old_generations(path, keep={generation, previous})
+
+    @staticmethod
+    def has_snapshot(path):
+        return _current_generation(path) is not None or os.path.exists(os.path.join(path, "meta.json"))
+
+    @classmethod
+    def load(cls, path):
+        generation = _current_generation(path)
+        if generation is not None:
+            path = os.path.join(path, generation)  # Warna purana layout: files seedhe path me
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        matrix = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        index = cls(meta["ids"], meta["contents"], meta["metadatas"], matrix,
+                    dtype=matrix.dtype, version=meta.get("version"))
+        index.built_at = meta.get("built_at", index.built_at)
+        if os.path.exists(os.path.join(path, "centroids.npy")):
+            index.centroids = np.load(os.path.join(path, "centroids.npy"))
+            index.list_order = np.load(os.path.join(path, "list_order.npy"), mmap_mode="r")
+            index.list_offsets = np.load(os.path.join(path, "list_offsets.npy"))
+        return index
+
+
+class LocalVectorStore:
+    """
+    Request path ke liye wrapper: disk snapshot (mmap) se fast start, corpus version
+    badalne ya snapshot purana hone par background me DB se rebuild aur atomic swap.
+    Index ready na ho to search() None deta hai aur caller RPC pe fallback karta hai.
+    """
+
+    def __init__(self, client, path=VECTOR_INDEX_DIR, mode=VECTOR_INDEX_MODE, dtype=VECTOR_INDEX_DTYPE,
+                 max_age=VECTOR_INDEX_MAX_AGE):
+        self.client = client
+        self.path = path
+        self.mode = mode
+        self.dtype = dtype
+        self.max_age = max_age
+        self._index = None
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def _build(self, version):
+        index = VectorIndex.from_supabase(self.client, dtype=self.dtype, version=version)
+        if self.mode == "ivf" or (self.mode == "auto" and len(index) >= VECTOR_INDEX_ANN_MIN_ROWS):
+            index.build_ivf()
+        print(f"🧮 Vector index built: {len(index)} chunks ({self.dtype}, {'ivf' if index.centroids is not None else 'exact'})")
+        return index
+
+    def _refresh(self, version):
+        try:
+            index = self._build(version)
+            with self._lock:
+                self._index = index
+        except Exception as e:
+            print(f"⚠️ Vector index refresh failed: {e}")
+            return
+        finally:
+            self._refreshing = False
+        try:
+            # Snapshot sirf agle start ke liye: save fail ho to bhi naya index serve hota rahe
+            index.save(self.path)
+        except Exception as e:
+            print(f"⚠️ Vector index snapshot not saved: {e}")
+
+    def _is_stale(self, index, version):
+        return index.version != version or time.time() - index.built_at > self.max_age
+
+    def ensure_loaded(self):
+        """Pehli call pe snapshot load karta hai; stale ho to background refresh."""
+        version = get_corpus_version()
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None and VectorIndex.has_snapshot(self.path):
+                    try:
+                        self._index = VectorIndex.load(self.path)
+                        print(f"🧮 Vector index loaded from disk: {len(self._index)} chunks")
+                    except Exception as e:
+                        print(f"⚠️ Vector index snapshot unreadable: {e}")
+                index = self._index
+
+        if (index is None or self._is_stale(index, version)) and not self._refreshing:
+            with self._lock:
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh, args=(version,), daemon=True).start()
+        return index
+
+    def search(self, query_vector, match_threshold=0.1, match_count=6, partition=None):
+        index = self.ensure_loaded()
+        if index is None:
+            return None
+        return index.search(query_vector, match_threshold=match_threshold, match_count=match_count,
+                            partition=partition)
+
+    def search_batch(self, query_vectors, match_threshold=0.1, match_count=6, partitions=None):
+        index = self.ensure_loaded()
+        if index is None:
+            return None
+        return index.search_batch(query_vectors, match_threshold=match_threshold, match_count=match_count,
+                                  partitions=partitions)
+
+    def scan_fraction(self, partition):
+        index = self._index
+        return index.scan_fraction(partition) if index is not None else None
@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+
+# --- CONFIGURATION ---
+# Process start hote hi background me heavy clients bana do (server pehle hi requests le raha hota hai)
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "true").lower() == "true"
+# Bind/pehli request ko CPU pehle mile, prewarm itne seconds baad shuru
+PREWARM_DELAY = float(os.getenv("PREWARM_DELAY", "0"))
+
+
+class Prewarmer:
+    """
+    Named warm-up steps (imports, clients, indexes) ek background thread me, order me.
+    /readyz isi ka status dikhata hai: saare steps bina error ke ho gaye tab ready.
+    Fail hue steps agli start() pe dobara try hote hain.
+    """
+
+    def __init__(self, steps, delay=PREWARM_DELAY):
+        self.steps = list(steps)  # [(name, fn)]
+        self.delay = delay
+        self.process_started = time.time()
+        self._status = {name: {"state": "pending"} for name, _ in self.steps}
+        self._thread = None
+        self._lock = threading.Lock()
+        self.ready_at = None
+
+    def start(self):
+        """Idempotent: thread chal raha ho ya sab ready ho to kuch nahi karta."""
+        with self._lock:
+            if self.ready or (self._thread is not None and self._thread.is_alive()):
+                return False
+            self._thread = threading.Thread(target=self._run, name="prewarm", daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self):
+        if self.delay:
+            time.sleep(self.delay)
+        started = time.perf_counter()
+        for name, fn in self.steps:
+            if self._status[name]["state"] == "ok":
+                continue
+            self._status[name] = {"state": "running"}
+            step_started = time.perf_counter()
+            try:
+                fn()
+                self._status[name] = {"state": "ok", "seconds": round(time.perf_counter() - step_started, 3)}
+            except Exception as e:
+                print(f"⚠️ Prewarm step '{name}' failed: {e}")
+                self._status[name] = {"state": "error", "error": str(e)[:200],
+                                      "seconds": round(time.perf_counter() - step_started, 3)}
+        if self.ready:
+            self.ready_at = time.time()
+            print(f"🔥 Prewarm done in {time.perf_counter() - started:.2f}s "
+                  f"({self.ready_at - self.process_started:.2f}s after start)")
+
+    @property
+    def ready(self):
+        return all(status["state"] == "ok" for status in self._status.values())
+
+    def status(self):
+        return {
+            "ready": self.ready,
+            "seconds_since_start": round(time.time() - self.process_started, 3),
+            "ready_after_seconds": round(self.ready_at - self.process_started, 3) if self.ready_at else None,
+            "steps": {name: dict(status) for name, status in self._status.items()},
+        }
+
+    def stats(self):
+        # /metrics gauges: 1 = ready
+        done = sum(status["state"] == "ok" for status in self._status.values())
+        return {"ready": int(self.ready), "steps_done": done, "steps_total": len(self.steps)}